@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request latency of the security middleware stack
+
+Compares the previous BaseHTTPMiddleware implementation against the
+pure-ASGI middlewares in web/backend/security, using an in-process
+httpx ASGI transport so no network or server is involved.
+
+Usage:
+    python scripts/bench_middleware.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Exercise the full code path: auth enabled, generous rate limit
+os.environ.setdefault("API_KEY_ENABLED", "true")
+os.environ.setdefault("API_KEYS", "bench-key")
+os.environ.setdefault("RATE_LIMIT_REQUESTS", "100000000")
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from web.backend.security import auth, rate_limit
+from web.backend.security import APIKeyMiddleware, RateLimitMiddleware
+
+
+class LegacyAPIKeyMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware version this benchmark replaces"""
+
+    async def dispatch(self, request: Request, call_next):
+        api_key = request.headers.get(auth.API_KEY_NAME)
+        if api_key not in auth.VALID_API_KEYS:
+            return JSONResponse(status_code=403, content={"success": False})
+        return await call_next(request)
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware version this benchmark replaces"""
+
+    async def dispatch(self, request: Request, call_next):
+        client_ip = request.client.host if request.client else "unknown"
+        await rate_limit.rate_limiter.is_allowed(client_ip)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(rate_limit.RATE_LIMIT_REQUESTS)
+        response.headers["X-RateLimit-Window"] = str(rate_limit.RATE_LIMIT_WINDOW)
+        return response
+
+
+def build_app(rate_cls, auth_cls) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(rate_cls)
+    app.add_middleware(auth_cls)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> list[float]:
+    """Return per-request latencies in microseconds"""
+    transport = httpx.ASGITransport(app=app)
+    headers = {auth.API_KEY_NAME: "bench-key"}
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up
+        for _ in range(100):
+            await client.get("/api/ping", headers=headers)
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get("/api/ping", headers=headers)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            assert response.status_code == 200
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"  {name:<22} mean {statistics.mean(latencies):8.1f} us   "
+          f"p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000,
+                        help="Requests per variant (default: 5000)")
+    args = parser.parse_args()
+
+    print(f"\n  Middleware latency ({args.requests} requests each)\n")
+    legacy = asyncio.run(measure(build_app(LegacyRateLimitMiddleware, LegacyAPIKeyMiddleware), args.requests))
+    pure = asyncio.run(measure(build_app(RateLimitMiddleware, APIKeyMiddleware), args.requests))
+
+    legacy_p50 = report("BaseHTTPMiddleware", legacy)
+    pure_p50 = report("pure ASGI", pure)
+    print(f"\n  p50 speedup: {legacy_p50 / pure_p50:.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
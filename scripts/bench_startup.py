@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Measure import-time startup cost of the CLI and web backend
+
+Runs each scenario under `python -X importtime`, sums the cumulative time
+of top-level imports and checks that modules which must stay lazy
+(yt-dlp for history/stats/presets and the web app) were not loaded.
+Exits non-zero when a scenario exceeds its budget or loads a forbidden
+module, so it can guard against startup regressions in CI or cron hosts.
+
+Usage:
+    python scripts/bench_startup.py [--runs 5] [--scale 1.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DOWNLOAD_PY = ROOT / "skill" / "scripts" / "download.py"
+
+# name -> (argv after the interpreter, budget in ms, modules that must not be imported)
+SCENARIOS = {
+    "cli --stats": ([str(DOWNLOAD_PY), "--stats"], 250, ["yt_dlp", "rich.progress"]),
+    "cli --history": ([str(DOWNLOAD_PY), "--history"], 250, ["yt_dlp", "rich.progress"]),
+    "cli --list-presets": ([str(DOWNLOAD_PY), "--list-presets"], 250, ["yt_dlp", "rich.progress"]),
+    "web app import": (["-c", "import web.backend.main"], 1000, ["yt_dlp", "download", "uvicorn"]),
+}
+
+
+def parse_importtime(stderr: str) -> tuple[float, set[str]]:
+    """Return (total top-level cumulative microseconds, imported module names)"""
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Top-level imports are not indented
+        if not name.startswith("  ", 1):
+            total += int(cumulative)
+    return total, modules
+
+
+def run_scenario(argv: list[str], home: str) -> tuple[float, set[str]]:
+    env = {**os.environ, "HOME": home, "PYTHONPATH": str(ROOT)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def lazy_extractor_status() -> str:
+    code = (
+        "import sys; sys.path.insert(0, %r); import download; "
+        "print(download.lazy_extractors_available())" % str(DOWNLOAD_PY.parent)
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget, e.g. 2.0 on slow CI hosts (default: 1.0)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"\n  Startup import time (median of {args.runs} runs)\n")
+    with tempfile.TemporaryDirectory() as home:
+        for name, (argv, budget_ms, forbidden) in SCENARIOS.items():
+            budget_ms *= args.scale
+            totals = []
+            loaded = set()
+            for _ in range(args.runs):
+                total, modules = run_scenario(argv, home)
+                totals.append(total / 1000)
+                loaded |= modules
+            median = statistics.median(totals)
+            leaked = [m for m in forbidden if m in loaded]
+            status = "ok"
+            if median > budget_ms:
+                status = "OVER BUDGET"
+            if leaked:
+                status = f"loaded {', '.join(leaked)}"
+            failed |= status != "ok"
+            print(f"  {name:<22} {median:8.1f} ms / {budget_ms:6.0f} ms   {status}")
+
+    print(f"\n  yt-dlp lazy extractors available: {lazy_extractor_status()}\n")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-job startup latency of the download executors
+
+Runs the same small job - build a YoutubeDL and look up the YouTube
+extractor, i.e. everything a download does before its first request - on
+a thread of this (already warm) process, in a freshly spawned process per
+job, and in a child forked from the fork server's preloaded zygote. The
+first job of each mode is reported separately: it includes starting the
+thread pool, interpreter or zygote.
+
+Usage:
+    python scripts/bench_workers.py [--jobs 20]
+"""
+import argparse
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skill" / "scripts"))
+
+import download
+
+
+def job(emit=None) -> str:
+    """What a download job does before it touches the network"""
+    with download.yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+        return ydl.get_info_extractor("Youtube").IE_NAME
+
+
+def _spawned_job(conn):
+    conn.send(job())
+    conn.close()
+
+
+def run_thread(jobs: int) -> list[float]:
+    # A warm process: yt-dlp is imported once, before the first job
+    download.yt_dlp.YoutubeDL
+    latencies = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for _ in range(jobs):
+            start = time.perf_counter()
+            executor.submit(job).result()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run_spawn(jobs: int) -> list[float]:
+    context = multiprocessing.get_context("spawn")
+    latencies = []
+    for _ in range(jobs):
+        start = time.perf_counter()
+        parent, child = context.Pipe(duplex=False)
+        process = context.Process(target=_spawned_job, args=(child,))
+        process.start()
+        child.close()
+        parent.recv()
+        process.join()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run_fork_server(jobs: int) -> tuple[list[float], dict]:
+    server = download.ForkServer()
+    latencies = []
+    try:
+        for _ in range(jobs):
+            start = time.perf_counter()
+            server.run(job)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        server.close()
+    return latencies, server.stats()
+
+
+def report(name: str, latencies: list[float]) -> float:
+    first, rest = latencies[0], sorted(latencies[1:])
+    p50 = statistics.median(rest)
+    p95 = rest[max(0, int(len(rest) * 0.95) - 1)]
+    print(f"  {name:<12} first {first:8.1f} ms   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs per mode (default: 20)")
+    args = parser.parse_args()
+    jobs = max(2, args.jobs)
+
+    print(f"\n  Per-job startup latency ({jobs} jobs each)\n")
+    results = {"thread": report("thread", run_thread(jobs))}
+    results["spawn"] = report("spawn", run_spawn(jobs))
+    if download.ForkServer.available():
+        latencies, stats = run_fork_server(jobs)
+        results["fork server"] = report("fork server", latencies)
+        print(f"\n  fork server child startup p50: {stats['startup_ms']} ms")
+        print(f"  fork server vs spawn p50: {results['spawn'] / results['fork server']:.1f}x faster, "
+              f"{results['fork server'] - results['thread']:+.1f} ms vs thread\n")
+    else:
+        print("\n  fork server: not available on this platform\n")
+
+
+if __name__ == "__main__":
+    main()
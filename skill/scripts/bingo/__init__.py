@@ -0,0 +1,8 @@
+"""
+Bingo Video Downloader - download subsystems
+
+Bandwidth limits, per-platform concurrency and circuit breaking, stall
+detection, metadata prefetch, the staged pipeline, the post-processing pool
+and the fork server. Each module stands on its own; download.py wires them
+into BingoDownloader and re-exports them.
+"""
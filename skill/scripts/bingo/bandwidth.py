@@ -0,0 +1,252 @@
+"""
+Bandwidth limits: token buckets and the global/per-platform/per-task governor
+"""
+
+import contextlib
+import logging
+import os
+import struct
+import threading
+import time
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('bingo_downloader')
+
+# 带宽控制：令牌桶允许的突发量（按当前速率折算的秒数）
+BANDWIDTH_BURST_SECONDS = 1.0
+
+
+def parse_rate(value: Any) -> int:
+    """解析速率（字节/秒），支持 K/M/G 后缀，如 500K、2.5M、1G；0 或空表示不限速"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, (int, float)):
+        return max(0, int(value))
+    text = str(value).strip().upper().removesuffix('/S').rstrip('B')
+    multiplier = 1
+    if text and text[-1] in 'KMG':
+        multiplier = 1024 ** ('KMG'.index(text[-1]) + 1)
+        text = text[:-1]
+    try:
+        return max(0, int(float(text) * multiplier))
+    except ValueError:
+        raise ValueError(f"Invalid rate: {value!r}")
+
+
+def parse_platform_rates(spec: str) -> Dict[str, int]:
+    """解析平台限速配置 "YouTube=5M,Bilibili=2M" """
+    rates = {}
+    for item in (spec or '').split(','):
+        platform, sep, rate = item.strip().rpartition('=')
+        if sep and platform:
+            rates[platform.strip()] = parse_rate(rate)
+    return rates
+
+
+def parse_rate_schedule(spec: str) -> List[Tuple[int, int, int]]:
+    """
+    解析时段限速配置 "00:00-07:00=0,09:00-18:00=2M"
+
+    返回 [(开始分钟, 结束分钟, 速率)]，结束早于开始表示跨午夜；速率 0 表示不限速。
+    """
+    def minutes(hhmm: str) -> int:
+        hours, _, mins = hhmm.strip().partition(':')
+        return int(hours) * 60 + int(mins or 0)
+
+    schedule = []
+    for item in (spec or '').split(','):
+        window, sep, rate = item.strip().partition('=')
+        if not sep:
+            continue
+        start, _, end = window.partition('-')
+        schedule.append((minutes(start), minutes(end), parse_rate(rate)))
+    return schedule
+
+
+class TokenBucket:
+    """
+    令牌桶（GCRA 实现）
+
+    reserve() 立即扣除字节数并返回调用方需要等待的秒数。桶里最多积攒
+    burst_seconds 秒的额度，空闲的带宽会被其他正在下载的任务用掉，
+    不会被某个任务预留。
+    """
+
+    def __init__(self, rate: int = 0, burst_seconds: float = BANDWIDTH_BURST_SECONDS):
+        self.rate = rate
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        self._tat = 0.0  # theoretical arrival time
+
+    def set_rate(self, rate: int):
+        self.rate = rate
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock:
+            yield
+
+    def _load(self) -> float:
+        return self._tat
+
+    def _store(self, tat: float):
+        self._tat = tat
+
+    def reserve(self, nbytes: int) -> float:
+        """扣除 nbytes，返回需要等待的秒数（不限速时为 0）"""
+        if self.rate <= 0 or nbytes <= 0:
+            return 0.0
+        with self._locked():
+            now = self._now()
+            tat = max(self._load(), now) + nbytes / self.rate
+            self._store(tat)
+        return max(0.0, tat - now - self.burst_seconds)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    跨进程共享的令牌桶
+
+    状态（8 字节的时间戳）保存在内存映射文件中，用文件锁串行化更新，
+    同一台机器上的多个进程（CLI、多个 Web worker）共用一个全局额度。
+    各进程应配置相同的速率。
+    """
+
+    def __init__(self, path: Path, rate: int = 0, burst_seconds: float = BANDWIDTH_BURST_SECONDS):
+        import fcntl
+        import mmap
+
+        super().__init__(rate, burst_seconds)
+        self._flock = fcntl.flock
+        self._lock_ex, self._lock_un = fcntl.LOCK_EX, fcntl.LOCK_UN
+        self.path = Path(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < 8:
+            os.ftruncate(self._fd, 8)
+        self._mm = mmap.mmap(self._fd, 8)
+
+    def _now(self) -> float:
+        # 进程之间只有墙上时钟可比
+        return time.time()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock:
+            self._flock(self._fd, self._lock_ex)
+            try:
+                yield
+            finally:
+                self._flock(self._fd, self._lock_un)
+
+    def _load(self) -> float:
+        return struct.unpack('d', self._mm[:8])[0]
+
+    def _store(self, tat: float):
+        self._mm[:8] = struct.pack('d', tat)
+
+
+class BandwidthGovernor:
+    """
+    带宽控制器 - 进程内所有下载共享的令牌桶
+
+    每个数据块依次经过全局桶、平台桶和任务桶，等待时间取三者最大值。
+    全局速率可按时段切换（如夜间不限速）。所有任务从同一个全局桶取额度，
+    某个任务受上游限制跑不满时，剩余带宽自动流向其他活跃任务。
+    在 yt-dlp 的 progress_hooks 中调用 throttle()，阻塞下载线程即可限速。
+    """
+
+    def __init__(
+        self,
+        global_rate: int = 0,
+        task_rate: int = 0,
+        platform_rates: Optional[Dict[str, int]] = None,
+        schedule: Optional[List[Tuple[int, int, int]]] = None,
+        shared_path: Optional[Path] = None,
+    ):
+        self.base_rate = global_rate
+        self.task_rate = task_rate
+        self.platform_rates = dict(platform_rates or {})
+        self.schedule = list(schedule or [])
+        self.global_bucket = TokenBucket(global_rate)
+        if shared_path:
+            try:
+                self.global_bucket = SharedTokenBucket(shared_path, global_rate)
+            except ImportError:
+                # fcntl 仅在 POSIX 上可用，退回进程内限速
+                logger.warning("Shared bandwidth limit is not supported on this platform; limiting per process")
+        self.platform_buckets = {p: TokenBucket(r) for p, r in self.platform_rates.items() if r > 0}
+        # 任务桶随下载器对象回收
+        self._task_buckets: 'weakref.WeakKeyDictionary[Any, TokenBucket]' = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.bytes_total = 0
+        self.throttled_seconds = 0.0
+
+    @classmethod
+    def from_spec(cls, global_rate: Any = 0, task_rate: Any = 0, platform_rates: str = '',
+                  schedule: str = '', shared_path: Optional[str] = None) -> 'BandwidthGovernor':
+        """从命令行参数或环境变量字符串创建"""
+        return cls(
+            global_rate=parse_rate(global_rate),
+            task_rate=parse_rate(task_rate),
+            platform_rates=parse_platform_rates(platform_rates),
+            schedule=parse_rate_schedule(schedule),
+            shared_path=Path(shared_path) if shared_path else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_rate or self.task_rate or self.platform_buckets
+                    or any(rate for _, _, rate in self.schedule))
+
+    def current_global_rate(self, now: Optional[datetime] = None) -> int:
+        """当前时段生效的全局速率"""
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        for start, end, rate in self.schedule:
+            inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if inside:
+                return rate
+        return self.base_rate
+
+    def throttle(self, owner: Any, platform: str, nbytes: int) -> float:
+        """记录 owner（一次下载）收到的 nbytes 字节，超出额度时阻塞，返回阻塞的秒数"""
+        if nbytes <= 0 or not self.enabled:
+            return 0.0
+        self.global_bucket.set_rate(self.current_global_rate())
+        buckets = [self.global_bucket]
+        if platform in self.platform_buckets:
+            buckets.append(self.platform_buckets[platform])
+        if self.task_rate:
+            with self._lock:
+                bucket = self._task_buckets.get(owner)
+                if bucket is None:
+                    bucket = self._task_buckets[owner] = TokenBucket(self.task_rate)
+            buckets.append(bucket)
+
+        delay = max(bucket.reserve(nbytes) for bucket in buckets)
+        with self._lock:
+            self.bytes_total += nbytes
+            self.throttled_seconds += delay
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        """当前限速配置和累计数据"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'global_rate': self.current_global_rate(),
+                'task_rate': self.task_rate,
+                'platform_rates': dict(self.platform_rates),
+                'shared': isinstance(self.global_bucket, SharedTokenBucket),
+                'active_tasks': len(self._task_buckets),
+                'bytes_total': self.bytes_total,
+                'throttled_seconds': round(self.throttled_seconds, 3),
+            }
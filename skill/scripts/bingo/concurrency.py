@@ -0,0 +1,341 @@
+"""
+Per-platform adaptive concurrency (AIMD), the batch queue and the circuit breaker
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .errors import CircuitOpenError
+
+# 按平台自适应并发（AIMD）：限流时并发数乘以 DECREASE，持续成功后逐步加 1
+PLATFORM_CONCURRENCY_INITIAL = 2
+PLATFORM_CONCURRENCY_MIN = 1
+PLATFORM_CONCURRENCY_MAX = 8
+PLATFORM_CONCURRENCY_DECREASE = 0.5
+PLATFORM_THROTTLE_COOLDOWN = 30  # seconds, 限流响应没有 Retry-After 时的冷却时间
+
+# 按平台熔断：最近 CIRCUIT_WINDOW 次尝试中失败率达到 CIRCUIT_FAILURE_RATE
+# （且至少 CIRCUIT_MIN_REQUESTS 次）时熔断 CIRCUIT_OPEN_SECONDS 秒，之后放行一次探测
+CIRCUIT_WINDOW = 20
+CIRCUIT_MIN_REQUESTS = 5
+CIRCUIT_FAILURE_RATE = 0.5
+CIRCUIT_OPEN_SECONDS = 60
+
+
+class AdaptiveConcurrency:
+    """
+    按平台自适应的并发控制（AIMD）
+
+    每个平台有一个并发上限：平台返回 429/503 时上限乘以 decrease_factor
+    并进入冷却（优先使用 Retry-After），冷却期间不再启动该平台的新下载；
+    每成功 limit 次上限加 1。所有调度方（CLI 批量、播放列表、Web 调度器）
+    共用同一个实例，一个任务被限流时其他任务也会让开，而不是继续请求
+    直到被封禁。其他平台不受影响。
+    """
+
+    def __init__(
+        self,
+        initial: int = PLATFORM_CONCURRENCY_INITIAL,
+        min_limit: int = PLATFORM_CONCURRENCY_MIN,
+        max_limit: int = PLATFORM_CONCURRENCY_MAX,
+        decrease_factor: float = PLATFORM_CONCURRENCY_DECREASE,
+        cooldown: float = PLATFORM_THROTTLE_COOLDOWN,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.initial = min(max(initial, self.min_limit), self.max_limit)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._cond = threading.Condition()
+        self._platforms: Dict[str, Dict[str, Any]] = {}
+
+    def _state(self, platform: str) -> Dict[str, Any]:
+        # 调用方持有锁
+        state = self._platforms.get(platform)
+        if state is None:
+            state = self._platforms[platform] = {
+                'limit': float(self.initial),
+                'running': 0,
+                'cooldown_until': 0.0,
+                'succeeded': 0,
+                'throttled': 0,
+            }
+        return state
+
+    def ready_in(self, platform: str) -> float:
+        """距离平台冷却结束的秒数（不在冷却中为 0）"""
+        with self._cond:
+            return max(0.0, self._state(platform)['cooldown_until'] - time.monotonic())
+
+    def available(self, platform: str) -> bool:
+        """平台当前能否再启动一个下载"""
+        with self._cond:
+            state = self._state(platform)
+            return self.ready_in(platform) == 0 and state['running'] < int(state['limit'])
+
+    def try_acquire(self, platform: str) -> bool:
+        """有空闲名额时占用一个并返回 True，否则立即返回 False"""
+        with self._cond:
+            if not self.available(platform):
+                return False
+            self._state(platform)['running'] += 1
+            return True
+
+    def release(self, platform: str):
+        """归还 try_acquire / iter_ready 占用的名额"""
+        with self._cond:
+            state = self._state(platform)
+            state['running'] = max(0, state['running'] - 1)
+            self._cond.notify_all()
+
+    def wait_ready(self, platform: str):
+        """阻塞到平台冷却结束（已占有名额的任务在两次请求之间调用）"""
+        with self._cond:
+            while True:
+                delay = self.ready_in(platform)
+                if delay <= 0:
+                    return
+                self._cond.wait(delay)
+
+    def record_success(self, platform: str):
+        """一次下载成功：加性增加（每成功 limit 次上限加 1）"""
+        with self._cond:
+            state = self._state(platform)
+            state['succeeded'] += 1
+            state['limit'] = min(float(self.max_limit), state['limit'] + 1.0 / state['limit'])
+            self._cond.notify_all()
+
+    def record_throttle(self, platform: str, retry_after: Optional[float] = None):
+        """平台返回限流：乘性减少并冷却 retry_after（默认 cooldown）秒"""
+        with self._cond:
+            state = self._state(platform)
+            now = time.monotonic()
+            # 同一轮限流中其他任务陆续报错，只减少一次
+            if now >= state['cooldown_until']:
+                state['limit'] = max(float(self.min_limit), state['limit'] * self.decrease_factor)
+                state['throttled'] += 1
+            wait = retry_after if retry_after is not None else self.cooldown
+            state['cooldown_until'] = max(state['cooldown_until'], now + wait)
+            self._cond.notify_all()
+
+    def iter_ready(self, items: List[Any], key) -> Iterator[Any]:
+        """按平台可用性依次取出条目（见 BatchQueue）"""
+        return iter(BatchQueue(items, self, key))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各平台当前并发上限、运行数、冷却剩余时间和累计次数"""
+        with self._cond:
+            return {
+                platform: {
+                    'limit': int(state['limit']),
+                    'running': state['running'],
+                    'cooldown': round(self.ready_in(platform), 1),
+                    'succeeded': state['succeeded'],
+                    'throttled': state['throttled'],
+                }
+                for platform, state in self._platforms.items()
+            }
+
+
+class BatchQueue:
+    """
+    串行批量下载的待处理队列
+
+    按平台可用性取出条目：冷却中的平台的条目推后，先处理其他平台；
+    全部在冷却时等待。defer() 让失败的条目在 delay 秒后重新排队，
+    等待期间继续处理其他条目，而不是原地 sleep。
+    取出的条目占用 key(item) 平台的一个并发名额，下一次迭代时归还。
+    """
+
+    def __init__(self, items: List[Any], concurrency: AdaptiveConcurrency, key):
+        self.concurrency = concurrency
+        self.key = key
+        self._pending = deque(items)
+        self._deferred: List[Tuple[float, int, Any]] = []  # (not_before, 序号, 条目) 小顶堆
+        self._sequence = 0
+
+    def defer(self, item: Any, delay: float):
+        """delay 秒后重新处理 item"""
+        with self.concurrency._cond:
+            self._sequence += 1
+            heapq.heappush(self._deferred, (time.monotonic() + delay, self._sequence, item))
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._deferred)
+
+    def upcoming(self, n: int) -> List[Any]:
+        """接下来大概率会取出的 n 个条目（用于预取，不考虑平台冷却）"""
+        with self.concurrency._cond:
+            return list(itertools.islice(self._pending, n))
+
+    def _next(self) -> Any:
+        # 调用方持有 concurrency 的锁
+        while True:
+            now = time.monotonic()
+            while self._deferred and self._deferred[0][0] <= now:
+                self._pending.append(heapq.heappop(self._deferred)[2])
+            item = next((i for i in self._pending if self.concurrency.available(self.key(i))), None)
+            if item is not None:
+                self._pending.remove(item)
+                return item
+            waits = [self.concurrency.ready_in(self.key(i)) for i in self._pending]
+            if self._deferred:
+                waits.append(self._deferred[0][0] - now)
+            delay = min(waits)
+            self.concurrency._cond.wait(delay if delay > 0 else None)
+
+    def __iter__(self) -> Iterator[Any]:
+        while self:
+            with self.concurrency._cond:
+                item = self._next()
+                platform = self.key(item)
+                self.concurrency._state(platform)['running'] += 1
+            try:
+                yield item
+            finally:
+                self.concurrency.release(platform)
+
+
+class CircuitBreaker:
+    """
+    按平台的熔断器
+
+    closed：正常放行，记录最近 window 次尝试的结果，失败率达到
+    failure_rate（至少 min_requests 次）时转为 open。
+    open：open_seconds 内直接拒绝该平台的下载，不再占用工作线程重试。
+    half_open：冷却结束后只放行一次探测，成功则恢复 closed，失败则重新 open。
+    探测被限流或超时时没有结论，也重新 open；探测超过 open_seconds 仍未
+    报告结果（进程被杀、结果丢失）时按没有结论处理，平台不会一直卡在半开。
+    限流（429/503）由 AdaptiveConcurrency 处理，不计入失败率。
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(
+        self,
+        window: int = CIRCUIT_WINDOW,
+        min_requests: int = CIRCUIT_MIN_REQUESTS,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+    ):
+        self.window = max(1, window)
+        self.min_requests = max(1, min_requests)
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._platforms: Dict[str, Dict[str, Any]] = {}
+
+    def _state(self, platform: str) -> Dict[str, Any]:
+        # 调用方持有锁
+        state = self._platforms.get(platform)
+        if state is None:
+            state = self._platforms[platform] = {
+                'state': self.CLOSED,
+                'outcomes': deque(maxlen=self.window),
+                'opened_at': 0.0,
+                'probe_started': 0.0,
+                'opened': 0,
+                'rejected': 0,
+            }
+        elif state['state'] == self.HALF_OPEN and \
+                time.monotonic() - state['probe_started'] >= self.open_seconds:
+            # 探测迟迟没有结果，视为结束
+            self._open(state)
+        return state
+
+    def _retry_in(self, state: Dict[str, Any]) -> float:
+        if state['state'] == self.OPEN:
+            return max(0.0, state['opened_at'] + self.open_seconds - time.monotonic())
+        if state['state'] == self.HALF_OPEN:
+            # 最迟到探测过期时再看
+            return max(0.0, state['probe_started'] + self.open_seconds - time.monotonic())
+        return 0.0
+
+    def _open(self, state: Dict[str, Any]):
+        state['state'] = self.OPEN
+        state['opened_at'] = time.monotonic()
+        state['opened'] += 1
+        state['outcomes'].clear()
+
+    def available(self, platform: str) -> bool:
+        """平台能否开始一次下载（不改变状态，供调度器决定是否推迟任务）"""
+        with self._lock:
+            state = self._state(platform)
+            if state['state'] == self.OPEN:
+                return self._retry_in(state) == 0
+            return state['state'] == self.CLOSED
+
+    def retry_in(self, platform: str) -> float:
+        """距离允许探测的秒数（未熔断为 0，探测中为距离探测过期的秒数）"""
+        with self._lock:
+            return self._retry_in(self._state(platform))
+
+    def check(self, platform: str):
+        """开始一次尝试前调用：熔断中抛出 CircuitOpenError，冷却结束时占用探测名额"""
+        with self._lock:
+            state = self._state(platform)
+            if state['state'] == self.CLOSED:
+                return
+            if state['state'] == self.OPEN and self._retry_in(state) == 0:
+                state['state'] = self.HALF_OPEN
+                state['probe_started'] = time.monotonic()
+                return
+            state['rejected'] += 1
+            # 半开状态下探测尚未结束，按完整冷却时间提示
+            retry_in = self._retry_in(state) or self.open_seconds
+        raise CircuitOpenError(platform, retry_in)
+
+    def record_success(self, platform: str):
+        with self._lock:
+            state = self._state(platform)
+            if state['state'] == self.HALF_OPEN:
+                state['state'] = self.CLOSED
+                state['outcomes'].clear()
+            state['outcomes'].append(True)
+
+    def record_failure(self, platform: str):
+        with self._lock:
+            state = self._state(platform)
+            if state['state'] == self.HALF_OPEN:
+                # 探测失败，重新熔断
+                self._open(state)
+                return
+            if state['state'] == self.OPEN:
+                return
+            outcomes = state['outcomes']
+            outcomes.append(False)
+            failures = outcomes.count(False)
+            if len(outcomes) >= self.min_requests and failures / len(outcomes) >= self.failure_rate:
+                self._open(state)
+
+    def record_inconclusive(self, platform: str):
+        """尝试没有结论（限流、超时）：不计入失败率，但探测要让出名额"""
+        with self._lock:
+            state = self._state(platform)
+            if state['state'] == self.HALF_OPEN:
+                self._open(state)
+
+    def reset(self, platform: str):
+        """手动恢复平台（如确认站点已修复）"""
+        with self._lock:
+            self._platforms.pop(platform, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各平台熔断状态、最近失败率和累计熔断/拒绝次数"""
+        with self._lock:
+            result = {}
+            for platform in list(self._platforms):
+                state = self._state(platform)
+                outcomes = state['outcomes']
+                result[platform] = {
+                    'state': state['state'],
+                    'failure_rate': round(outcomes.count(False) / len(outcomes), 3) if outcomes else 0.0,
+                    'retry_in': round(self._retry_in(state), 1),
+                    'opened': state['opened'],
+                    'rejected': state['rejected'],
+                }
+            return result
@@ -0,0 +1,138 @@
+"""
+Download exceptions and classification of failures (throttled, transient, fatal)
+"""
+
+import re
+import time
+from typing import Any, Iterator, Optional, Tuple
+
+# 表示平台在限流的 HTTP 状态码
+THROTTLING_STATUSES = (429, 503)
+
+
+# 可重试的 HTTP 状态码（限流和暂时性服务端错误）
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_chain(error: Optional[BaseException]) -> Iterator[BaseException]:
+    """依次返回异常及其原因（yt-dlp 把原始异常放在 exc_info / cause 中）"""
+    seen = set()
+    while isinstance(error, BaseException) and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        exc_info = getattr(error, 'exc_info', None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1 and exc_info[1] is not None:
+            error = exc_info[1]
+        else:
+            error = getattr(error, 'cause', None) or error.__cause__ or error.__context__
+
+
+def http_status_from_error(error: BaseException) -> Optional[int]:
+    """取出导致失败的 HTTP 状态码（yt-dlp 的 HTTPError，或其 "HTTP Error NNN" 消息）"""
+    for err in _error_chain(error):
+        status = getattr(err, 'status', None)
+        if isinstance(status, int):
+            return status
+        match = re.search(r'HTTP Error (\d{3})', str(err))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _network_error_types() -> Tuple[type, ...]:
+    """连接、超时、读取中断等网络层异常类型"""
+    import http.client
+    import urllib.error
+    types: Tuple[type, ...] = (ConnectionError, TimeoutError, http.client.HTTPException, urllib.error.URLError)
+    try:
+        from yt_dlp.networking.exceptions import TransportError
+    except ImportError:
+        return types
+    return types + (TransportError,)
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    按异常类型和 HTTP 状态码给失败分类
+
+    'throttled'：平台限流（429/503）；'transient'：暂时性错误（超时、连接中断、
+    5xx 等），可以重试；'fatal'：重试也不会成功（404、视频不存在、提取失败、熔断、
+    超时）。
+    """
+    if isinstance(error, (CircuitOpenError, DownloadTimeout)):
+        return 'fatal'
+    status = http_status_from_error(error)
+    if status is not None:
+        if status in THROTTLING_STATUSES:
+            return 'throttled'
+        return 'transient' if status in RETRYABLE_STATUSES else 'fatal'
+    network_errors = _network_error_types()
+    if any(isinstance(err, network_errors) for err in _error_chain(error)):
+        return 'transient'
+    return 'fatal'
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """平台是否返回了限流响应（429/503）"""
+    return http_status_from_error(error) in THROTTLING_STATUSES
+
+
+def retry_after_from_error(error: BaseException) -> Optional[float]:
+    """从限流响应中取出 Retry-After（秒），没有时返回 None"""
+    for err in _error_chain(error):
+        headers = getattr(getattr(err, 'response', None), 'headers', None)
+        if headers is not None:
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            if retry_after is not None:
+                return retry_after
+    return None
+
+
+class CircuitOpenError(Exception):
+    """平台处于熔断状态，下载被直接拒绝（不重试）"""
+
+    def __init__(self, platform: str, retry_in: float):
+        self.platform = platform
+        self.retry_in = retry_in
+        super().__init__(
+            f"{platform} is failing, not trying for another {retry_in:.0f}s (circuit open)"
+        )
+
+
+class DownloadTimeout(Exception):
+    """下载超过截止时间或最长时长，或被调度器中止（不重试）"""
+
+
+class DownloadStalled(TimeoutError):
+    """下载卡顿且重启次数已用完（按网络超时处理，可以重试）"""
+
+
+class DownloadRetry(Exception):
+    """
+    下载失败但可以稍后重试（defer_retries 模式）
+
+    调用方（调度器）在 delay 秒后重新执行同一个下载器的 download()，
+    等待期间工作线程去做别的下载，而不是原地 sleep。
+    """
+
+    def __init__(self, error: BaseException, delay: float, attempt: int):
+        self.error = error
+        self.delay = delay
+        self.attempt = attempt
+        super().__init__(f"Attempt {attempt} failed, retrying in {delay:.0f}s: {error}")
@@ -0,0 +1,292 @@
+"""
+Fork server: download children forked from a zygote with yt-dlp preloaded
+"""
+
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from download import BingoDownloader
+
+logger = logging.getLogger('bingo_downloader')
+
+# fork server（--fork-server）：zygote 进程预先导入的模块（yt-dlp 和提取器注册表、
+# 浏览器 cookies 读取和解密，以及任务函数所在的 download），之后每个任务从
+# zygote fork 出写时复制的子进程
+FORK_SERVER_PRELOAD = ('yt_dlp', 'yt_dlp.extractor.extractors', 'yt_dlp.cookies', 'yt_dlp.aes', 'download')
+FORK_SERVER_STOP_TIMEOUT = 5  # seconds, 关闭时等待 zygote 退出的时间
+
+
+class FeedbackRelay:
+    """
+    子进程中的控制器代理：record_* 调用在本地生效，同时通过 emit 发给父进程
+
+    下载在子进程中运行时，限流和失败反馈要回到父进程的并发控制器和熔断器，
+    父进程的调度（冷却中的平台推后、熔断）才能看到。父进程用 replay() 重放。
+    """
+
+    CONTROLLERS = ('concurrency', 'breaker')
+
+    def __init__(self, name: str, target: Any, emit: Callable[[Dict[str, Any]], None]):
+        self._name = name
+        self._target = target
+        self._emit = emit
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._target, attr)
+        if not attr.startswith('record_'):
+            return value
+
+        def record(*args):
+            self._emit({'event': 'feedback', 'controller': self._name, 'method': attr, 'args': list(args)})
+            return value(*args)
+        return record
+
+    @classmethod
+    def wrap(cls, downloader: 'BingoDownloader', emit: Callable[[Dict[str, Any]], None]):
+        """让下载器的控制器反馈经 emit 发出"""
+        for name in cls.CONTROLLERS:
+            setattr(downloader, name, cls(name, getattr(downloader, name), emit))
+
+    @staticmethod
+    def replay(event: Dict[str, Any], controllers: Dict[str, Any]) -> bool:
+        """在父进程的控制器上重放一条反馈（只接受 record_* 方法）"""
+        if event.get('event') != 'feedback' or not event['method'].startswith('record_'):
+            return False
+        controller = controllers.get(event['controller'])
+        if controller is None:
+            return False
+        getattr(controller, event['method'])(*event['args'])
+        return True
+
+
+def _fork_server_child(conn, target: Callable, args: tuple):
+    """fork server 的一次性任务：执行 target(emit, *args)，事件和结果经 conn 发回"""
+    def emit(event: Dict[str, Any]):
+        conn.send(('event', event))
+
+    conn.send(('started', None))
+    try:
+        conn.send(('result', target(emit, *args)))
+    except BaseException as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _zygote_main(control, preload: Tuple[str, ...]):
+    """
+    fork server 的 zygote 进程：导入 preload 后按请求 fork 子进程
+
+    每个请求是 (target, args)。子进程执行 target(conn, *args)，conn 的另一端
+    连同子进程 pid 发回父进程。zygote 自己不启动线程，fork 是安全的。
+    """
+    import signal
+    from multiprocessing import Pipe, reduction
+
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Fork server could not preload {name}: {e}")
+    # 子进程由内核回收；Ctrl+C 只结束正在下载的子进程，zygote 等父进程关闭连接后退出
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    control.send(os.getpid())
+
+    while True:
+        try:
+            request = control.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        target, args = request
+        parent_end, child_end = Pipe()
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            parent_end.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            code = 0
+            try:
+                target(child_end, *args)
+            except BaseException:
+                logger.exception("Fork server child failed")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        child_end.close()
+        control.send(pid)
+        reduction.send_handle(control, parent_end.fileno(), os.getppid())
+        parent_end.close()
+
+
+class ForkedProcess:
+    """fork server 的子进程（由 zygote 回收，本进程只能按 pid 检查和结束它）"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        # 退出码由 zygote 回收，本进程拿不到
+        self.exitcode: Optional[int] = None
+
+    def is_alive(self) -> bool:
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def kill(self):
+        import signal
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def join(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_alive() and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.01)
+
+
+class ForkServer:
+    """
+    预热的 fork server - 从 zygote 进程 fork 出任务子进程
+
+    yt-dlp 和提取器注册表的导入要几百毫秒，每个任务新启动一个进程（spawn）
+    都要重新付一次。zygote 只启动和导入一次，之后的子进程从它 fork，
+    写时复制地共享已导入的模块，启动只需几毫秒；任务之间不共享状态，
+    提取器泄漏的内存随子进程回收。zygote 由 spawn 启动，不继承父进程的线程。
+    """
+
+    def __init__(self, preload: Tuple[str, ...] = ()):
+        self.preload = tuple(dict.fromkeys((*FORK_SERVER_PRELOAD, *preload)))
+        self._lock = threading.Lock()
+        self._zygote = None
+        self._control = None
+        self.forks = 0
+        self.jobs = 0
+        self.failed = 0
+        self.crashed = 0
+        self._startup: deque = deque(maxlen=100)
+
+    @staticmethod
+    def available() -> bool:
+        """fork server 需要 fork 和通过 Unix socket 传递文件描述符（Windows 不支持）"""
+        return hasattr(os, 'fork') and sys.platform != 'win32'
+
+    def _start(self):
+        # 调用方持有锁
+        if self._zygote is not None and self._zygote.is_alive():
+            return
+        import multiprocessing
+        context = multiprocessing.get_context('spawn')
+        control, child = context.Pipe()
+        self._zygote = context.Process(target=_zygote_main, args=(child, self.preload),
+                                       name='fork-server', daemon=True)
+        self._zygote.start()
+        child.close()
+        self._control = control
+        try:
+            control.recv()
+        except EOFError:
+            raise RuntimeError(f"Fork server failed to start (exit code {self._zygote.exitcode})")
+
+    def start(self):
+        """启动 zygote 并等待预加载完成（否则在第一个任务时启动）"""
+        with self._lock:
+            self._start()
+
+    def fork(self, target: Callable, *args):
+        """
+        fork 一个执行 target(conn, *args) 的子进程，返回 (ForkedProcess, conn)
+
+        target 必须是模块级函数，参数可以 pickle。
+        """
+        from multiprocessing import reduction
+        from multiprocessing.connection import Connection
+
+        with self._lock:
+            self._start()
+            try:
+                self._control.send((target, args))
+                pid = self._control.recv()
+                fd = reduction.recv_handle(self._control)
+            except (EOFError, OSError) as e:
+                # zygote 退出了，下次请求时重新启动
+                self._zygote = None
+                raise RuntimeError("Fork server exited unexpectedly") from e
+            self.forks += 1
+        return ForkedProcess(pid), Connection(fd)
+
+    def run(self, target: Callable, *args, on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Any:
+        """
+        在新的子进程中执行 target(emit, *args) 并返回结果
+
+        子进程通过 emit 发出的事件交给 on_event；子进程中的异常以 RuntimeError 抛出。
+        """
+        started = time.monotonic()
+        process, conn = self.fork(_fork_server_child, target, args)
+        try:
+            while True:
+                try:
+                    kind, value = conn.recv()
+                except EOFError:
+                    with self._lock:
+                        self.crashed += 1
+                    raise RuntimeError(f"Fork server job exited unexpectedly (pid {process.pid})")
+                if kind == 'started':
+                    with self._lock:
+                        self._startup.append(time.monotonic() - started)
+                    continue
+                if kind == 'event':
+                    if on_event is not None:
+                        on_event(value)
+                    continue
+                if kind == 'error':
+                    with self._lock:
+                        self.failed += 1
+                    raise RuntimeError(value)
+                return value
+        finally:
+            with self._lock:
+                self.jobs += 1
+            conn.close()
+            process.join()
+
+    def close(self):
+        """停止 zygote（已经 fork 出的子进程不受影响）"""
+        with self._lock:
+            if self._zygote is None:
+                return
+            try:
+                self._control.send(None)
+            except OSError:
+                pass
+            self._control.close()
+            self._zygote.join(FORK_SERVER_STOP_TIMEOUT)
+            if self._zygote.is_alive():
+                self._zygote.kill()
+            self._zygote = None
+
+    def stats(self) -> Dict[str, Any]:
+        """任务数和子进程启动延迟（从请求 fork 到子进程发出第一条消息）"""
+        with self._lock:
+            startup = sorted(self._startup)
+            return {
+                'forks': self.forks,
+                'jobs': self.jobs,
+                'failed': self.failed,
+                'crashed': self.crashed,
+                'startup_ms': round(startup[len(startup) // 2] * 1000, 1) if startup else None,
+            }
@@ -0,0 +1,45 @@
+"""
+Modules imported on first use, so commands that never download do not load yt-dlp
+"""
+
+import importlib
+import sys
+
+
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    History, stats and preset commands never touch yt-dlp, so they should not
+    pay for importing it (and its extractor registry).
+    """
+
+    def __init__(self, name: str, on_missing=None):
+        self._name = name
+        self._on_missing = on_missing
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                if self._on_missing is None:
+                    raise
+                self._on_missing()
+                raise
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+
+def _yt_dlp_missing():
+    print("❌ Error: yt-dlp not installed")
+    print("\nInstall with:")
+    print("  uv pip install yt-dlp")
+    print("  pip install yt-dlp")
+    sys.exit(1)
+
+
+yt_dlp = _LazyModule('yt_dlp', on_missing=_yt_dlp_missing)
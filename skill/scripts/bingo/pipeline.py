@@ -0,0 +1,217 @@
+"""
+Staged extract/download/post-process/record pipeline
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from download import BingoDownloader
+
+# 分阶段流水线（--pipeline）：各阶段的工作线程数和队列长度
+PIPELINE_EXTRACT_WORKERS = 2
+PIPELINE_DOWNLOAD_WORKERS = 3
+PIPELINE_POSTPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+PIPELINE_RECORD_WORKERS = 1
+PIPELINE_QUEUE_SIZE = 4
+
+
+class PipelineJob:
+    """流水线中的一个下载，依次经过提取、下载、后处理、记录阶段"""
+
+    def __init__(self, downloader: 'BingoDownloader', url: str):
+        self.downloader = downloader
+        self.url = url
+        self.info: Optional[Dict[str, Any]] = None
+        # 下载阶段得到的文件信息（每个请求的格式一项），后处理阶段更新
+        self.downloads: List[Dict[str, Any]] = []
+        self.files: List[str] = []
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self) -> List[str]:
+        """等待完成并返回最终文件；某个阶段失败时抛出该阶段的异常"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.files
+
+
+class PipelineStage:
+    """流水线的一个阶段：有界队列和固定数量的工作线程"""
+
+    def __init__(self, name: str, workers: int, queue_size: int, handler):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        # handler(job) 处理一个任务，失败时抛出异常
+        self.handler = handler
+        self.next: Optional['PipelineStage'] = None
+        self._queue: 'queue.Queue[Optional[PipelineJob]]' = queue.Queue(maxsize=self.queue_size)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started_at = time.monotonic()
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def put(self, job: Optional[PipelineJob]):
+        """放入队列；队列满时阻塞，上一阶段因此放慢（反压）"""
+        with self._lock:
+            if not self._threads:
+                # 首次使用时启动工作线程
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"pipeline-{self.name}-{i}", daemon=True)
+                    self._threads.append(thread)
+                    thread.start()
+        self._queue.put(job)
+
+    def close(self):
+        """处理完队列中的任务后停止工作线程"""
+        with self._lock:
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            started = time.monotonic()
+            with self._lock:
+                self.busy += 1
+            error = None
+            try:
+                self.handler(job)
+            except Exception as e:
+                error = e
+            with self._lock:
+                self.busy -= 1
+                self.busy_seconds += time.monotonic() - started
+                if error is None:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+            if error is not None:
+                job._finish(error)
+            elif self.next is None:
+                job._finish()
+            else:
+                self.next.put(job)
+
+    def stats(self) -> Dict[str, Any]:
+        """工作线程数、排队数、处理数和利用率（忙碌时间 / 线程数 × 运行时间）"""
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started_at, 1e-6)
+            done = self.processed + self.failed
+            return {
+                'workers': self.workers,
+                'busy': self.busy,
+                'queued': self._queue.qsize(),
+                'queue_size': self.queue_size,
+                'processed': self.processed,
+                'failed': self.failed,
+                'utilization': round(self.busy_seconds / (self.workers * elapsed), 3),
+                'avg_seconds': round(self.busy_seconds / done, 3) if done else 0.0,
+            }
+
+
+class DownloadPipeline:
+    """
+    分阶段下载流水线：提取 → 下载 → 后处理 → 记录
+
+    串行下载时一个线程依次做元数据提取（受网络延迟限制）、传输（受带宽限制）、
+    ffmpeg 后处理（受 CPU 限制）和写历史（受磁盘限制），网卡和 CPU 轮流空闲。
+    流水线的每个阶段有自己的有界队列和工作线程，多个下载同时在途时，第 N+1 个的
+    提取、第 N 个的下载和第 N-1 个的后处理同时进行。队列满时上一阶段等待，
+    在途任务数不超过 capacity。
+    """
+
+    STAGES = ('extract', 'download', 'postprocess', 'record')
+
+    def __init__(
+        self,
+        extract_workers: int = PIPELINE_EXTRACT_WORKERS,
+        download_workers: int = PIPELINE_DOWNLOAD_WORKERS,
+        postprocess_workers: int = PIPELINE_POSTPROCESS_WORKERS,
+        record_workers: int = PIPELINE_RECORD_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+    ):
+        workers = {
+            'extract': extract_workers,
+            'download': download_workers,
+            'postprocess': postprocess_workers,
+            'record': record_workers,
+        }
+        # 每个阶段调用任务所属下载器的 _<阶段>_stage(job)
+        self.stages = {
+            name: PipelineStage(name, workers[name], queue_size, self._handler(name))
+            for name in self.STAGES
+        }
+        for current, following in zip(self.STAGES, self.STAGES[1:]):
+            self.stages[current].next = self.stages[following]
+
+    @staticmethod
+    def _handler(name: str):
+        return lambda job: getattr(job.downloader, f'_{name}_stage')(job)
+
+    @property
+    def capacity(self) -> int:
+        """同时在流水线中的任务数上限（正在处理的加上排队的）"""
+        return sum(stage.workers + stage.queue_size for stage in self.stages.values())
+
+    def submit(self, downloader: 'BingoDownloader', url: str) -> PipelineJob:
+        """把下载放入流水线（提取队列满时阻塞），返回可等待的任务"""
+        job = PipelineJob(downloader, url)
+        self.stages['extract'].put(job)
+        return job
+
+    def run(self, downloader: 'BingoDownloader', url: str) -> List[str]:
+        """放入流水线并等待完成，返回最终文件"""
+        return self.submit(downloader, url).wait()
+
+    def close(self):
+        """依次关闭各阶段（前一阶段的任务全部交给后一阶段后再关闭后一阶段）"""
+        for name in self.STAGES:
+            self.stages[name].close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各阶段的排队数、处理数和利用率"""
+        return {name: stage.stats() for name, stage in self.stages.items()}
+
+
+def download_batch_pipelined(urls: List[str], make_downloader, pipeline: DownloadPipeline) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    流水线模式的批量下载：同时放入 pipeline.capacity 个 URL，按完成顺序返回 (url, 错误信息)
+
+    make_downloader() 为每个 URL 创建一个下载器（不能交互，失败时原地重试）。
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    def _download(url: str) -> Tuple[str, Optional[str]]:
+        try:
+            make_downloader().download(url)
+            return url, None
+        except SystemExit:
+            return url, "Download failed"
+        except Exception as e:
+            return url, str(e)
+
+    with ThreadPoolExecutor(max_workers=pipeline.capacity, thread_name_prefix='batch') as executor:
+        futures = [executor.submit(_download, url) for url in urls]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,217 @@
+"""
+Post-processing (ffmpeg) in a pool of worker processes
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .lazy import yt_dlp
+
+logger = logging.getLogger('bingo_downloader')
+
+# 后处理进程池（--postprocess-pool）：ffmpeg 转码等在独立进程中进行，
+# 下载在文件落盘后立即释放；进程数默认等于 CPU 核数
+POSTPROCESS_WORKERS = os.cpu_count() or 2
+
+
+def _postprocess_downloads(ydl, downloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """对每个已下载的文件依次运行 ydl 的后处理器，返回更新后的文件信息"""
+    processed = []
+    for info in downloads:
+        # 下载时已经移动到最终位置的缩略图等文件，后处理器按原路径查找
+        moved = {t['filepath']: t['filepath'] for t in info.get('thumbnails') or [] if t.get('filepath')}
+        info = {**info, '__files_to_move': {**moved, **(info.get('__files_to_move') or {})}}
+        info = ydl.run_all_pps('post_process', info)
+        info.pop('__files_to_move', None)
+        processed.append(info)
+    return processed
+
+
+def _run_postprocessors(postprocessors: List[Dict[str, Any]], downloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """后处理进程中执行：返回可以 pickle 的文件信息"""
+    with yt_dlp.YoutubeDL({'quiet': True, 'postprocessors': postprocessors}) as ydl:
+        return [ydl.sanitize_info(info) for info in _postprocess_downloads(ydl, downloads)]
+
+
+class PostProcessJob:
+    """后处理池中的一个任务：一次下载得到的文件（每个格式一项）和要执行的后处理器"""
+
+    def __init__(self, postprocessors: List[Dict[str, Any]], downloads: List[Dict[str, Any]], priority: int):
+        self.postprocessors = postprocessors
+        self.downloads = downloads
+        self.priority = priority
+        self.files: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[['PostProcessJob'], None]] = []
+
+    def add_done_callback(self, callback: Callable[['PostProcessJob'], None]):
+        """完成后（在后处理池的线程中）调用 callback(job)；已完成时立即调用"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("Post-processing callback failed")
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> List[str]:
+        """等待完成并返回最终文件；后处理失败时抛出异常"""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Post-processing still running")
+        if self.error is not None:
+            raise self.error
+        return self.files
+
+
+class PostProcessPool:
+    """
+    后处理进程池 - 音频提取、缩略图转换等 ffmpeg 处理与下载分开进行
+
+    后处理器挂在下载上时，下载线程要等 ffmpeg 转码完才能开始下一个下载，
+    转码时网络空闲、下载时 CPU 空闲。使用后处理池时下载在文件落盘后提交任务
+    就返回，转码在按 CPU 核数设定的进程中并行。任务按优先级（数值小的先处理）
+    和提交顺序排队，队列深度和等待时间见 stats()。
+    """
+
+    def __init__(self, workers: int = POSTPROCESS_WORKERS):
+        self.workers = max(1, workers)
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, PostProcessJob]] = []
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._executor = None
+        self._closed = False
+        self._started_at = time.monotonic()
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.peak_queued = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def submit(self, postprocessors: List[Dict[str, Any]], downloads: List[Dict[str, Any]],
+               priority: int = 0) -> PostProcessJob:
+        """排队一次下载的后处理，返回可等待的任务"""
+        # 传给后处理进程的信息必须可以 pickle
+        job = PostProcessJob(postprocessors, [yt_dlp.YoutubeDL.sanitize_info(dict(d)) for d in downloads], priority)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Post-processing pool is closed")
+            if not self._threads:
+                # 首次使用时启动分发线程，每个线程同一时间占用一个后处理进程
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"postprocess-{i}", daemon=True)
+                    self._threads.append(thread)
+                    thread.start()
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self.peak_queued = max(self.peak_queued, len(self._heap))
+            self._cond.notify()
+        return job
+
+    def _get_executor(self):
+        # 调用方持有锁
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn：下载线程还在运行，不能 fork
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _work(self):
+        from concurrent.futures.process import BrokenProcessPool
+
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                executor = self._get_executor()
+                self.busy += 1
+            job.started_at = time.monotonic()
+            error = None
+            try:
+                job.downloads = executor.submit(_run_postprocessors, job.postprocessors, job.downloads).result()
+                job.files = [d['filepath'] for d in job.downloads if d.get('filepath')]
+            except Exception as e:
+                error = e
+            with self._cond:
+                self.busy -= 1
+                self.busy_seconds += time.monotonic() - job.started_at
+                self.wait_seconds += job.started_at - job.queued_at
+                if error is None:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+                if isinstance(error, BrokenProcessPool) and self._executor is executor:
+                    # 某个后处理进程崩溃后整个进程池不可用，下一个任务重新创建
+                    self._executor = None
+                    executor.shutdown(wait=False)
+            job._finish(error)
+
+    def close(self):
+        """处理完队列中的任务后停止"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join()
+        with self._cond:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        """进程数、队列深度（按优先级）、处理数、利用率和平均等待/处理时间"""
+        with self._cond:
+            elapsed = max(time.monotonic() - self._started_at, 1e-6)
+            done = self.processed + self.failed
+            by_priority: Dict[int, int] = {}
+            for priority, _, _ in self._heap:
+                by_priority[priority] = by_priority.get(priority, 0) + 1
+            return {
+                'workers': self.workers,
+                'busy': self.busy,
+                'queued': len(self._heap),
+                'queued_by_priority': dict(sorted(by_priority.items())),
+                'peak_queued': self.peak_queued,
+                'processed': self.processed,
+                'failed': self.failed,
+                'utilization': round(self.busy_seconds / (self.workers * elapsed), 3),
+                'avg_wait_seconds': round(self.wait_seconds / done, 3) if done else 0.0,
+                'avg_seconds': round(self.busy_seconds / done, 3) if done else 0.0,
+            }
+
+
+def wait_postprocessing(pending: List[Tuple[str, PostProcessJob]]) -> Iterator[Tuple[str, Optional[str]]]:
+    """等待批量下载交给后处理池的任务，按提交顺序返回 (url, 错误信息)"""
+    for url, job in pending:
+        try:
+            job.wait()
+            yield url, None
+        except Exception as e:
+            yield url, str(e) or type(e).__name__
@@ -0,0 +1,201 @@
+"""
+Metadata prefetch for upcoming batch and playlist entries
+"""
+
+import contextlib
+import json
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lazy import yt_dlp
+
+# 元数据预取（--prefetch）：提前提取后面几个 URL 的媒体信息，缓存压缩后的结果；
+# 签名地址在 PREFETCH_EXPIRY_MARGIN 秒内过期或缓存超过 PREFETCH_MAX_AGE 秒时作废
+PREFETCH_DEPTH = 2
+PREFETCH_EXPIRY_MARGIN = 300  # seconds
+PREFETCH_MAX_AGE = 1800  # seconds
+# 下载用不到的大字段，不放进缓存
+PREFETCH_DROP_FIELDS = ('heatmap', 'comments')
+
+
+# 签名地址中的过期时间参数：YouTube 的 expire=、CloudFront 的 Expires=、
+# Akamai 的 exp=，以及 /expire/<时间戳>/ 形式的路径
+_EXPIRY_RE = re.compile(r'[?&/~;](?:x-)?exp(?:ires?)?[=/](\d{10})(?!\d)', re.IGNORECASE)
+
+
+def signed_url_expiry(url: str) -> Optional[float]:
+    """签名地址的过期时间（Unix 时间戳），地址不带过期信息时返回 None"""
+    match = _EXPIRY_RE.search(url)
+    if match:
+        return float(match.group(1))
+    from urllib.parse import urlsplit, parse_qs
+    query = parse_qs(urlsplit(url).query)
+    if 'X-Amz-Date' in query and 'X-Amz-Expires' in query:
+        try:
+            signed = datetime.strptime(query['X-Amz-Date'][0], '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+            return signed.timestamp() + int(query['X-Amz-Expires'][0])
+        except ValueError:
+            return None
+    return None
+
+
+def info_expiry(info: Dict[str, Any]) -> Optional[float]:
+    """媒体信息中最早过期的签名地址的过期时间"""
+    urls = [info.get('url'), info.get('manifest_url')]
+    for fmt in (info.get('formats') or []) + (info.get('requested_formats') or []):
+        urls += [fmt.get('url'), fmt.get('manifest_url'), fmt.get('fragment_base_url')]
+    expiries = [e for e in (signed_url_expiry(u) for u in urls if u) if e is not None]
+    return min(expiries) if expiries else None
+
+
+class MetadataPrefetcher:
+    """
+    元数据预取：当前 URL 下载时，在后台线程中提前提取后面 depth 个 URL 的媒体信息
+
+    提取（请求网页、解析、签名）常常要几秒，预取后这段时间和上一个下载的传输重叠。
+    结果去掉私有字段和大字段后以 zlib 压缩的 JSON 缓存，每个结果只使用一次。
+    取用时签名地址即将过期（或缓存太久）则作废，由下载器重新提取。
+    """
+
+    def __init__(
+        self,
+        depth: int = PREFETCH_DEPTH,
+        expiry_margin: float = PREFETCH_EXPIRY_MARGIN,
+        max_age: float = PREFETCH_MAX_AGE,
+    ):
+        self.depth = max(1, depth)
+        self.expiry_margin = expiry_margin
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # url -> Future[(压缩的信息, 过期时间, 提取时间)]，按放入顺序
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.errors = 0
+
+    def _fetch(self, url: str, extract) -> Tuple[bytes, Optional[float], float]:
+        info = yt_dlp.YoutubeDL.sanitize_info(extract(url), remove_private_keys=True)
+        for field in PREFETCH_DROP_FIELDS:
+            info.pop(field, None)
+        blob = zlib.compress(json.dumps(info, separators=(',', ':')).encode('utf-8'))
+        return blob, info_expiry(info), time.time()
+
+    def _stale(self, expires_at: Optional[float], fetched_at: float, now: float) -> bool:
+        if now - fetched_at > self.max_age:
+            return True
+        return expires_at is not None and expires_at - now < self.expiry_margin
+
+    def schedule(self, urls: List[str], extract):
+        """
+        在后台提取 urls 中前 depth 个还没有缓存的 URL
+
+        extract(url) 返回 extract_info(download=False) 的结果，应使用下载时相同的
+        选项（Cookies、格式），这样取用时不需要重新选择格式以外的任何处理。
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        now = time.time()
+        with self._lock:
+            # 顺便清理失败和已作废的结果
+            for url, future in list(self._entries.items()):
+                if not future.done():
+                    continue
+                if future.exception() is not None:
+                    self.errors += 1
+                elif self._stale(*future.result()[1:], now):
+                    self.expired += 1
+                else:
+                    continue
+                del self._entries[url]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix='prefetch')
+            for url in urls[:self.depth]:
+                if url not in self._entries:
+                    self._entries[url] = self._executor.submit(self._fetch, url, extract)
+            # 没被取用的结果（顺序调整、失败跳过的 URL）最多保留几轮
+            while len(self._entries) > self.depth * 4:
+                self._entries.popitem(last=False)
+
+    def take(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        取出 url 的预取结果（正在提取时等待提取完成）
+
+        没有预取、提取失败或地址即将过期时返回 None，调用方自行提取。
+        """
+        with self._lock:
+            future = self._entries.pop(url, None)
+        if future is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            blob, expires_at, fetched_at = future.result()
+        except Exception:
+            # 真正的错误留给下载时的提取报告
+            with self._lock:
+                self.errors += 1
+            return None
+        if self._stale(expires_at, fetched_at, time.time()):
+            with self._lock:
+                self.expired += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return json.loads(zlib.decompress(blob))
+
+    def serve(self, ydl, entries: List[str], extract):
+        """
+        播放列表下载期间使用预取结果
+
+        yt-dlp 通过 ydl.extract_info 逐个解析播放列表条目；这里临时替换该实例的
+        extract_info：每个条目开始时预取后面 depth 个条目，已预取的条目直接下载。
+        返回上下文管理器，退出时恢复。
+        """
+        original = ydl.extract_info
+        index = {url: i for i, url in enumerate(entries)}
+
+        def extract_info(url, download=True, ie_key=None, extra_info=None,
+                         process=True, force_generic_extractor=False):
+            i = index.get(url)
+            info = None
+            if i is not None and process:
+                self.schedule(entries[i + 1:], extract)
+                info = self.take(url)
+            if info is not None:
+                try:
+                    return ydl.process_ie_result(info, download, extra_info)
+                except yt_dlp.utils.ReExtractInfo:
+                    # 卡顿重启：预取的地址可能已失效，重新提取后从 .part 续传
+                    pass
+            return original(url, download, ie_key, extra_info, process, force_generic_extractor)
+
+        @contextlib.contextmanager
+        def serving():
+            ydl.extract_info = extract_info
+            try:
+                yield ydl
+            finally:
+                del ydl.extract_info
+
+        return serving()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中、未命中、过期作废、失败次数和缓存大小"""
+        with self._lock:
+            cached = [f.result()[0] for f in self._entries.values() if f.done() and f.exception() is None]
+            return {
+                'depth': self.depth,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'errors': self.errors,
+                'pending': len(self._entries) - len(cached),
+                'cached': len(cached),
+                'cached_bytes': sum(len(blob) for blob in cached),
+            }
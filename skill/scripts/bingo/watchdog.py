@@ -0,0 +1,154 @@
+"""
+Stall detection that restarts slow or silent transfers
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional
+
+from .errors import DownloadStalled
+from .lazy import yt_dlp
+
+logger = logging.getLogger('bingo_downloader')
+
+# 卡顿检测：最近 STALL_WINDOW 秒平均速度低于 STALL_MIN_SPEED，或 STALL_TIMEOUT 秒
+# 没有新数据时重启传输，每个文件最多重启 STALL_MAX_RESTARTS 次
+STALL_MIN_SPEED = 16 * 1024  # bytes/s, 0 = 不检测低速
+STALL_WINDOW = 30  # seconds
+STALL_TIMEOUT = 60  # seconds, 0 = 不检测无数据
+STALL_MAX_RESTARTS = 3
+
+
+class StallWatchdog:
+    """
+    卡顿检测 - 根据 progress_hooks 的采样判断下载是否卡住
+
+    两种卡顿：最近 window 秒的平均速度低于 min_speed（CDN 中途把连接限到
+    几 KB/s，yt-dlp 会一直慢慢下完），或 timeout 秒没有收到新数据。
+    检测到卡顿时在 hook 中抛出 yt-dlp 的 ReExtractInfo：yt-dlp 重新提取
+    媒体地址（签名 URL 已过期也能恢复），再从 .part 文件的当前位置续传。
+    每个文件最多重启 max_restarts 次，之后抛出 DownloadStalled 交给重试逻辑。
+    连接完全没有数据时 hook 不会被调用，这种情况由 socket_timeout 让读取
+    超时，yt-dlp 原地重连续传。带宽控制器的限速等待不计入卡顿时间。
+    """
+
+    def __init__(
+        self,
+        min_speed: int = STALL_MIN_SPEED,
+        window: float = STALL_WINDOW,
+        timeout: float = STALL_TIMEOUT,
+        max_restarts: int = STALL_MAX_RESTARTS,
+    ):
+        self.min_speed = min_speed
+        self.window = window
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self._lock = threading.Lock()
+        # 每次下载的采样和重启计数，随下载器对象回收
+        self._downloads: 'weakref.WeakKeyDictionary[Any, Dict[str, Any]]' = weakref.WeakKeyDictionary()
+        self._platforms: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.min_speed or self.timeout)
+
+    def _download(self, owner: Any) -> Dict[str, Any]:
+        # 调用方持有锁
+        state = self._downloads.get(owner)
+        if state is None:
+            state = self._downloads[owner] = {'files': {}, 'restarts': {}, 'stalls': 0}
+        return state
+
+    def _platform(self, platform: str) -> Dict[str, int]:
+        # 调用方持有锁
+        counts = self._platforms.get(platform)
+        if counts is None:
+            counts = self._platforms[platform] = {'stalls': 0, 'restarts': 0, 'recovered': 0, 'gave_up': 0}
+        return counts
+
+    def begin(self, owner: Any):
+        """一次下载（或一次重试）开始：清空采样和重启计数"""
+        with self._lock:
+            self._downloads[owner] = {'files': {}, 'restarts': {}, 'stalls': 0}
+
+    def finish(self, owner: Any, platform: str, success: bool) -> int:
+        """一次下载结束，返回期间的卡顿次数（卡顿后成功计为一次恢复）"""
+        with self._lock:
+            state = self._downloads.pop(owner, None)
+            stalls = state['stalls'] if state else 0
+            if stalls and success:
+                self._platform(platform)['recovered'] += 1
+        return stalls
+
+    def sample(self, owner: Any, platform: str, key: str, downloaded_bytes: int,
+               now: Optional[float] = None):
+        """
+        记录 owner 的文件 key 已下载 downloaded_bytes 字节
+
+        now 是不含限速等待的单调时间。检测到卡顿时抛出异常中断当前传输。
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._download(owner)
+            track = state['files'].get(key)
+            if track is None or downloaded_bytes < track['samples'][-1][1]:
+                # 新文件，或重启后从头下载
+                track = state['files'][key] = {'samples': deque(), 'progress_at': now}
+            samples = track['samples']
+            if not samples or downloaded_bytes > samples[-1][1]:
+                track['progress_at'] = now
+            samples.append((now, downloaded_bytes))
+            # 保留覆盖最近 window 秒所需的最少采样
+            while len(samples) > 1 and samples[1][0] <= now - self.window:
+                samples.popleft()
+
+            reason = None
+            idle = now - track['progress_at']
+            if self.timeout and idle >= self.timeout:
+                reason = f"no data for {idle:.0f}s"
+            elif self.min_speed and samples[0][0] <= now - self.window:
+                speed = (downloaded_bytes - samples[0][1]) / max(now - samples[0][0], 1e-6)
+                if speed < self.min_speed:
+                    reason = f"{speed / 1024:.1f} KiB/s for {now - samples[0][0]:.0f}s"
+            if reason is None:
+                return
+
+            counts = self._platform(platform)
+            counts['stalls'] += 1
+            state['stalls'] += 1
+            # 重启后的新连接重新计时
+            del state['files'][key]
+            restarts = state['restarts'].get(key, 0)
+            if restarts >= self.max_restarts:
+                counts['gave_up'] += 1
+            else:
+                counts['restarts'] += 1
+                state['restarts'][key] = restarts + 1
+
+        if restarts >= self.max_restarts:
+            logger.warning(f"Download stalled ({reason}), giving up after {restarts} restarts: {key}")
+            raise DownloadStalled(f"Download stalled ({reason}) after {restarts} restarts")
+        logger.warning(f"Download stalled ({reason}), restarting: {key}")
+        raise yt_dlp.utils.ReExtractInfo(f"Download stalled ({reason}), restarting", expected=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """检测阈值和每个平台的卡顿、重启、恢复次数"""
+        with self._lock:
+            platforms = {p: dict(c) for p, c in self._platforms.items()}
+            active = len(self._downloads)
+        totals = {k: sum(c[k] for c in platforms.values()) for k in ('stalls', 'restarts', 'recovered', 'gave_up')}
+        return {
+            'enabled': self.enabled,
+            'min_speed': self.min_speed,
+            'window': self.window,
+            'timeout': self.timeout,
+            'max_restarts': self.max_restarts,
+            'active': active,
+            **totals,
+            'platforms': platforms,
+        }
@@ -12,14 +12,22 @@ Usage:
 """
 
 import argparse
+import contextlib
+import importlib
+import importlib.util
 import json
 import logging
+import os
+import random
+import re
 import sqlite3
 import sys
+import threading
 import time
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
 
 # Add web/backend to path for logger import
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "web" / "backend"))
@@ -50,23 +58,54 @@ except ImportError:
         dur_str = f" | Duration: {duration:.2f}s" if duration else ""
         lg.error(f"Download failed | URL: {url} | Error: {str(error)}{dur_str}")
 
-try:
-    import yt_dlp
-except ImportError:
-    print("❌ Error: yt-dlp not installed")
-    print("\nInstall with:")
-    print("  uv pip install yt-dlp")
-    print("  pip install yt-dlp")
-    sys.exit(1)
+# 下载器用到的各个子系统（带宽、并发、熔断、卡顿检测、预取、流水线、后处理、
+# fork server）在 bingo 包中；这里重新导出，原有的 from download import ... 不变
+from bingo.lazy import yt_dlp
+from bingo.errors import (
+    THROTTLING_STATUSES, RETRYABLE_STATUSES, parse_retry_after, http_status_from_error,
+    classify_error, is_throttling_error, retry_after_from_error, CircuitOpenError, DownloadTimeout,
+    DownloadStalled, DownloadRetry,
+)
+from bingo.bandwidth import (
+    BANDWIDTH_BURST_SECONDS, parse_rate, parse_platform_rates, parse_rate_schedule, TokenBucket,
+    SharedTokenBucket, BandwidthGovernor,
+)
+from bingo.concurrency import (
+    PLATFORM_CONCURRENCY_INITIAL, PLATFORM_CONCURRENCY_MIN, PLATFORM_CONCURRENCY_MAX,
+    PLATFORM_CONCURRENCY_DECREASE, PLATFORM_THROTTLE_COOLDOWN, CIRCUIT_WINDOW, CIRCUIT_MIN_REQUESTS,
+    CIRCUIT_FAILURE_RATE, CIRCUIT_OPEN_SECONDS, AdaptiveConcurrency, BatchQueue, CircuitBreaker,
+)
+from bingo.watchdog import STALL_MIN_SPEED, STALL_WINDOW, STALL_TIMEOUT, STALL_MAX_RESTARTS, StallWatchdog
+from bingo.prefetch import (
+    PREFETCH_DEPTH, PREFETCH_EXPIRY_MARGIN, PREFETCH_MAX_AGE, PREFETCH_DROP_FIELDS,
+    signed_url_expiry, info_expiry, MetadataPrefetcher,
+)
+from bingo.pipeline import (
+    PIPELINE_EXTRACT_WORKERS, PIPELINE_DOWNLOAD_WORKERS, PIPELINE_POSTPROCESS_WORKERS,
+    PIPELINE_RECORD_WORKERS, PIPELINE_QUEUE_SIZE, PipelineJob, PipelineStage, DownloadPipeline,
+    download_batch_pipelined,
+)
+from bingo.postprocess import (
+    POSTPROCESS_WORKERS, _postprocess_downloads, PostProcessJob, PostProcessPool, wait_postprocessing,
+)
+from bingo.forkserver import (
+    FORK_SERVER_PRELOAD, FORK_SERVER_STOP_TIMEOUT, FeedbackRelay, ForkedProcess, ForkServer,
+)
+
+
+def lazy_extractors_available() -> bool:
+    """Whether yt-dlp will use its prebuilt lazy extractor index."""
+    if os.environ.get('YTDLP_NO_LAZY_EXTRACTORS'):
+        return False
+    try:
+        return importlib.util.find_spec('yt_dlp.extractor.lazy_extractors') is not None
+    except ImportError:
+        return False
 
-try:
-    from rich.console import Console
-    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TransferSpeedColumn
-    from rich.panel import Panel
-    from rich.table import Table
-    RICH_AVAILABLE = True
-except ImportError:
-    RICH_AVAILABLE = False
+
+# rich is imported where it is used; only check that it is installed
+RICH_AVAILABLE = importlib.util.find_spec('rich') is not None
+if not RICH_AVAILABLE:
     print("⚠ Warning: 'rich' not installed. Install for better output:")
     print("  pip install rich")
 
@@ -81,8 +120,41 @@ MAX_FILE_SIZE_WARNING = 2 * 1024 * 1024 * 1024  # 2GB
 MAX_RETRY_ATTEMPTS = 3
 INITIAL_RETRY_DELAY = 5  # seconds
 RETRY_BACKOFF_MULTIPLIER = 2  # exponential backoff
-
-# 可重试的错误类型
+RETRY_MAX_DELAY = 300  # seconds, 退避时间上限
+# 全局重试预算：RETRY_BUDGET_WINDOW 秒内重试次数不超过尝试次数的 RETRY_BUDGET_RATIO
+# （至少允许 RETRY_BUDGET_MIN 次，流量很小时不受比例限制）
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MIN = 10
+RETRY_BUDGET_WINDOW = 60  # seconds
+
+# 音频格式（--audio-format）→ (优先下载的源音频编码, FFmpegExtractAudio 的 preferredcodec)
+# 源编码与目标一致时 ffmpeg 只复制音频流（换容器），不解码重编码；
+# flac/wav 是无损格式，总要转码；best 保留源编码
+AUDIO_FORMATS = {
+    'mp3': ('mp3', 'mp3'),
+    'm4a': ('mp4a', 'm4a'),
+    'aac': ('mp4a', 'm4a'),
+    'opus': ('opus', 'opus'),
+    'flac': (None, 'flac'),
+    'wav': (None, 'wav'),
+    'best': (None, 'best'),
+}
+DEFAULT_AUDIO_FORMAT = 'mp3'
+AUDIO_TRANSCODE_QUALITY = '192'  # kbps, 只在需要转码为有损格式时使用
+
+# 字幕（--subs）：默认语言、优先的字幕格式和并发下载的轨道数
+DEFAULT_SUB_LANGS = ('en', 'zh')
+SUBTITLE_FORMATS = ('vtt', 'srt', 'ass')
+SUBTITLE_FETCH_WORKERS = 4
+
+# 直接转发（不落盘）时每次读取的字节数
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# YoutubeDL 实例池配置
+YDL_POOL_MAX_IDLE = 4  # 每组选项最多保留的空闲实例
+YDL_POOL_IDLE_TTL = 300  # seconds, 空闲超过该时间的实例会被关闭
+
+# 可重试的错误消息片段（仅用于 SmartRetry.is_retryable_error 按消息判断）
 RETRYABLE_ERRORS = [
     'HTTP Error 429',  # Too Many Requests
     'HTTP Error 503',  # Service Unavailable
@@ -95,6 +167,128 @@ RETRYABLE_ERRORS = [
 ]
 
 
+def audio_transcoded(info: Dict[str, Any], audio_format: str) -> Optional[bool]:
+    """
+    按下载到的音频编码判断 FFmpegExtractAudio 是否需要转码（与 yt-dlp 的判断一致）
+
+    False 表示只复制音频流；源编码未知（例如直链下载）时返回 None。
+    """
+    acodec = (info.get('acodec') or '').lower()
+    if not acodec or acodec == 'none':
+        return None
+    codec = 'aac' if acodec.startswith('mp4a') else acodec.split('.')[0]
+    target = AUDIO_FORMATS[audio_format][1]
+    if codec == 'aac' and target in ('m4a', 'best'):
+        return False
+    if target == 'best':
+        return codec not in ('mp3', 'opus', 'vorbis', 'flac', 'alac')
+    return codec != target
+
+
+def _subtitle_key(tracks: Dict[str, Any], lang: str) -> Optional[str]:
+    """tracks 中与 lang 对应的语言代码：先精确匹配，'en' 也匹配 'en-US'、'zh' 匹配 'zh-Hans'"""
+    if tracks.get(lang):
+        return lang
+    prefix = lang.lower() + '-'
+    for key, formats in tracks.items():
+        if formats and key.lower().startswith(prefix) and not key.endswith('-orig'):
+            return key
+    return None
+
+
+def select_subtitles(info: Dict[str, Any], langs) -> Dict[str, Dict[str, Any]]:
+    """
+    按语言列表选择要下载的字幕轨道，返回 {语言代码: 字幕格式}
+
+    每种语言只取一条轨道：人工字幕优先于自动字幕（自动字幕里大多是机器翻译）。
+    请求的语言都没有时退回视频的原语言（info['language'] 或自动字幕中的
+    '-orig' 轨道）。每条轨道优先选 SUBTITLE_FORMATS 中的格式，返回的格式带
+    'automatic' 标记。
+    """
+    manual = info.get('subtitles') or {}
+    automatic = info.get('automatic_captions') or {}
+
+    def pick(lang: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        for tracks, is_automatic in ((manual, False), (automatic, True)):
+            key = _subtitle_key(tracks, lang)
+            if key is None:
+                continue
+            formats = [f for f in tracks[key] if f.get('data') is not None
+                       or (f.get('url') and f.get('protocol', 'https') in ('http', 'https'))]
+            if not formats:
+                continue
+            preferred = [f for ext in SUBTITLE_FORMATS for f in formats if f.get('ext') == ext]
+            # 没有常用格式时与 yt-dlp 一样取列表中最后（最好）的一个
+            fmt = preferred[0] if preferred else formats[-1]
+            return key, {**fmt, 'automatic': is_automatic}
+        return None
+
+    selected: Dict[str, Dict[str, Any]] = {}
+    for lang in langs:
+        found = pick(lang)
+        if found and found[0] not in selected:
+            selected[found[0]] = found[1]
+    if not selected:
+        original = info.get('language')
+        if not original:
+            orig = [key for key, formats in automatic.items() if key.endswith('-orig') and formats]
+            original = orig[0] if orig else None
+        found = pick(original) if original else None
+        if found:
+            selected[found[0]] = found[1]
+    return selected
+
+
+def detect_platform(url: str) -> str:
+    """Detect video platform from URL."""
+    if 'youtube.com' in url or 'youtu.be' in url:
+        return 'YouTube'
+    elif 'bilibili.com' in url:
+        return 'Bilibili'
+    elif 'twitter.com' in url or 'x.com' in url:
+        return 'Twitter/X'
+    elif 'tiktok.com' in url or 'douyin.com' in url:
+        return 'TikTok/Douyin'
+    else:
+        return 'Unknown'
+
+
+def platform_key(url: str) -> str:
+    """
+    并发控制和熔断使用的平台标识
+
+    已知平台用 detect_platform 的名称，其他网站按域名区分，
+    避免一个出问题的小站点影响所有未识别的网站。
+    """
+    platform = detect_platform(url)
+    if platform != 'Unknown':
+        return platform
+    from urllib.parse import urlsplit
+    host = (urlsplit(url).hostname or '').lower()
+    return host.removeprefix('www.') or platform
+
+
+def parse_deadline(value: str, now: Optional[datetime] = None) -> float:
+    """
+    解析截止时间，返回 Unix 时间戳
+
+    支持 ISO 8601（不带时区时按本地时间）或 HH:MM（今天的该时刻，
+    已经过去则为明天）。
+    """
+    value = value.strip()
+    now = now or datetime.now()
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})', value)
+    if match:
+        target = now.replace(hour=int(match.group(1)), minute=int(match.group(2)), second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return target.timestamp()
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid deadline: {value!r} (use HH:MM or an ISO 8601 date and time)")
+
+
 class ConfigPresets:
     """配置预设管理器"""
 
@@ -202,25 +396,32 @@ class DownloadHistory:
                 download_path TEXT
             )
         ''')
+        # 旧数据库没有 filepath 列（最终输出文件路径）
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(downloads)')}
+        if 'filepath' not in columns:
+            cursor.execute('ALTER TABLE downloads ADD COLUMN filepath TEXT')
         conn.commit()
         conn.close()
 
     def record_download(self, url: str, platform: str, title: str = "",
                        quality: str = "", filesize: int = 0,
-                       success: bool = True, download_path: str = ""):
-        """记录下载"""
+                       success: bool = True, download_path: str = "",
+                       filepath: str = "") -> Optional[int]:
+        """记录下载，返回记录 id"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO downloads
-                (url, platform, title, quality, filesize, success, download_path)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (url, platform, title, quality, filesize, success, download_path))
+                (url, platform, title, quality, filesize, success, download_path, filepath)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, platform, title, quality, filesize, success, download_path, filepath))
             conn.commit()
             conn.close()
+            return cursor.lastrowid
         except Exception as e:
             print(f"⚠ Warning: Could not save to history: {e}")
+            return None
 
     def get_history(self, limit: int = 20) -> List[Dict]:
         """获取历史记录"""
@@ -253,6 +454,35 @@ class DownloadHistory:
             print(f"⚠ Warning: Could not read history: {e}")
             return []
 
+    def get_record(self, record_id: int) -> Optional[Dict]:
+        """按 id 获取单条记录"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, url, platform, title, success, timestamp, download_path, filepath
+                FROM downloads
+                WHERE id = ?
+            ''', (record_id,))
+            row = cursor.fetchone()
+            conn.close()
+        except Exception as e:
+            print(f"⚠ Warning: Could not read history: {e}")
+            return None
+
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'url': row[1],
+            'platform': row[2],
+            'title': row[3],
+            'success': row[4],
+            'timestamp': row[5],
+            'download_path': row[6],
+            'filepath': row[7]
+        }
+
     def get_stats(self) -> Dict:
         """获取统计信息"""
         try:
@@ -304,6 +534,8 @@ class UserPreferences:
 
     def __init__(self):
         self.preferences = self._load_preferences()
+        # 共享上下文中可能被多个下载线程同时修改
+        self._lock = threading.RLock()
 
     def _load_preferences(self) -> Dict[str, Any]:
         """从文件加载用户偏好"""
@@ -323,12 +555,17 @@ class UserPreferences:
     def save_preferences(self):
         """保存用户偏好到文件"""
         try:
-            PREFERENCES_FILE.write_text(json.dumps(self.preferences, indent=2))
+            with self._lock:
+                PREFERENCES_FILE.write_text(json.dumps(self.preferences, indent=2))
         except Exception as e:
             print(f"⚠ Warning: Could not save preferences: {e}")
 
     def record_download(self, format_id: str, quality: int, filesize: int):
         """记录下载历史"""
+        with self._lock:
+            self._record_download(format_id, quality, filesize)
+
+    def _record_download(self, format_id: str, quality: int, filesize: int):
         self.preferences['download_count'] += 1
         self.preferences['format_history'].append({
             'format_id': format_id,
@@ -347,15 +584,17 @@ class UserPreferences:
 
     def set_preferred_quality(self, quality: int):
         """设置用户偏好的质量"""
-        self.preferences['preferred_quality'] = quality
-        self.save_preferences()
+        with self._lock:
+            self.preferences['preferred_quality'] = quality
+            self.save_preferences()
 
 
 class SmartFormatSelector:
     """智能格式选择器 - 根据多个因素自动选择最佳格式"""
 
-    def __init__(self, preferences: UserPreferences):
+    def __init__(self, preferences: UserPreferences, ydl_pool: Optional['YoutubeDLPool'] = None):
         self.preferences = preferences
+        self.ydl_pool = ydl_pool or YoutubeDLPool()
         self.codecs_priority = {
             'h264': 10,
             'avc1': 10,
@@ -366,15 +605,16 @@ class SmartFormatSelector:
             'vp8': 5
         }
 
-    def select_best_format(self, url: str, audio_only: bool = False) -> Optional[str]:
-        """智能选择最佳视频格式"""
+    def select_best_format(self, url: str, audio_only: bool = False,
+                           audio_codec: Optional[str] = None) -> Optional[str]:
+        """智能选择最佳视频格式（audio_codec：音频优先选择的编码，免去转码）"""
         try:
             # 获取视频信息
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            with self.ydl_pool.checkout({'quiet': True}) as ydl:
                 info = ydl.extract_info(url, download=False)
 
             if audio_only:
-                return self._select_best_audio(info)
+                return self._select_best_audio(info, audio_codec)
 
             return self._select_best_video(info)
 
@@ -450,8 +690,8 @@ class SmartFormatSelector:
 
         return best_format.get('format_id')
 
-    def _select_best_audio(self, info: Dict) -> str:
-        """选择最佳音频格式"""
+    def _select_best_audio(self, info: Dict, audio_codec: Optional[str] = None) -> str:
+        """选择最佳音频格式：编码与 audio_codec 一致的优先"""
         formats = info.get('formats', [])
 
         # 过滤音频格式
@@ -463,7 +703,8 @@ class SmartFormatSelector:
         if audio_formats:
             # 优先选择高品质音频
             audio_formats.sort(
-                key=lambda x: (x.get('abr') or 0, x.get('asr') or 0),
+                key=lambda x: (bool(audio_codec) and (x.get('acodec') or '').startswith(audio_codec),
+                               x.get('abr') or 0, x.get('asr') or 0),
                 reverse=True
             )
             best = audio_formats[0]
@@ -523,72 +764,356 @@ class SmartFormatSelector:
         return score
 
 
+class RetryBudget:
+    """
+    全局重试预算 - 窗口内重试次数不超过尝试次数的 ratio
+
+    平台大面积故障时，每个失败都重试会让请求量成倍放大；预算用完后失败
+    直接返回，不再重试。min_retries 保证流量很小时仍然可以重试。
+    """
+
+    def __init__(
+        self,
+        ratio: float = RETRY_BUDGET_RATIO,
+        min_retries: int = RETRY_BUDGET_MIN,
+        window: float = RETRY_BUDGET_WINDOW,
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._lock = threading.Lock()
+        self._attempts: deque = deque()
+        self._retries: deque = deque()
+        self.denied = 0
+
+    def _prune(self, now: float):
+        # 调用方持有锁
+        for events in (self._attempts, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_attempt(self):
+        """记录一次尝试（包括重试）"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._attempts.append(now)
+
+    def try_spend(self) -> bool:
+        """预算允许时记录一次重试并返回 True"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            allowed = max(self.min_retries, self.ratio * len(self._attempts))
+            if len(self._retries) >= allowed:
+                self.denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                'window': self.window,
+                'attempts': len(self._attempts),
+                'retries': len(self._retries),
+                'denied': self.denied,
+            }
+
+
 class SmartRetry:
-    """智能重试管理器 - 带指数退避的自动重试"""
+    """
+    智能重试管理器 - 指数退避（full jitter）+ 全局重试预算
+
+    是否重试由 classify_error 按异常类型和 HTTP 状态码决定。
+    execute_with_retry 在当前线程等待后重试（CLI 单个下载）；
+    调度器每次只执行一次尝试（run_attempt），失败时用 retry_delay
+    得到等待时间后把任务延迟重新排队，工作线程不等待。
+    """
 
     def __init__(
         self,
         max_attempts: int = MAX_RETRY_ATTEMPTS,
         initial_delay: int = INITIAL_RETRY_DELAY,
-        backoff_multiplier: float = RETRY_BACKOFF_MULTIPLIER
+        backoff_multiplier: float = RETRY_BACKOFF_MULTIPLIER,
+        max_delay: float = RETRY_MAX_DELAY,
+        budget: Optional[RetryBudget] = None,
     ):
         self.max_attempts = max_attempts
         self.initial_delay = initial_delay
         self.backoff_multiplier = backoff_multiplier
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
 
     def is_retryable_error(self, error_message: str) -> bool:
-        """检查错误是否可以重试"""
+        """检查错误消息是否可以重试（只有消息时使用，异常对象用 classify_error）"""
         error_lower = error_message.lower()
         return any(err.lower() in error_lower for err in RETRYABLE_ERRORS)
 
-    def execute_with_retry(self, func, *args, **kwargs):
-        """执行函数，失败时自动重试"""
-        last_error = None
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间：0 到指数退避上限之间均匀随机（full jitter）"""
+        cap = min(self.max_delay, self.initial_delay * (self.backoff_multiplier ** (attempt - 1)))
+        return random.uniform(0, cap)
 
-        for attempt in range(self.max_attempts):
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        第 attempt 次尝试失败后的重试等待秒数
+
+        不可重试、次数用完或重试预算不足时返回 None。平台给出
+        Retry-After 时至少等待这么久。
+        """
+        if attempt >= self.max_attempts or classify_error(error) == 'fatal':
+            return None
+        if not self.budget.try_spend():
+            return None
+        delay = self.backoff(attempt)
+        retry_after = retry_after_from_error(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def run_attempt(self, func, *args, **kwargs):
+        """执行一次尝试（计入重试预算的尝试次数）"""
+        self.budget.record_attempt()
+        return func(*args, **kwargs)
+
+    def execute_with_retry(self, func, *args, **kwargs):
+        """执行函数，失败时在当前线程等待后自动重试"""
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                return func(*args, **kwargs)
+                return self.run_attempt(func, *args, **kwargs)
             except Exception as e:
-                last_error = e
                 error_msg = str(e)
-
-                # 检查是否可重试
-                if not self.is_retryable_error(error_msg):
+                delay = self.retry_delay(e, attempt)
+                if delay is not None:
                     if RICH_AVAILABLE:
-                        print(f"\n[red]❌ Non-retryable error: {error_msg}[/red]")
+                        from rich.console import Console
+                        console = Console()
+                        console.print(f"\n[yellow]⚠ Attempt {attempt}/{self.max_attempts} failed:[/yellow] {error_msg[:100]}")
+                        console.print(f"[yellow]   Retrying in {delay:.0f} seconds...[/yellow]")
                     else:
-                        print(f"\n❌ Non-retryable error: {error_msg}")
-                    raise
-
-                # 如果是最后一次尝试，不再等待
-                if attempt == self.max_attempts - 1:
-                    break
-
-                # 计算退避时间
-                delay = self.initial_delay * (self.backoff_multiplier ** attempt)
-
+                        print(f"\n⚠ Attempt {attempt}/{self.max_attempts} failed: {error_msg[:100]}")
+                        print(f"   Retrying in {delay:.0f} seconds...")
+                    time.sleep(delay)
+                    continue
+
+                if classify_error(e) == 'fatal':
+                    # 平台熔断、视频不存在等重试也不会成功的错误
+                    message = f"Non-retryable error: {error_msg}"
+                elif attempt >= self.max_attempts:
+                    message = f"All {self.max_attempts} attempts failed\nLast error: {error_msg}"
+                else:
+                    message = f"Retry budget exhausted, not retrying: {error_msg}"
                 if RICH_AVAILABLE:
                     from rich.console import Console
-                    console = Console()
-                    console.print(f"\n[ yellow]⚠ Attempt {attempt + 1}/{self.max_attempts} failed:[/yellow] {error_msg[:100]}")
-                    console.print(f"[yellow]   Retrying in {delay:.0f} seconds...[/yellow]")
+                    from rich.markup import escape
+                    Console().print(f"\n[red]❌ {escape(message)}[/red]")
                 else:
-                    print(f"\n⚠ Attempt {attempt + 1}/{self.max_attempts} failed: {error_msg[:100]}")
-                    print(f"   Retrying in {delay:.0f} seconds...")
+                    print(f"\n❌ {message}")
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        """重试预算使用情况"""
+        return self.budget.stats()
+
+
+class YoutubeDLPool:
+    """
+    预热的 YoutubeDL 实例池
+
+    创建 YoutubeDL 需要构建网络 opener、加载（浏览器 cookies 还需解密）
+    cookie jar、初始化提取器，短视频批量下载时这部分开销占比很高。
+    实例按影响其内部状态的选项分组（cookies、代理、格式策略、后处理器等），
+    每个任务独占借出一个实例，归还时保留连接和已加载的 cookies。
+    输出模板、播放列表范围和回调属于单次任务，每次借出时重新设置。
+    """
+
+    # 每次借出时替换的按任务选项，不参与分组
+    TASK_OPTIONS = ('outtmpl', 'playlistitems', 'match_filter',
+                    'progress_hooks', 'post_hooks', 'postprocessor_hooks')
+
+    def __init__(self, max_idle: int = YDL_POOL_MAX_IDLE, idle_ttl: float = YDL_POOL_IDLE_TTL):
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._idle: Dict[str, deque] = {}
+        self.created = 0
+        self.reused = 0
+
+    @classmethod
+    def pool_key(cls, opts: Dict[str, Any]) -> str:
+        """按共享选项计算分组键"""
+        shared = {k: v for k, v in opts.items() if k not in cls.TASK_OPTIONS}
+        return json.dumps(shared, sort_keys=True, default=repr)
+
+    @contextlib.contextmanager
+    def checkout(self, opts: Dict[str, Any]):
+        """借出一个按 opts 配置好的 YoutubeDL，with 块结束后归还"""
+        key = self.pool_key(opts)
+        ydl = self._acquire(key)
+        if ydl is None:
+            shared = {k: v for k, v in opts.items() if k not in self.TASK_OPTIONS}
+            ydl = yt_dlp.YoutubeDL(shared)
+            with self._lock:
+                self.created += 1
+        self._prepare(ydl, opts)
+
+        try:
+            yield ydl
+        except GeneratorExit:
+            # 使用方（如转发生成器）被提前关闭，实例本身仍可用
+            self._release(key, ydl)
+            raise
+        except BaseException:
+            # 出错后实例状态不可信，直接关闭
+            ydl.close()
+            raise
+        self._release(key, ydl)
+
+    def _acquire(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                ydl, returned_at = idle.pop()
+                if now - returned_at < self.idle_ttl:
+                    self.reused += 1
+                    return ydl
+                ydl.close()
+        return None
 
-                time.sleep(delay)
+    def _prepare(self, ydl, opts: Dict[str, Any]):
+        """重置上一个任务留下的状态并应用本次任务的选项"""
+        ydl.params.pop('playlistitems', None)
+        if 'playlistitems' in opts:
+            ydl.params['playlistitems'] = opts['playlistitems']
+        ydl.params['match_filter'] = opts.get('match_filter')
+        ydl.params['outtmpl'] = opts.get('outtmpl', {})
+        ydl._parse_outtmpl()
+
+        ydl._progress_hooks = list(opts.get('progress_hooks', []))
+        ydl._post_hooks = list(opts.get('post_hooks', []))
+        ydl._postprocessor_hooks = list(opts.get('postprocessor_hooks', []))
+
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        ydl._num_videos = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls = set()
+
+    def _release(self, key: str, ydl):
+        # 与 YoutubeDL.close() 一致，把 cookie 变化写回 cookie 文件
+        ydl.save_cookies()
+        ydl.params['match_filter'] = None
+        ydl._progress_hooks = []
+        ydl._post_hooks = []
+        ydl._postprocessor_hooks = []
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_idle:
+                idle.append((ydl, time.monotonic()))
+                return
+        ydl.close()
 
-        # 所有重试都失败
-        if RICH_AVAILABLE:
+    def stats(self) -> Dict[str, int]:
+        """实例创建/复用次数和当前空闲实例数"""
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'idle': sum(len(idle) for idle in self._idle.values()),
+            }
+
+    def close(self):
+        """关闭所有空闲实例"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for instances in idle.values():
+            for ydl, _ in instances:
+                ydl.close()
+
+
+class DownloaderContext:
+    """
+    进程级共享资源 - 偏好设置、历史数据库、重试管理器、YoutubeDL 实例池、
+    带宽控制器、平台并发控制器、熔断器、卡顿检测、下载流水线、元数据预取和
+    后处理池（这三项可选）以及控制台
+
+    在进程入口（CLI main 或 FastAPI lifespan）创建一次，注入到每个
+    BingoDownloader，避免每次下载都重新读取偏好文件、执行建表语句。
+    单次下载需要不同资源时，用 derive() 覆盖个别字段。
+    """
+
+    _default: Optional['DownloaderContext'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        preferences: Optional[UserPreferences] = None,
+        history: Optional[DownloadHistory] = None,
+        retry_manager: Optional[SmartRetry] = None,
+        ydl_pool: Optional[YoutubeDLPool] = None,
+        bandwidth: Optional[BandwidthGovernor] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        watchdog: Optional[StallWatchdog] = None,
+        pipeline: Optional[DownloadPipeline] = None,
+        prefetcher: Optional[MetadataPrefetcher] = None,
+        postprocessing: Optional[PostProcessPool] = None,
+        console: Any = None,
+    ):
+        self.preferences = preferences or UserPreferences()
+        self.history = history or DownloadHistory()
+        self.retry_manager = retry_manager or SmartRetry()
+        self.ydl_pool = ydl_pool or YoutubeDLPool()
+        self.bandwidth = bandwidth or BandwidthGovernor()
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.breaker = breaker or CircuitBreaker()
+        self.watchdog = watchdog or StallWatchdog()
+        # 没有流水线时每个下载在调用线程中串行完成
+        self.pipeline = pipeline
+        # 没有预取器时每个 URL 在下载时才提取
+        self.prefetcher = prefetcher
+        # 没有后处理池时后处理器在下载线程中运行
+        self.postprocessing = postprocessing
+        if console is None and RICH_AVAILABLE:
             from rich.console import Console
             console = Console()
-            console.print(f"\n[red]❌ All {self.max_attempts} attempts failed[/red]")
-            console.print(f"[red]Last error: {last_error}[/red]")
-        else:
-            print(f"\n❌ All {self.max_attempts} attempts failed")
-            print(f"Last error: {last_error}")
-
-        raise last_error
+        self.console = console
+
+    @classmethod
+    def default(cls) -> 'DownloaderContext':
+        """进程默认上下文（首次使用时创建）"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    def derive(self, **overrides) -> 'DownloaderContext':
+        """复制上下文并替换指定资源（其余资源共享）"""
+        fields = {
+            'preferences': self.preferences,
+            'history': self.history,
+            'retry_manager': self.retry_manager,
+            'ydl_pool': self.ydl_pool,
+            'bandwidth': self.bandwidth,
+            'concurrency': self.concurrency,
+            'breaker': self.breaker,
+            'watchdog': self.watchdog,
+            'pipeline': self.pipeline,
+            'prefetcher': self.prefetcher,
+            'postprocessing': self.postprocessing,
+            'console': self.console,
+        }
+        unknown = set(overrides) - set(fields)
+        if unknown:
+            raise TypeError(f"Unknown context resources: {', '.join(sorted(unknown))}")
+        fields.update(overrides)
+        return DownloaderContext(**fields)
 
 
 class BingoDownloader:
@@ -606,24 +1131,78 @@ class BingoDownloader:
         list_formats: bool = False,
         smart_format: bool = False,
         write_thumbnail: bool = False,
+        context: Optional[DownloaderContext] = None,
+        audio_format: str = DEFAULT_AUDIO_FORMAT,
+        sub_langs: Optional[List[str]] = None,
+        subtitles_only: bool = False,
+        interactive: bool = True,
+        defer_retries: bool = False,
+        max_duration: Optional[float] = None,
+        deadline: Optional[float] = None,
+        postprocess_priority: int = 0,
     ):
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format: {audio_format} (choose from {', '.join(AUDIO_FORMATS)})")
         self.download_path = Path(download_path)
         self.audio_only = audio_only
+        self.audio_format = audio_format
+        # 最近一次音频下载是否转码（False = 只复制音频流，None = 未知或不是音频下载）
+        self.transcoded: Optional[bool] = None
         self.quality = quality
-        self.subtitles = subtitles
+        # 只下载字幕时不下载媒体文件
+        self.subtitles_only = subtitles_only
+        self.subtitles = subtitles or subtitles_only
+        self.sub_langs = list(sub_langs or DEFAULT_SUB_LANGS)
+        # 最近一次下载写入的字幕文件
+        self.subtitle_files: List[str] = []
         self.cookies_browser = cookies_browser
         self.cookies_file = cookies_file
         self.format_id = format_id
         self.list_formats = list_formats
         self.smart_format = smart_format
         self.write_thumbnail = write_thumbnail
-        self.console = Console() if RICH_AVAILABLE else None
-
-        # 初始化偏好和智能选择器
-        self.preferences = UserPreferences()
-        self.smart_selector = SmartFormatSelector(self.preferences) if smart_format else None
-        self.retry_manager = SmartRetry()
-        self.history = DownloadHistory()
+        # 非交互模式（Web 后端）下播放列表不询问范围，直接下载全部
+        self.interactive = interactive
+        # 失败后抛出 DownloadRetry 由调用方延迟重新排队，而不是原地等待重试
+        self.defer_retries = defer_retries
+        self.attempt = 0
+        # 每次 download() 最长运行秒数，以及截止时间（Unix 时间戳）
+        self.max_duration = max_duration
+        self.deadline = deadline
+        self._expires_at: Optional[float] = None
+        self._abort_reason: Optional[str] = None
+        # 后处理池中的优先级（数值小的先处理），以及最近一次下载排队中的后处理
+        self.postprocess_priority = postprocess_priority
+        self.pending_postprocess: Optional[PostProcessJob] = None
+
+        # 共享资源（偏好、历史、重试、控制台）来自进程级上下文
+        self.context = context or DownloaderContext.default()
+        self.console = self.context.console
+        self.preferences = self.context.preferences
+        self.retry_manager = self.context.retry_manager
+        self.history = self.context.history
+        self.ydl_pool = self.context.ydl_pool
+        self.bandwidth = self.context.bandwidth
+        self.concurrency = self.context.concurrency
+        self.breaker = self.context.breaker
+        self.watchdog = self.context.watchdog
+        self.pipeline = self.context.pipeline
+        self.prefetcher = self.context.prefetcher
+        self.postprocessing = self.context.postprocessing
+        self.smart_selector = SmartFormatSelector(self.preferences, self.ydl_pool) if smart_format else None
+
+        # 最终输出文件（后处理完成后由 post_hooks 记录）
+        self.downloaded_files: List[str] = []
+        # 进度和最终文件的回调（Web 的下载工作进程用它们把进度转发给 Web 进程）
+        self.on_progress: Optional[Callable[[dict], None]] = None
+        self.on_file: Optional[Callable[[str], None]] = None
+        # 带宽控制：当前平台和每个文件已计入的字节数
+        self._platform = 'Unknown'
+        # 并发控制和熔断按 platform_key 区分（未识别的网站按域名）
+        self._platform_key = 'Unknown'
+        self._counted_bytes: Dict[str, int] = {}
+        # 限速等待的累计时间（卡顿检测不计这部分）
+        self._throttled_seconds = 0.0
 
     def _get_ydl_opts(self) -> dict:
         """Build yt-dlp options."""
@@ -631,8 +1210,14 @@ class BingoDownloader:
             'outtmpl': str(self.download_path / '%(title)s.%(ext)s'),
             'quiet': False,
             'no_warnings': False,
-            'progress_hooks': [self._progress_hook] if RICH_AVAILABLE else [],
+            'progress_hooks': [self._progress_hook]
+            if RICH_AVAILABLE or self.bandwidth.enabled or self.watchdog.enabled
+            or self._expires_at is not None or self.on_progress is not None else [],
+            'post_hooks': [self._post_hook],
         }
+        if self.watchdog.timeout:
+            # 连接完全没有数据时 progress hook 不会被调用，靠读取超时让 yt-dlp 重连
+            opts['socket_timeout'] = self.watchdog.timeout
 
         # Format selection
         if self.format_id:
@@ -642,22 +1227,28 @@ class BingoDownloader:
         else:
             opts['format'] = 'bestvideo+bestaudio/best'
 
-        # Audio extraction
+        # Audio extraction: prefer a source stream that only needs a remux
         if self.audio_only:
+            source_codec, preferred_codec = AUDIO_FORMATS[self.audio_format]
             opts['format'] = 'bestaudio/best'
+            if source_codec and not self.format_id:
+                opts['format'] = f'bestaudio[acodec^={source_codec}]/bestaudio/best'
             opts['postprocessors'] = [{
                 'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
+                'preferredcodec': preferred_codec,
+                'preferredquality': AUDIO_TRANSCODE_QUALITY if preferred_codec in ('mp3', 'm4a', 'opus') else None,
             }]
-            opts['audioformat'] = 'mp3'
+            opts['audioformat'] = preferred_codec
 
-        # Subtitles
+        # Subtitles: only the requested languages, fetched by _fetch_subtitles()
+        # rather than yt-dlp (which would request every auto-translated track).
+        # The languages are kept in the options so they key the instance pool
+        # and duplicate detection.
         if self.subtitles:
-            opts['writesubtitles'] = True
-            opts['writeautomaticsub'] = True
-            opts['subtitleslangs'] = ['all']
-            opts['embedsubs'] = True
+            opts['subtitleslangs'] = list(self.sub_langs)
+        if self.subtitles_only:
+            # 不下载媒体文件（也让只要字幕和要视频的同一 URL 不被当成重复下载）
+            opts['skip_download'] = True
 
         # Thumbnail
         if self.write_thumbnail:
@@ -677,8 +1268,38 @@ class BingoDownloader:
 
         return opts
 
+    def abort(self, reason: str = "Download aborted"):
+        """让正在运行的下载在下一次进度回调时停止（可从其他线程调用）"""
+        self._abort_reason = reason
+
+    def _check_deadline(self):
+        """超时、过了截止时间或被中止时抛出 DownloadTimeout"""
+        if self._abort_reason is not None:
+            raise DownloadTimeout(self._abort_reason)
+        if self._expires_at is not None and time.time() >= self._expires_at:
+            if self.deadline is not None and self._expires_at >= self.deadline:
+                raise DownloadTimeout("Deadline passed before the download finished")
+            raise DownloadTimeout(f"Download exceeded its maximum duration of {self.max_duration:.0f}s")
+
     def _progress_hook(self, d: dict):
         """Progress callback for downloads."""
+        self._check_deadline()
+        key = d.get('tmpfilename') or d.get('filename') or ''
+        if d['status'] == 'downloading' and self.bandwidth.enabled:
+            # 按新收到的字节扣除带宽额度（超出时在这里阻塞下载线程）
+            downloaded = d.get('downloaded_bytes') or 0
+            delta = downloaded - self._counted_bytes.get(key, 0)
+            self._counted_bytes[key] = downloaded
+            self._throttled_seconds += self.bandwidth.throttle(self, self._platform, delta)
+
+        if d['status'] == 'downloading' and self.watchdog.enabled:
+            # 卡顿时抛出异常，yt-dlp 重新提取地址后续传
+            self.watchdog.sample(self, self._platform_key, key, d.get('downloaded_bytes') or 0,
+                                 time.monotonic() - self._throttled_seconds)
+
+        if self.on_progress is not None:
+            self.on_progress(d)
+
         if d['status'] == 'downloading':
             if self.console:
                 # Rich handles progress display separately
@@ -692,18 +1313,38 @@ class BingoDownloader:
             if not RICH_AVAILABLE:
                 print("\n  ✓ Download complete, processing...")
 
+    def _post_hook(self, filepath: str):
+        """Called by yt-dlp with the final file path after post-processing."""
+        self.downloaded_files.append(filepath)
+        if self.on_file is not None:
+            self.on_file(filepath)
+
     def detect_platform(self, url: str) -> str:
         """Detect video platform from URL."""
-        if 'youtube.com' in url or 'youtu.be' in url:
-            return 'YouTube'
-        elif 'bilibili.com' in url:
-            return 'Bilibili'
-        elif 'twitter.com' in url or 'x.com' in url:
-            return 'Twitter/X'
-        elif 'tiktok.com' in url or 'douyin.com' in url:
-            return 'TikTok/Douyin'
+        return detect_platform(url)
+
+    def _record_outcome(self, error: Optional[BaseException] = None):
+        """把下载结果反馈给平台并发控制器和熔断器"""
+        if error is None:
+            self.concurrency.record_success(self._platform_key)
+            self.breaker.record_success(self._platform_key)
+        elif isinstance(error, CircuitOpenError):
+            # check() 拒绝了这次尝试，探测名额不在本下载器手里
+            return
+        elif isinstance(error, DownloadTimeout):
+            # 不是平台的问题，但如果是探测要让出名额
+            self.breaker.record_inconclusive(self._platform_key)
+        elif is_throttling_error(error):
+            self.concurrency.record_throttle(self._platform_key, retry_after_from_error(error))
+            self.breaker.record_inconclusive(self._platform_key)
         else:
-            return 'Unknown'
+            self.breaker.record_failure(self._platform_key)
+
+    def _before_entry(self, info_dict: dict, incomplete: bool = False) -> Optional[str]:
+        """播放列表每个条目开始前调用（yt-dlp match_filter）：平台冷却时先等待"""
+        self._check_deadline()
+        self.concurrency.wait_ready(self._platform_key)
+        return None
 
     def is_playlist(self, url: str) -> bool:
         """检测 URL 是否为播放列表"""
@@ -721,7 +1362,7 @@ class BingoDownloader:
     def get_playlist_info(self, url: str) -> Optional[Dict]:
         """获取播放列表信息"""
         try:
-            with yt_dlp.YoutubeDL({
+            with self.ydl_pool.checkout({
                 'quiet': True,
                 'extract_flat': True,  # 不下载每个视频的详细信息，提高速度
                 'ignoreerrors': True
@@ -734,6 +1375,7 @@ class BingoDownloader:
                     return {
                         'title': info.get('title', 'Unknown Playlist'),
                         'count': len(valid_entries),
+                        'entries': [e['url'] for e in valid_entries if e.get('url')],
                         'id': info.get('id', ''),
                         'uploader': info.get('uploader', 'Unknown'),
                         'type': 'playlist'
@@ -767,7 +1409,7 @@ class BingoDownloader:
             print(f"  Uploader: {playlist_info['uploader']}")
 
         # 如果没有指定范围，询问用户
-        if not playlist_items:
+        if not playlist_items and self.interactive:
             if RICH_AVAILABLE:
                 from rich.prompt import Prompt
                 self.console.print("\n[bold cyan]Download options:[/bold cyan]")
@@ -801,6 +1443,11 @@ class BingoDownloader:
         # 使用播放列表专用输出模板
         opts = self._get_ydl_opts()
         opts['outtmpl'] = str(self.download_path / '%(playlist_title)s/%(playlist_index)s - %(title)s.%(ext)s')
+        # 条目之间遵守平台冷却（其他任务遇到限流时这里也会暂停）
+        opts['match_filter'] = self._before_entry
+        if self.subtitles_only:
+            opts['skip_download'] = True
+            opts['ignore_no_formats_error'] = True
 
         # 添加播放列表范围
         if playlist_items:
@@ -817,13 +1464,29 @@ class BingoDownloader:
 
         # 下载播放列表
         try:
-            with yt_dlp.YoutubeDL(opts) as ydl:
+            self._check_deadline()
+            self.breaker.check(self._platform_key)
+            with self.ydl_pool.checkout(opts) as ydl:
                 if RICH_AVAILABLE:
                     self.console.print("[bold cyan]Starting playlist download...[/bold cyan]\n")
                 else:
                     print("  Starting playlist download...")
 
-                ydl.download([url])
+                if self.prefetcher is not None and playlist_info.get('entries'):
+                    # 下载一个条目时提前提取后面的条目
+                    with self.prefetcher.serve(ydl, playlist_info['entries'], self.extract_metadata):
+                        result = ydl.extract_info(url, download=True)
+                else:
+                    result = ydl.extract_info(url, download=True)
+                if self.subtitles:
+                    for entry in (result or {}).get('entries') or []:
+                        if entry:
+                            self._fetch_subtitles(ydl, entry)
+            if self.subtitles_only:
+                for filepath in self.subtitle_files:
+                    self._post_hook(filepath)
+            self._record_outcome()
+            stalls = self.watchdog.finish(self, self._platform_key, success=True)
 
             if RICH_AVAILABLE:
                 self.console.print("\n[bold green]✓ Playlist download complete![/bold green]")
@@ -832,20 +1495,199 @@ class BingoDownloader:
                 print(f"\n  ✓ Playlist download complete!")
                 print(f"  Files saved to: {self.download_path / playlist_info['title']}")
 
+            return {
+                'success': True,
+                'playlist': playlist_info['title'],
+                'files': list(self.downloaded_files),
+                'subtitles': list(self.subtitle_files),
+                'stalls': stalls,
+            }
+
         except Exception as e:
+            self._record_outcome(e)
+            self.watchdog.finish(self, self._platform_key, success=False)
             if RICH_AVAILABLE:
                 self.console.print(f"\n[red]❌ Playlist download failed: {e}[/red]")
             else:
                 print(f"\n❌ Playlist download failed: {e}")
             sys.exit(1)
 
+    def extract_metadata(self, url: str) -> Dict[str, Any]:
+        """只提取媒体信息并选好格式（不下载），选项与下载时相同"""
+        with self.ydl_pool.checkout(self._stage_opts()) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    def prefetch(self, urls: List[str]):
+        """后台预先提取接下来要下载的 URL（播放列表除外），没有预取器时不做任何事"""
+        if self.prefetcher is not None:
+            self.prefetcher.schedule([u for u in urls if not self.is_playlist(u)], self.extract_metadata)
+
+    def _download_info(self, ydl, url: str, info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """下载 url 并返回下载后的媒体信息：有预取的媒体信息时跳过提取"""
+        if info is not None:
+            try:
+                return ydl.process_ie_result(info, download=True)
+            except yt_dlp.utils.ReExtractInfo:
+                # 卡顿重启：预取的地址可能已失效，重新提取后从 .part 续传
+                pass
+        return ydl.extract_info(url, download=True)
+
+    def _fetch_subtitles(self, ydl, info: Dict[str, Any]) -> List[str]:
+        """
+        并发下载 select_subtitles() 为 info 选中的字幕轨道，写在媒体文件旁边
+
+        返回写入的字幕文件。单条轨道失败只记录警告；只下载字幕时所有轨道都
+        失败则抛出第一个错误（由重试和限流处理）。
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        tracks = select_subtitles(info, self.sub_langs)
+        if not tracks:
+            return []
+        filename = ydl.prepare_filename(info, 'subtitle')
+
+        def fetch(lang: str, track: Dict[str, Any]) -> str:
+            path = yt_dlp.utils.subtitles_filename(filename, lang, track['ext'], info.get('ext'))
+            data = track.get('data')
+            if data is None:
+                headers = track.get('http_headers') or info.get('http_headers') or {}
+                response = ydl.urlopen(yt_dlp.networking.Request(track['url'], headers=headers))
+                try:
+                    data = response.read()
+                finally:
+                    response.close()
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_bytes(data if isinstance(data, bytes) else data.encode('utf-8'))
+            return path
+
+        files, errors = [], []
+        with ThreadPoolExecutor(max_workers=min(SUBTITLE_FETCH_WORKERS, len(tracks)),
+                                thread_name_prefix='subtitles') as executor:
+            futures = {lang: executor.submit(fetch, lang, track) for lang, track in tracks.items()}
+            for lang, future in futures.items():
+                try:
+                    files.append(future.result())
+                except Exception as e:
+                    logger.warning(f"Subtitle {lang} failed for {info.get('webpage_url', info.get('id'))}: {e}")
+                    errors.append(e)
+        self.subtitle_files.extend(files)
+        if errors and not files and self.subtitles_only:
+            raise errors[0]
+        return files
+
+    def _note_transcode(self, downloads: List[Dict[str, Any]]):
+        """按下载到的音频编码记录这次音频提取是否转码"""
+        if not self.audio_only:
+            return
+        verdicts = [audio_transcoded(d, self.audio_format) for d in downloads]
+        if any(verdicts):
+            self.transcoded = True
+        elif verdicts and None not in verdicts:
+            self.transcoded = False
+
+    def _submit_postprocess(self, url: str, result: Dict[str, Any],
+                            postprocessors: List[Dict[str, Any]]) -> PostProcessJob:
+        """把已落盘的文件交给后处理池，完成后记录最终文件和下载历史"""
+        job = self.postprocessing.submit(postprocessors, result.get('requested_downloads') or [result],
+                                         priority=self.postprocess_priority)
+        platform, on_file = self._platform, self.on_file
+        quality = str(self.quality) if self.quality else "auto"
+        download_path = str(self.download_path)
+
+        # 在后处理池的线程中执行，此时下载器可能已经开始下一个下载，只用上面取好的值
+        def _finished(job: PostProcessJob):
+            if job.error is not None:
+                logger.error(f"Post-processing failed for {url}: {job.error}")
+                return
+            for filepath in job.files:
+                if on_file is not None:
+                    on_file(filepath)
+            try:
+                self.history.record_download(
+                    url=url,
+                    platform=platform,
+                    title=result.get('title', 'Unknown'),
+                    quality=quality,
+                    filesize=sum(os.path.getsize(f) for f in job.files if os.path.isfile(f)),
+                    success=True,
+                    download_path=download_path,
+                    filepath=job.files[-1] if job.files else ""
+                )
+            except Exception:
+                pass
+
+        job.add_done_callback(_finished)
+        return job
+
+    def _stage_opts(self) -> dict:
+        """流水线提取/下载阶段的 yt-dlp 选项：后处理留给后处理阶段"""
+        opts = self._get_ydl_opts()
+        opts.pop('postprocessors', None)
+        # 最终文件路径在后处理阶段之后才确定
+        opts['post_hooks'] = []
+        return opts
+
+    def _extract_stage(self, job: PipelineJob):
+        """流水线提取阶段：解析媒体信息并选好格式"""
+        self._check_deadline()
+        with self.ydl_pool.checkout(self._stage_opts()) as ydl:
+            job.info = ydl.extract_info(job.url, download=False)
+
+    def _download_stage(self, job: PipelineJob):
+        """流水线下载阶段：按提取到的信息下载（合并音视频也在这里）"""
+        with self.ydl_pool.checkout(self._stage_opts()) as ydl:
+            while True:
+                self._check_deadline()
+                try:
+                    result = ydl.process_ie_result(job.info, download=True)
+                    break
+                except yt_dlp.utils.ReExtractInfo:
+                    # 卡顿重启：地址可能已过期，重新提取后从 .part 续传
+                    job.info = ydl.extract_info(job.url, download=False)
+            if self.subtitles:
+                self._fetch_subtitles(ydl, result)
+        job.downloads = result.get('requested_downloads') or [result]
+        self._note_transcode(job.downloads)
+
+    def _postprocess_stage(self, job: PipelineJob):
+        """流水线后处理阶段：音频提取、缩略图转换等 ffmpeg 处理（有后处理池时在池中进行）"""
+        postprocessors = self._get_ydl_opts().get('postprocessors')
+        if postprocessors and self.postprocessing is not None:
+            pending = self.postprocessing.submit(postprocessors, job.downloads, priority=self.postprocess_priority)
+            pending.wait()
+            job.downloads = pending.downloads
+        elif postprocessors:
+            with self.ydl_pool.checkout({'quiet': True, 'postprocessors': postprocessors}) as ydl:
+                job.downloads = _postprocess_downloads(ydl, job.downloads)
+        job.files = [d['filepath'] for d in job.downloads if d.get('filepath')]
+        for filepath in job.files:
+            self._post_hook(filepath)
+
+    def _record_stage(self, job: PipelineJob):
+        """流水线记录阶段：写下载历史（失败不影响下载结果）"""
+        info = job.info or {}
+        try:
+            self.history.record_download(
+                url=job.url,
+                platform=self._platform,
+                title=info.get('title', 'Unknown'),
+                quality=str(self.quality) if self.quality else "auto",
+                filesize=sum(os.path.getsize(f) for f in job.files if os.path.isfile(f)),
+                success=True,
+                download_path=str(self.download_path),
+                filepath=job.files[-1] if job.files else ""
+            )
+        except Exception:
+            pass
+
     def list_available_formats(self, url: str):
         """List all available formats for a video."""
         try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            with self.ydl_pool.checkout({'quiet': True}) as ydl:
                 info = ydl.extract_info(url, download=False)
 
             if RICH_AVAILABLE:
+                from rich.table import Table
                 table = Table(title=f"Available Formats - {info.get('title', 'Unknown')}")
                 table.add_column("ID", style="cyan", no_wrap=True)
                 table.add_column("Ext", style="green")
@@ -875,13 +1717,89 @@ class BingoDownloader:
             print(f"❌ Error listing formats: {e}")
             sys.exit(1)
 
-    def download(self, url: str, playlist_items: Optional[str] = None):
-        """Download video(s) from URL."""
+    def _stream_opts(self) -> dict:
+        """直接转发使用的 yt-dlp 选项（与落盘下载相同的格式策略）"""
+        opts = self._get_ydl_opts()
+        opts['quiet'] = True
+        opts['no_warnings'] = True
+        return opts
+
+    def resolve_stream_format(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        解析可以不落盘直接转发的单一格式
+
+        返回格式的直链、请求头、扩展名、标题和大小。需要合并音视频、
+        后处理（音频转换、字幕、缩略图）或非 HTTP 协议（HLS/DASH 分片）时
+        返回 None，调用方应先落盘再发送。
+        """
+        if self.audio_only or self.subtitles or self.write_thumbnail:
+            return None
+
+        with self.ydl_pool.checkout(self._stream_opts()) as ydl:
+            info = ydl.extract_info(url, download=False)
+
+        if not info or 'entries' in info:
+            return None
+        # 选中了多个格式（bestvideo+bestaudio），需要 ffmpeg 合并
+        if info.get('requested_formats'):
+            return None
+        if info.get('protocol') not in ('http', 'https') or not info.get('url'):
+            return None
+
+        return {
+            'url': info['url'],
+            'http_headers': info.get('http_headers') or {},
+            'ext': info.get('ext') or 'bin',
+            'title': info.get('title') or info.get('id') or 'download',
+            'filesize': info.get('filesize'),
+            'platform': self.detect_platform(url),
+        }
+
+    def iter_stream(self, stream_format: Dict[str, Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        边下载边产出 resolve_stream_format() 返回的格式内容
+
+        使用池中同一组选项的实例发起请求（cookies、代理一致）。
+        只在调用方取走上一块后才继续读取，慢速的消费方会反压上游连接。
+        """
+        request = yt_dlp.networking.Request(stream_format['url'], headers=stream_format['http_headers'])
+        with self.ydl_pool.checkout(self._stream_opts()) as ydl:
+            response = ydl.urlopen(request)
+            try:
+                while True:
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        return
+                    self.bandwidth.throttle(self, stream_format.get('platform', 'Unknown'), len(chunk))
+                    yield chunk
+            finally:
+                response.close()
+
+    def download(self, url: str, playlist_items: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Download video(s) from URL.
+
+        Returns a result dict with the final file paths on success. Exits the
+        process on failure (CLI behaviour).
+        """
         # Create download directory
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.downloaded_files = []
+        self.pending_postprocess = None
+        self.transcoded = None
+        self.subtitle_files = []
 
         # Detect platform
         platform = self.detect_platform(url)
+        self._platform = platform
+        self._platform_key = platform_key(url)
+        self._counted_bytes = {}
+        self._throttled_seconds = 0.0
+        self.watchdog.begin(self)
+        limits = [t for t in (self.deadline,) if t is not None]
+        if self.max_duration:
+            limits.append(time.time() + self.max_duration)
+        self._expires_at = min(limits) if limits else None
 
         # Track download start time
         download_start_time = time.time()
@@ -897,22 +1815,23 @@ class BingoDownloader:
         if self.is_playlist(url):
             playlist_info = self.get_playlist_info(url)
             if playlist_info:
-                self._handle_playlist(url, playlist_info, playlist_items)
-                return
+                return self._handle_playlist(url, playlist_info, playlist_items)
 
         # 智能格式选择
-        if self.smart_format and not self.format_id and not self.quality:
+        if self.smart_format and not self.format_id and not self.quality and not self.subtitles_only:
             if RICH_AVAILABLE:
                 self.console.print("[bold cyan]🤖 Smart format selection enabled[/bold cyan]\n")
             else:
                 print("\n  🤖 Smart format selection enabled")
 
-            selected_format = self.smart_selector.select_best_format(url, self.audio_only)
+            selected_format = self.smart_selector.select_best_format(
+                url, self.audio_only, AUDIO_FORMATS[self.audio_format][0])
             if selected_format:
                 self.format_id = selected_format
 
         # Show download info
         if RICH_AVAILABLE:
+            from rich.panel import Panel
             info_panel = Panel.fit(
                 f"[bold cyan]Platform:[/bold cyan] {platform}\n"
                 f"[bold cyan]Path:[/bold cyan] {self.download_path}\n"
@@ -936,22 +1855,96 @@ class BingoDownloader:
             print(f"  Smart Mode:   {self.smart_format}")
             print(f"  Cookies:      {self.cookies_browser or 'None'}\n")
 
+        # 预取的媒体信息（流水线模式由提取阶段负责）只用于第一次尝试，重试时重新提取
+        metadata = None
+        if self.prefetcher is not None and self.pipeline is None:
+            metadata = self.prefetcher.take(url)
+        prefetched = metadata
+        # 下载得到的媒体信息，以及交给后处理池时要执行的后处理器
+        downloaded: Optional[Dict[str, Any]] = None
+        postprocessors = None
+
         # Download with smart retry
         try:
             def _do_download():
+                nonlocal prefetched, downloaded, postprocessors
+                info, prefetched = prefetched, None
                 ydl_opts = self._get_ydl_opts()
+                self.subtitle_files = []
+                if self.postprocessing is not None and self.pipeline is None and not self.subtitles_only:
+                    # 下载线程只负责把文件落盘，后处理在后处理池中进行
+                    postprocessors = ydl_opts.get('postprocessors')
+                    if postprocessors:
+                        ydl_opts = self._stage_opts()
 
+                try:
+                    # 已超时或平台熔断时直接失败，不占用时间重试
+                    self._check_deadline()
+                    self.breaker.check(self._platform_key)
+                    if self.subtitles_only:
+                        # 只提取媒体信息，不下载媒体文件
+                        with self.ydl_pool.checkout({**self._stage_opts(), 'ignore_no_formats_error': True}) as ydl:
+                            downloaded = info or ydl.extract_info(url, download=False)
+                            if not self._fetch_subtitles(ydl, downloaded):
+                                raise RuntimeError(f"No subtitles in {', '.join(self.sub_langs)} or the original language")
+                        for filepath in self.subtitle_files:
+                            self._post_hook(filepath)
+                    elif self.pipeline is not None:
+                        # 提取、下载、后处理、记录分别在流水线各阶段的线程池中进行
+                        self.pipeline.run(self, url)
+                    else:
+                        with self.ydl_pool.checkout(ydl_opts) as ydl:
+                            if RICH_AVAILABLE:
+                                self.console.print("[bold cyan]Starting download...[/bold cyan]\n")
+                            else:
+                                print(f"  Starting download...")
+                            downloaded = self._download_info(ydl, url, info)
+                            if self.subtitles:
+                                self._fetch_subtitles(ydl, downloaded)
+                        self._note_transcode(downloaded.get('requested_downloads') or [downloaded])
+                except Exception as e:
+                    # 每次失败都反馈，限流时其他任务立即让开，不必等重试用完
+                    self._record_outcome(e)
+                    raise
+
+            if self.defer_retries:
+                # 每次调用只尝试一次，可重试的失败交给调用方延迟重新排队
+                self.attempt += 1
+                try:
+                    self.retry_manager.run_attempt(_do_download)
+                except Exception as e:
+                    delay = self.retry_manager.retry_delay(e, self.attempt)
+                    if delay is None or (self.deadline is not None and time.time() + delay >= self.deadline):
+                        raise
+                    raise DownloadRetry(e, delay, self.attempt) from e
+            else:
+                # 使用智能重试
+                self.retry_manager.execute_with_retry(_do_download)
+            self._record_outcome()
+            stalls = self.watchdog.finish(self, self._platform_key, success=True)
+            if stalls:
+                logger.info(f"Recovered from {stalls} stall(s): {url}")
+
+            if postprocessors and downloaded is not None:
+                # 文件已落盘，下载到此结束；最终文件和历史记录在后处理完成后写入
+                self.pending_postprocess = self._submit_postprocess(url, downloaded, postprocessors)
+                files = [d['filepath'] for d in downloaded.get('requested_downloads') or [downloaded]
+                         if d.get('filepath')]
+                log_download_success(logger, url, str(self.download_path), time.time() - download_start_time)
                 if RICH_AVAILABLE:
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        self.console.print("[bold cyan]Starting download...[/bold cyan]\n")
-                        ydl.download([url])
+                    self.console.print("\n[bold green]✓ Download complete, post-processing queued[/bold green]")
                 else:
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        print(f"  Starting download...")
-                        ydl.download([url])
-
-            # 使用智能重试
-            self.retry_manager.execute_with_retry(_do_download)
+                    print(f"\n  ✓ Download complete, post-processing queued")
+                return {
+                    'success': True,
+                    'filename': Path(files[-1]).name if files else None,
+                    'filepath': files[-1] if files else None,
+                    'files': files,
+                    'subtitles': list(self.subtitle_files),
+                    'stalls': stalls,
+                    'transcoded': self.transcoded,
+                    'postprocessing': True,
+                }
 
             if RICH_AVAILABLE:
                 self.console.print("\n[bold green]✓ Download complete![/bold green]")
@@ -959,33 +1952,59 @@ class BingoDownloader:
             else:
                 print(f"\n  ✓ Download complete!")
                 print(f"  Files saved to: {self.download_path}")
+            if self.transcoded is not None:
+                audio = "transcoded" if self.transcoded else "stream copied, no transcode"
+                if RICH_AVAILABLE:
+                    self.console.print(f"[green]Audio ({self.audio_format}): {audio}[/green]")
+                else:
+                    print(f"  Audio ({self.audio_format}): {audio}")
 
             # Log success
             duration = time.time() - download_start_time
             log_download_success(logger, url, str(self.download_path), duration)
 
-            # 记录下载历史
+            filepath = self.downloaded_files[-1] if self.downloaded_files else None
+
+            # 记录下载历史（流水线模式下记录阶段已经写过）
             try:
-                # 获取视频信息用于历史记录
-                with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                    info = ydl.extract_info(url, download=False)
+                if self.pipeline is None:
+                    # 获取视频信息用于历史记录（用下载时或预取的结果，都没有时才提取）
+                    info = downloaded or metadata
+                    if info is None:
+                        with self.ydl_pool.checkout({'quiet': True}) as ydl:
+                            info = ydl.extract_info(url, download=False)
                     title = info.get('title', 'Unknown')
                     filesize = info.get('filesize') or info.get('filesize_approx') or 0
 
-                self.history.record_download(
-                    url=url,
-                    platform=platform,
-                    title=title,
-                    quality=str(self.quality) if self.quality else "auto",
-                    filesize=filesize,
-                    success=True,
-                    download_path=str(self.download_path)
-                )
+                    self.history.record_download(
+                        url=url,
+                        platform=platform,
+                        title=title,
+                        quality=str(self.quality) if self.quality else "auto",
+                        filesize=filesize,
+                        success=True,
+                        download_path=str(self.download_path),
+                        filepath=filepath or ""
+                    )
             except Exception:
                 # 即使记录失败也不影响下载结果
                 pass
 
+            return {
+                'success': True,
+                'filename': Path(filepath).name if filepath else None,
+                'filepath': filepath,
+                'files': list(self.downloaded_files),
+                'subtitles': list(self.subtitle_files),
+                'stalls': stalls,
+                'transcoded': self.transcoded,
+            }
+
+        except DownloadRetry:
+            self.watchdog.finish(self, self._platform_key, success=False)
+            raise
         except Exception as e:
+            self.watchdog.finish(self, self._platform_key, success=False)
             # Log failure
             duration = time.time() - download_start_time
             log_download_error(logger, url, e, duration)
@@ -1007,6 +2026,157 @@ class BingoDownloader:
                 print(f"\n❌ Download failed: {e}")
             sys.exit(1)
 
+    def download_forked(self, fork_server: ForkServer, url: str,
+                        context_options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        在 fork server 的子进程中下载 url
+
+        与 defer_retries=True 的 download() 行为一致：需要重试时抛出 DownloadRetry，
+        失败时抛出 RuntimeError。子进程的限流和失败反馈在本进程的控制器上重放。
+        context_options 是子进程上下文的带宽（BandwidthGovernor.from_spec 的参数）
+        和卡顿检测（StallWatchdog 的参数）设置。
+        """
+        options = {
+            'download_path': str(self.download_path),
+            'audio_only': self.audio_only,
+            'audio_format': self.audio_format,
+            'quality': self.quality,
+            'subtitles': self.subtitles,
+            'sub_langs': self.sub_langs,
+            'subtitles_only': self.subtitles_only,
+            'cookies_browser': self.cookies_browser,
+            'cookies_file': self.cookies_file,
+            'format_id': self.format_id,
+            'smart_format': self.smart_format,
+            'write_thumbnail': self.write_thumbnail,
+            'max_duration': self.max_duration,
+            'deadline': self.deadline,
+        }
+        controllers = {name: getattr(self, name) for name in FeedbackRelay.CONTROLLERS}
+        outcome = fork_server.run(
+            _forked_download, options, context_options or {}, url, self.attempt,
+            on_event=lambda event: FeedbackRelay.replay(event, controllers),
+        )
+        if outcome['status'] == 'retry':
+            self.attempt = outcome['attempt']
+            raise DownloadRetry(RuntimeError(outcome['error']), outcome['delay'], outcome['attempt'])
+        if outcome['status'] == 'failed':
+            raise RuntimeError(outcome['error'])
+        return outcome['result']
+
+
+def _forked_download(emit: Callable[[Dict[str, Any]], None], options: Dict[str, Any],
+                     context_options: Dict[str, Any], url: str, attempt: int) -> Dict[str, Any]:
+    """fork server 子进程中的一次下载尝试（见 BingoDownloader.download_forked）"""
+    context = DownloaderContext(
+        bandwidth=BandwidthGovernor.from_spec(**context_options.get('bandwidth', {})),
+        watchdog=StallWatchdog(**context_options.get('watchdog', {})),
+    )
+    downloader = BingoDownloader(**options, context=context, interactive=False, defer_retries=True)
+    downloader.attempt = attempt
+    FeedbackRelay.wrap(downloader, emit)
+    try:
+        return {'status': 'success', 'result': downloader.download(url)}
+    except DownloadRetry as e:
+        return {'status': 'retry', 'error': str(e.error), 'delay': e.delay, 'attempt': e.attempt}
+    except SystemExit:
+        # download() 失败时会退出进程
+        return {'status': 'failed', 'error': 'Download failed'}
+
+
+def download_batch(urls: List[str], make_downloader: Callable[..., BingoDownloader], context: DownloaderContext,
+                   echo: Callable[..., None], prefetch: int = 0, fork_server: Optional[ForkServer] = None,
+                   fork_context: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """
+    批量下载 urls，返回 {'success', 'failed', 'skipped'} 计数
+
+    make_downloader(**kwargs) 为每个 URL 创建下载器；进度通过 echo(text, style)
+    输出，style 是 rich 的样式名（纯文本终端忽略）。
+    """
+    results = {'success': 0, 'failed': 0, 'skipped': 0}
+
+    if context.pipeline is not None:
+        # 多个 URL 同时在流水线的不同阶段中（不询问播放列表范围）
+        batch = download_batch_pipelined(urls, lambda: make_downloader(interactive=False), context.pipeline)
+        for i, (url, error) in enumerate(batch, 1):
+            if error is None:
+                results['success'] += 1
+                echo(f"  [{i}] ✓ {url[:70]}", 'green')
+            else:
+                results['failed'] += 1
+                echo(f"  [{i}] ✗ {url[:70]}: {error[:60]}", 'red')
+        return results
+
+    # 被限流（冷却中）的平台的 URL 推后，先下载其他平台的；
+    # 失败后等待重试的 URL 重新排队，等待期间继续下载其他 URL
+    queue = BatchQueue(urls, context.concurrency, platform_key)
+    retrying: Dict[str, BingoDownloader] = {}
+    # 交给后处理池、还没有完成的下载
+    pending: List[Tuple[str, PostProcessJob]] = []
+    for i, url in enumerate(queue, 1):
+        echo(f"  [{i}] Processing: {url[:70]}", 'bold cyan')
+        downloader = retrying.pop(url, None)
+        try:
+            if downloader is None:
+                downloader = make_downloader(list_formats=False, defer_retries=True)
+            # 下载这个 URL 时在后台提取后面几个
+            downloader.prefetch(queue.upcoming(prefetch))
+            if fork_server is not None:
+                downloader.download_forked(fork_server, url, fork_context or {})
+            else:
+                downloader.download(url)
+        except DownloadRetry as e:
+            retrying[url] = downloader
+            queue.defer(url, e.delay)
+            echo(f"  ↻ {str(e)[:80]}\n", 'yellow')
+        except SystemExit:
+            # download() 失败时会退出进程（单 URL 模式），批量模式继续下一个
+            results['failed'] += 1
+            echo("  ✗ Failed\n", 'red')
+        except Exception as e:
+            results['failed'] += 1
+            echo(f"  ✗ Failed: {str(e)[:60]}\n", 'red')
+        else:
+            results['success'] += 1
+            if downloader.pending_postprocess is not None:
+                pending.append((url, downloader.pending_postprocess))
+                echo("  ✓ Downloaded, post-processing queued\n", 'green')
+            else:
+                echo("  ✓ Success\n", 'green')
+
+    # 下载都结束后等待后处理池，后处理失败的计为失败
+    for url, error in wait_postprocessing(pending):
+        if error is not None:
+            results['success'] -= 1
+            results['failed'] += 1
+            echo(f"  ✗ Post-processing failed: {url[:70]}: {error[:60]}", 'red')
+    return results
+
+
+def print_batch_summary(echo: Callable[..., None], results: Dict[str, int], total: int,
+                        context: DownloaderContext, fork_server: Optional[ForkServer] = None):
+    """批量下载的总结，以及流水线、预取、fork server、后处理池的统计"""
+    echo("\n  " + "─" * 50)
+    echo("  Batch Download Summary", 'bold cyan')
+    echo(f"  ✓ Success: {results['success']}", 'green')
+    echo(f"  ✗ Failed: {results['failed']}", 'red')
+    echo(f"  ⊘ Skipped: {results['skipped']}", 'yellow')
+    echo(f"  Total: {total}")
+    if context.pipeline is not None:
+        for name, stage in context.pipeline.stats().items():
+            echo(f"  {name}: {stage['utilization']:.0%} busy, {stage['avg_seconds']:.1f}s per item")
+    if context.prefetcher is not None:
+        prefetch = context.prefetcher.stats()
+        echo(f"  Prefetch: {prefetch['hits']} hits, {prefetch['misses']} misses, {prefetch['expired']} expired")
+    if fork_server is not None:
+        forked = fork_server.stats()
+        echo(f"  Fork server: {forked['jobs']} jobs, {forked['startup_ms']} ms median startup")
+    if context.postprocessing is not None:
+        post = context.postprocessing.stats()
+        echo(f"  Post-processing: {post['workers']} processes, {post['utilization']:.0%} busy, "
+             f"peak queue {post['peak_queued']}, {post['avg_wait_seconds']:.1f}s avg wait")
+    echo("  " + "─" * 50 + "\n")
+
 
 def main():
     """Main entry point."""
@@ -1029,9 +2199,17 @@ Examples:
     parser.add_argument('-p', '--path', type=Path, default=DEFAULT_DOWNLOAD_PATH,
                        help=f'Download path (default: {DEFAULT_DOWNLOAD_PATH})')
     parser.add_argument('-a', '--audio', action='store_true',
-                       help='Extract audio only (MP3)')
+                       help='Extract audio only')
+    parser.add_argument('--audio-format', choices=list(AUDIO_FORMATS), default=DEFAULT_AUDIO_FORMAT,
+                       help=f'Audio format with --audio; the source stream is copied when its codec already matches, '
+                            f'"best" keeps the original codec (default: {DEFAULT_AUDIO_FORMAT})')
     parser.add_argument('-s', '--subs', action='store_true',
                        help='Download subtitles')
+    parser.add_argument('--sub-langs', metavar='LANGS', default=','.join(DEFAULT_SUB_LANGS),
+                       help='Subtitle languages, comma separated; manual subtitles are preferred over automatic ones '
+                            f'and the original language is used when none match (default: {",".join(DEFAULT_SUB_LANGS)})')
+    parser.add_argument('--subs-only', action='store_true',
+                       help='Download only the subtitles, not the media')
     parser.add_argument('-q', '--quality', type=int, metavar='NUM',
                        help='Max video height (720, 1080, etc.)')
     parser.add_argument('-f', '--format', dest='format_id', metavar='ID',
@@ -1059,6 +2237,50 @@ Examples:
     parser.add_argument('--save-preset', metavar='NAME',
                        help='Save current options as a preset')
 
+    # Bandwidth control
+    parser.add_argument('--limit-rate', metavar='RATE', default='0',
+                       help='Total bandwidth for all downloads, e.g. 5M (bytes/s, default: unlimited)')
+    parser.add_argument('--limit-rate-task', metavar='RATE', default='0',
+                       help='Bandwidth per download, e.g. 1M')
+    parser.add_argument('--limit-rate-platform', metavar='SPEC', default='',
+                       help='Bandwidth per platform, e.g. "YouTube=3M,Bilibili=1M"')
+    parser.add_argument('--rate-schedule', metavar='SPEC', default='',
+                       help='Total bandwidth by time of day, e.g. "00:00-07:00=0,09:00-18:00=2M" (0 = unlimited)')
+    parser.add_argument('--bandwidth-shared', metavar='FILE',
+                       help='Share the total bandwidth with other processes through this file')
+
+    # Staged pipeline
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Batch mode: overlap extraction, download and post-processing of different URLs')
+
+    # Post-processing pool
+    parser.add_argument('--postprocess-pool', type=int, nargs='?', const=POSTPROCESS_WORKERS, default=0, metavar='N',
+                       help=f'Batch mode: run ffmpeg post-processing in N processes while the next URL downloads (default N: {POSTPROCESS_WORKERS})')
+
+    # Process isolation
+    parser.add_argument('--fork-server', action='store_true',
+                       help='Batch mode: download each URL in a child forked from a process with yt-dlp preloaded')
+
+    # Metadata prefetch
+    parser.add_argument('--prefetch', type=int, nargs='?', const=PREFETCH_DEPTH, default=0, metavar='N',
+                       help=f'Batch/playlist: extract the next N URLs in the background while downloading (default N: {PREFETCH_DEPTH})')
+
+    # Time limits
+    parser.add_argument('--max-duration', type=float, metavar='SEC',
+                       help='Stop a download that runs longer than this many seconds')
+    parser.add_argument('--deadline', metavar='TIME',
+                       help='Stop downloads still running at this time (HH:MM or ISO 8601, e.g. 2026-01-01T08:00)')
+
+    # Stall detection
+    parser.add_argument('--stall-speed', metavar='RATE', default=str(STALL_MIN_SPEED),
+                       help=f'Restart a download slower than this for --stall-window seconds (default: {STALL_MIN_SPEED // 1024}K, 0 = off)')
+    parser.add_argument('--stall-window', type=float, metavar='SEC', default=STALL_WINDOW,
+                       help=f'Seconds below --stall-speed that count as a stall (default: {STALL_WINDOW})')
+    parser.add_argument('--stall-timeout', type=float, metavar='SEC', default=STALL_TIMEOUT,
+                       help=f'Restart a download that received no data for this long (default: {STALL_TIMEOUT}, 0 = off)')
+    parser.add_argument('--stall-restarts', type=int, metavar='NUM', default=STALL_MAX_RESTARTS,
+                       help=f'Restarts per file before the attempt fails (default: {STALL_MAX_RESTARTS})')
+
     args = parser.parse_args()
 
     # 检查历史和统计
@@ -1194,6 +2416,7 @@ Examples:
         preset_config = {
             'description': f'Preset: {args.save_preset}',
             'audio_only': args.audio,
+            'audio_format': args.audio_format if args.audio else None,
             'quality': args.quality,
             'subtitles': args.subs,
             'write_thumbnail': args.thumbnail,
@@ -1214,6 +2437,8 @@ Examples:
             # 应用预设配置
             if 'audio_only' in preset_config:
                 args.audio = preset_config['audio_only']
+            if 'audio_format' in preset_config:
+                args.audio_format = preset_config['audio_format']
             if 'quality' in preset_config:
                 args.quality = preset_config['quality']
             if 'subtitles' in preset_config:
@@ -1236,14 +2461,96 @@ Examples:
             print(f"   Use --list-presets to see available presets")
             sys.exit(1)
 
+    # 进程级共享资源：批量模式下所有 URL 复用同一份偏好、历史、带宽额度和控制台
+    try:
+        bandwidth = BandwidthGovernor.from_spec(
+            global_rate=args.limit_rate,
+            task_rate=args.limit_rate_task,
+            platform_rates=args.limit_rate_platform,
+            schedule=args.rate_schedule,
+            shared_path=args.bandwidth_shared,
+        )
+        deadline = parse_deadline(args.deadline) if args.deadline else None
+        watchdog = StallWatchdog(
+            min_speed=parse_rate(args.stall_speed),
+            window=args.stall_window,
+            timeout=args.stall_timeout,
+            max_restarts=args.stall_restarts,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    args.sub_langs = [lang.strip() for lang in args.sub_langs.split(',') if lang.strip()]
+    if args.fork_server and (args.pipeline or args.prefetch):
+        parser.error("--fork-server cannot be combined with --pipeline or --prefetch")
+    if args.fork_server and not ForkServer.available():
+        parser.error("--fork-server is not supported on this platform")
+    if args.fork_server and args.postprocess_pool:
+        parser.error("--fork-server cannot be combined with --postprocess-pool")
+    context = DownloaderContext(
+        bandwidth=bandwidth,
+        watchdog=watchdog,
+        pipeline=DownloadPipeline() if args.pipeline else None,
+        prefetcher=MetadataPrefetcher(depth=args.prefetch) if args.prefetch > 0 else None,
+        # 单个 URL 时没有下一个下载可以重叠，后处理照常在下载线程中进行
+        postprocessing=PostProcessPool(args.postprocess_pool) if args.postprocess_pool > 0 and args.batch else None,
+    )
+    fork_context: Dict[str, Any] = {}
+    if args.fork_server:
+        # 每个 URL 在从 zygote fork 出的子进程中下载，子进程按同样的限速和卡顿设置创建上下文
+        fork_context = {
+            'bandwidth': {
+                'global_rate': args.limit_rate,
+                'task_rate': args.limit_rate_task,
+                'platform_rates': args.limit_rate_platform,
+                'schedule': args.rate_schedule,
+                'shared_path': args.bandwidth_shared,
+            },
+            'watchdog': {
+                'min_speed': watchdog.min_speed,
+                'window': watchdog.window,
+                'timeout': watchdog.timeout,
+                'max_restarts': watchdog.max_restarts,
+            },
+        }
+
+    def make_downloader(**kwargs) -> BingoDownloader:
+        """按命令行选项创建下载器，所有下载共享同一个上下文"""
+        return BingoDownloader(
+            download_path=args.path,
+            audio_only=args.audio,
+            audio_format=args.audio_format,
+            quality=args.quality,
+            subtitles=args.subs,
+            sub_langs=args.sub_langs,
+            subtitles_only=args.subs_only,
+            cookies_browser=args.cookies,
+            format_id=args.format_id,
+            smart_format=args.smart,
+            write_thumbnail=args.thumbnail,
+            context=context,
+            max_duration=args.max_duration,
+            deadline=deadline,
+            **kwargs,
+        )
+
     # Batch download mode
     if args.batch:
         if not args.batch.exists():
             print(f"❌ Batch file not found: {args.batch}")
             sys.exit(1)
 
+        # Read URLs from file
+        urls = []
+        with open(args.batch) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+
         if RICH_AVAILABLE:
             from rich.console import Console
+            from rich.markup import escape
             from rich.panel import Panel
             console = Console()
             console.print(Panel.fit(
@@ -1254,66 +2561,10 @@ Examples:
                 title="[bold green]Batch Download Mode[/bold green]",
                 border_style="green"
             ))
-
-            # Read URLs from file
-            urls = []
-            with open(args.batch) as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        urls.append(line)
-
             console.print(f"\n[bold cyan]Found {len(urls)} URLs to process[/bold cyan]\n")
 
-            # Process each URL
-            results = {'success': 0, 'failed': 0, 'skipped': 0}
-
-            for i, url in enumerate(urls, 1):
-                console.print(f"[bold cyan][{i}/{len(urls)}] Processing:[/bold cyan] {url[:70]}")
-
-                try:
-                    downloader = BingoDownloader(
-                        download_path=args.path,
-                        audio_only=args.audio,
-                        quality=args.quality,
-                        subtitles=args.subs,
-                        cookies_browser=args.cookies,
-                        format_id=args.format_id,
-                        list_formats=False,
-                        smart_format=args.smart,
-                        write_thumbnail=args.thumbnail,
-                    )
-
-                    # 尝试下载
-                    old_stdout = sys.stdout
-                    old_stderr = sys.stderr
-                    try:
-                        # 重定向输出以避免混乱
-                        downloader.download(url)
-                        results['success'] += 1
-                        console.print("[green]  ✓ Success[/green]\n")
-                    except Exception as e:
-                        results['failed'] += 1
-                        console.print(f"[red]  ✗ Failed: {str(e)[:60]}[/red]\n")
-                    finally:
-                        sys.stdout = old_stdout
-                        sys.stderr = old_stderr
-
-                except Exception as e:
-                    results['failed'] += 1
-                    console.print(f"[red]  ✗ Error: {str(e)[:60]}[/red]\n")
-
-            # 显示总结
-            console.print("\n" + "━" * 50)
-            console.print("[bold cyan]Batch Download Summary[/bold cyan]")
-            console.print(f"  [green]✓ Success:[/green] {results['success']}")
-            console.print(f"  [red]✗ Failed:[/red] {results['failed']}")
-            console.print(f"  [yellow]⊘ Skipped:[/yellow] {results['skipped']}")
-            console.print(f"  [bold]Total:[/bold] {len(urls)}")
-            console.print("━" * 50 + "\n")
-
-            if results['failed'] > 0:
-                sys.exit(1)
+            def echo(text: str, style: Optional[str] = None):
+                console.print(f"[{style}]{escape(text)}[/{style}]" if style else escape(text))
         else:
             # Terminal without rich
             print(f"\n  📋 Batch Download Mode")
@@ -1321,57 +2572,26 @@ Examples:
             print(f"  Audio Only: {args.audio}")
             print(f"  Subtitles: {args.subs}")
             print(f"  Smart Mode: {args.smart}\n")
-
-            # Read URLs from file
-            urls = []
-            with open(args.batch) as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        urls.append(line)
-
             print(f"  Found {len(urls)} URLs to process\n")
 
-            # Process each URL
-            results = {'success': 0, 'failed': 0, 'skipped': 0}
-
-            for i, url in enumerate(urls, 1):
-                print(f"  [{i}/{len(urls)}] Processing: {url[:70]}")
+            def echo(text: str, style: Optional[str] = None):
+                print(text)
 
-                try:
-                    downloader = BingoDownloader(
-                        download_path=args.path,
-                        audio_only=args.audio,
-                        quality=args.quality,
-                        subtitles=args.subs,
-                        cookies_browser=args.cookies,
-                        format_id=args.format_id,
-                        list_formats=False,
-                        smart_format=args.smart,
-                        write_thumbnail=args.thumbnail,
-                    )
-
-                    downloader.download(url)
-                    results['success'] += 1
-                    print(f"  ✓ Success\n")
-
-                except Exception as e:
-                    results['failed'] += 1
-                    print(f"  ✗ Failed: {str(e)[:60]}\n")
-
-            # 显示总结
-            print("\n  " + "─" * 50)
-            print("  Batch Download Summary")
-            print(f"  ✓ Success: {results['success']}")
-            print(f"  ✗ Failed: {results['failed']}")
-            print(f"  ⊘ Skipped: {results['skipped']}")
-            print(f"  Total: {len(urls)}")
-            print("  " + "─" * 50 + "\n")
-
-            if results['failed'] > 0:
-                sys.exit(1)
-
-        sys.exit(0)
+        fork_server = ForkServer() if args.fork_server else None
+        try:
+            if fork_server is not None:
+                fork_server.start()
+            results = download_batch(urls, make_downloader, context, echo, prefetch=args.prefetch,
+                                     fork_server=fork_server, fork_context=fork_context)
+            print_batch_summary(echo, results, len(urls), context, fork_server)
+        finally:
+            # 中途出错或 Ctrl+C 时也要停掉 zygote 和后处理线程
+            if fork_server is not None:
+                fork_server.close()
+            if context.postprocessing is not None:
+                context.postprocessing.close()
+
+        sys.exit(1 if results['failed'] > 0 else 0)
 
     # Check URL
     if not args.url:
@@ -1397,17 +2617,7 @@ Examples:
         sys.exit(1)
 
     # Create downloader and run
-    downloader = BingoDownloader(
-        download_path=args.path,
-        audio_only=args.audio,
-        quality=args.quality,
-        subtitles=args.subs,
-        cookies_browser=args.cookies,
-        format_id=args.format_id,
-        list_formats=args.list,
-        smart_format=args.smart,
-        write_thumbnail=args.thumbnail,
-    )
+    downloader = make_downloader(list_formats=args.list)
 
     if args.list:
         downloader.list_available_formats(args.url)
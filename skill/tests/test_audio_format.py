@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the audio format policy that stream-copies matching source codecs.
+
+Run with: pytest tests/test_audio_format.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from download import AUDIO_FORMATS, BingoDownloader, SmartFormatSelector, audio_transcoded
+
+
+@pytest.mark.parametrize("acodec, audio_format, expected", [
+    ('mp4a.40.2', 'm4a', False),
+    ('mp4a.40.5', 'aac', False),
+    ('opus', 'opus', False),
+    ('opus', 'best', False),
+    ('mp4a.40.2', 'best', False),
+    ('opus', 'mp3', True),
+    ('mp4a.40.2', 'opus', True),
+    ('mp4a.40.2', 'flac', True),
+    ('mp3', 'mp3', False),
+    (None, 'mp3', None),
+    ('none', 'm4a', None),
+])
+def test_audio_transcoded(acodec, audio_format, expected):
+    assert audio_transcoded({'acodec': acodec}, audio_format) is expected
+
+
+def test_audio_opts_prefer_copyable_source(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, audio_only=True, audio_format='m4a')
+    opts = downloader._get_ydl_opts()
+    assert opts['format'] == 'bestaudio[acodec^=mp4a]/bestaudio/best'
+    assert opts['postprocessors'][0]['preferredcodec'] == 'm4a'
+
+    # Lossless targets always transcode, so any source will do
+    downloader = BingoDownloader(download_path=tmp_path, audio_only=True, audio_format='flac')
+    opts = downloader._get_ydl_opts()
+    assert opts['format'] == 'bestaudio/best'
+    assert opts['postprocessors'][0]['preferredquality'] is None
+
+
+def test_unknown_audio_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported audio format"):
+        BingoDownloader(download_path=tmp_path, audio_only=True, audio_format='wma')
+    assert 'best' in AUDIO_FORMATS
+
+
+def test_note_transcode_needs_every_codec(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, audio_only=True, audio_format='opus')
+    downloader._note_transcode([{'acodec': 'opus'}])
+    assert downloader.transcoded is False
+    downloader.transcoded = None
+    downloader._note_transcode([{'acodec': 'opus'}, {}])
+    assert downloader.transcoded is None
+    downloader._note_transcode([{'acodec': 'mp4a.40.2'}])
+    assert downloader.transcoded is True
+
+
+def test_smart_selection_prefers_matching_codec():
+    selector = SmartFormatSelector.__new__(SmartFormatSelector)
+    info = {'formats': [
+        {'format_id': '251', 'acodec': 'opus', 'vcodec': 'none', 'abr': 160},
+        {'format_id': '140', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 129},
+    ]}
+    assert selector._select_best_audio(info) == '251'
+    assert selector._select_best_audio(info, 'mp4a') == '140'
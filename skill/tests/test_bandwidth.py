@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-bucket bandwidth governor.
+
+Run with: pytest tests/test_bandwidth.py -v
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import (
+    BandwidthGovernor, SharedTokenBucket, TokenBucket,
+    parse_rate, parse_rate_schedule,
+)
+
+
+class _Task:
+    """Stand-in for a downloader (must be weak-referenceable)"""
+
+
+def test_parse_rate_units():
+    assert parse_rate('0') == 0
+    assert parse_rate('') == 0
+    assert parse_rate('500') == 500
+    assert parse_rate('500K') == 500 * 1024
+    assert parse_rate('2.5M') == int(2.5 * 1024 * 1024)
+    assert parse_rate('1GB/s') == 1024 ** 3
+    with pytest.raises(ValueError):
+        parse_rate('fast')
+
+
+def test_parse_rate_schedule():
+    assert parse_rate_schedule('00:00-07:00=0, 22:30-02:00=1M') == [
+        (0, 420, 0),
+        (22 * 60 + 30, 120, 1024 * 1024),
+    ]
+
+
+def test_token_bucket_allows_burst_then_delays():
+    bucket = TokenBucket(rate=1000, burst_seconds=1.0)
+    # One second worth of bytes passes without waiting
+    assert bucket.reserve(1000) == 0.0
+    # The next second's worth has to wait about a second
+    assert bucket.reserve(1000) == pytest.approx(1.0, abs=0.05)
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(rate=0)
+    assert bucket.reserve(10 ** 9) == 0.0
+
+
+def test_schedule_overrides_global_rate():
+    governor = BandwidthGovernor(
+        global_rate=100,
+        schedule=parse_rate_schedule('09:00-18:00=2M,23:00-06:00=0'),
+    )
+    assert governor.current_global_rate(datetime(2026, 1, 1, 12, 0)) == 2 * 1024 * 1024
+    assert governor.current_global_rate(datetime(2026, 1, 1, 2, 0)) == 0
+    assert governor.current_global_rate(datetime(2026, 1, 1, 20, 0)) == 100
+
+
+def test_throttle_sleeps_for_slowest_bucket(monkeypatch):
+    slept = []
+    monkeypatch.setattr('download.time.sleep', slept.append)
+    governor = BandwidthGovernor(global_rate=10_000, task_rate=1000,
+                                 platform_rates={'YouTube': 5000})
+    task = _Task()
+
+    governor.throttle(task, 'YouTube', 2000)
+    # The per-task bucket (1000 B/s, 1s burst) is the binding limit
+    assert slept == [pytest.approx(1.0, abs=0.05)]
+    stats = governor.stats()
+    assert stats['bytes_total'] == 2000
+    assert stats['active_tasks'] == 1
+
+
+def test_disabled_governor_is_noop(monkeypatch):
+    monkeypatch.setattr('download.time.sleep', lambda s: pytest.fail("should not sleep"))
+    governor = BandwidthGovernor()
+    assert not governor.enabled
+    governor.throttle(object(), 'YouTube', 10 ** 9)
+
+
+def test_shared_bucket_state_is_visible_across_instances(tmp_path):
+    pytest.importorskip("fcntl")
+    path = tmp_path / "bandwidth"
+    first = SharedTokenBucket(path, rate=1000)
+    second = SharedTokenBucket(path, rate=1000)
+    assert first.reserve(1000) == 0.0
+    # The other handle sees the budget already spent
+    assert second.reserve(1000) == pytest.approx(1.0, abs=0.05)
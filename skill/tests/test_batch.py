@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch loop shared by the rich and plain CLI output.
+
+Run with: pytest tests/test_batch.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import download
+from download import DownloaderContext, DownloadHistory, DownloadRetry, PostProcessJob, download_batch
+
+
+class _Downloader:
+    """Plays back the outcomes queued for each URL"""
+
+    def __init__(self, outcomes, created, **kwargs):
+        self.outcomes = outcomes
+        self.kwargs = kwargs
+        self.pending_postprocess = None
+        created.append(self)
+
+    def prefetch(self, urls):
+        pass
+
+    def download(self, url):
+        outcome = self.outcomes[url].pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == 'postprocess':
+            job = PostProcessJob([], [], priority=0)
+            job._finish(RuntimeError("ffmpeg not found"))
+            self.pending_postprocess = job
+
+
+@pytest.fixture
+def context(tmp_path):
+    return DownloaderContext(history=DownloadHistory(tmp_path / "history.db"), console=object())
+
+
+def test_retries_failures_and_postprocessing_are_counted(context):
+    outcomes = {
+        'https://a.example/1': [DownloadRetry(OSError("reset"), 0, 1), 'ok'],
+        'https://b.example/2': [RuntimeError("HTTP Error 404")],
+        'https://c.example/3': [SystemExit(1)],
+        'https://d.example/4': ['postprocess'],
+        'https://e.example/5': ['ok'],
+    }
+    created, lines = [], []
+    results = download_batch(
+        list(outcomes),
+        lambda **kwargs: _Downloader(outcomes, created, **kwargs),
+        context,
+        lambda text, style=None: lines.append((text, style)),
+    )
+
+    assert results == {'success': 2, 'failed': 3, 'skipped': 0}
+    # A deferred retry reuses the downloader and its attempt count
+    assert len(created) == 5
+    assert all(d.kwargs == {'list_formats': False, 'defer_retries': True} for d in created)
+    assert ("  ✗ Failed: HTTP Error 404\n", 'red') in lines
+    assert lines[-1] == ("  ✗ Post-processing failed: https://d.example/4: ffmpeg not found", 'red')
+
+
+class _Resource:
+    """Stands in for the fork server and the post-processing pool"""
+
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+        _Resource.instances.append(self)
+
+    @staticmethod
+    def available():
+        return True
+
+    def start(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("option", [["--fork-server"], ["--postprocess-pool", "2"]])
+def test_batch_releases_resources_on_error(monkeypatch, tmp_path, option):
+    batch = tmp_path / "urls.txt"
+    batch.write_text("https://a.example/1\n")
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    _Resource.instances = []
+    monkeypatch.setattr(download, "ForkServer", _Resource)
+    monkeypatch.setattr(download, "PostProcessPool", _Resource)
+    monkeypatch.setattr(download, "download_batch", interrupted)
+    monkeypatch.setattr(sys, "argv", ["download.py", "--batch", str(batch), "-p", str(tmp_path), *option])
+
+    with pytest.raises(KeyboardInterrupt):
+        download.main()
+
+    assert len(_Resource.instances) == 1
+    assert _Resource.instances[0].closed
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-platform circuit breaker.
+
+Run with: pytest tests/test_circuit_breaker.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import (
+    BingoDownloader, CircuitBreaker, CircuitOpenError, DownloadTimeout, SmartRetry, platform_key,
+)
+
+
+def tripped(platform='YouTube', **kwargs):
+    breaker = CircuitBreaker(min_requests=4, failure_rate=0.5, **kwargs)
+    for _ in range(4):
+        breaker.record_failure(platform)
+    return breaker
+
+
+def test_opens_at_failure_rate():
+    breaker = CircuitBreaker(min_requests=4, failure_rate=0.5)
+    for outcome in (True, False, True):
+        (breaker.record_success if outcome else breaker.record_failure)('YouTube')
+    assert breaker.stats()['YouTube']['state'] == 'closed'
+    breaker.record_failure('YouTube')
+    assert breaker.stats()['YouTube']['state'] == 'open'
+    assert not breaker.available('YouTube')
+
+
+def test_needs_minimum_requests():
+    breaker = CircuitBreaker(min_requests=4)
+    for _ in range(3):
+        breaker.record_failure('YouTube')
+    breaker.check('YouTube')
+
+
+def test_open_circuit_fails_fast():
+    breaker = tripped(open_seconds=60)
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.check('YouTube')
+    assert exc.value.retry_in == pytest.approx(60, abs=1)
+    assert breaker.stats()['YouTube']['rejected'] == 1
+    # Other platforms are unaffected
+    breaker.check('Bilibili')
+
+
+def test_half_open_allows_single_probe():
+    breaker = tripped(open_seconds=0)
+    assert breaker.available('YouTube')
+    breaker.check('YouTube')
+    breaker.open_seconds = 60
+    assert breaker.stats()['YouTube']['state'] == 'half_open'
+    assert not breaker.available('YouTube')
+    with pytest.raises(CircuitOpenError):
+        breaker.check('YouTube')
+
+
+def test_successful_probe_closes_circuit():
+    breaker = tripped(open_seconds=0)
+    breaker.check('YouTube')
+    breaker.open_seconds = 60
+    breaker.record_success('YouTube')
+    stats = breaker.stats()['YouTube']
+    assert stats['state'] == 'closed'
+    assert stats['failure_rate'] == 0.0
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = tripped(open_seconds=0)
+    breaker.check('YouTube')
+    breaker.open_seconds = 60
+    breaker.record_failure('YouTube')
+    stats = breaker.stats()['YouTube']
+    assert stats['state'] == 'open'
+    assert stats['opened'] == 2
+
+
+@pytest.mark.parametrize("error", [
+    OSError("HTTP Error 429: Too Many Requests"),
+    DownloadTimeout("deadline passed"),
+])
+def test_inconclusive_probe_reopens_circuit(tmp_path, error):
+    downloader = BingoDownloader(download_path=tmp_path)
+    breaker = downloader.breaker = tripped(downloader._platform_key, open_seconds=0)
+    breaker.check(downloader._platform_key)
+    breaker.open_seconds = 60
+    downloader._record_outcome(error)
+    stats = breaker.stats()[downloader._platform_key]
+    assert stats['state'] == 'open'
+    assert stats['opened'] == 2
+    assert stats['failure_rate'] == 0.0
+    assert breaker.retry_in(downloader._platform_key) == pytest.approx(60, abs=1)
+
+
+def test_unreported_probe_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('download.time.monotonic', lambda: now[0])
+    breaker = tripped(open_seconds=60)
+    now[0] += 60
+    breaker.check('YouTube')
+    assert not breaker.available('YouTube')
+    # Wake the scheduler when the probe expires, not in a busy loop
+    assert breaker.retry_in('YouTube') == 60
+    now[0] += 60
+    stats = breaker.stats()['YouTube']
+    assert stats['state'] == 'open'
+    assert stats['retry_in'] == 60
+    now[0] += 60
+    assert breaker.available('YouTube')
+    breaker.check('YouTube')
+
+
+def test_reset_closes_circuit():
+    breaker = tripped(open_seconds=60)
+    breaker.reset('YouTube')
+    breaker.check('YouTube')
+
+
+def test_smart_retry_does_not_retry_open_circuit(monkeypatch):
+    monkeypatch.setattr('download.time.sleep', lambda s: pytest.fail("should not sleep"))
+    calls = []
+
+    def blocked():
+        calls.append(1)
+        raise CircuitOpenError('YouTube', 30)
+
+    with pytest.raises(CircuitOpenError):
+        SmartRetry().execute_with_retry(blocked)
+    assert len(calls) == 1
+
+
+def test_unknown_sites_are_keyed_by_host():
+    assert platform_key('https://youtu.be/abc') == 'YouTube'
+    assert platform_key('https://www.example.com/video/1') == 'example.com'
+    assert platform_key('https://media.example.org/v') == 'media.example.org'
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-platform adaptive (AIMD) concurrency controller.
+
+Run with: pytest tests/test_concurrency.py -v
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError
+from yt_dlp.utils import DownloadError
+
+from download import (
+    AdaptiveConcurrency, SmartRetry, detect_platform,
+    is_throttling_error, retry_after_from_error,
+)
+
+
+def http_error(status, headers=None):
+    response = Response(io.BytesIO(b''), 'https://example.com', headers or {}, status=status)
+    return HTTPError(response)
+
+
+def wrapped(error):
+    """A DownloadError as raised by YoutubeDL.download()"""
+    return DownloadError(f'ERROR: {error}', (type(error), error, None))
+
+
+def test_throttling_errors_are_classified():
+    assert is_throttling_error(wrapped(http_error(429)))
+    assert is_throttling_error(wrapped(http_error(503)))
+    assert is_throttling_error(Exception('ERROR: unable to download: HTTP Error 429: Too Many Requests'))
+    assert not is_throttling_error(wrapped(http_error(404)))
+
+
+def test_retry_after_is_read_from_the_response():
+    assert retry_after_from_error(wrapped(http_error(429, {'Retry-After': '120'}))) == 120
+    assert retry_after_from_error(wrapped(http_error(429))) is None
+
+
+def test_throttle_halves_limit_and_cools_down():
+    controller = AdaptiveConcurrency(initial=4, cooldown=30)
+    controller.record_throttle('YouTube')
+    stats = controller.stats()['YouTube']
+    assert stats['limit'] == 2
+    assert stats['cooldown'] == pytest.approx(30, abs=1)
+    assert not controller.try_acquire('YouTube')
+    # Other platforms are unaffected
+    assert controller.try_acquire('Bilibili')
+
+
+def test_one_decrease_per_throttling_episode():
+    controller = AdaptiveConcurrency(initial=8)
+    controller.record_throttle('YouTube', retry_after=60)
+    controller.record_throttle('YouTube', retry_after=5)
+    stats = controller.stats()['YouTube']
+    assert stats['limit'] == 4
+    assert stats['throttled'] == 1
+    # The longer Retry-After wins
+    assert stats['cooldown'] == pytest.approx(60, abs=1)
+
+
+def test_limit_never_drops_below_minimum():
+    controller = AdaptiveConcurrency(initial=1, min_limit=1)
+    controller.record_throttle('YouTube', retry_after=0)
+    assert controller.stats()['YouTube']['limit'] == 1
+
+
+def test_sustained_success_raises_limit_additively():
+    controller = AdaptiveConcurrency(initial=2, max_limit=3)
+    controller.record_success('YouTube')
+    assert controller.stats()['YouTube']['limit'] == 2
+    # About one step per window of `limit` successes
+    for _ in range(2):
+        controller.record_success('YouTube')
+    assert controller.stats()['YouTube']['limit'] == 3
+    for _ in range(10):
+        controller.record_success('YouTube')
+    assert controller.stats()['YouTube']['limit'] == 3
+
+
+def test_try_acquire_respects_limit():
+    controller = AdaptiveConcurrency(initial=2)
+    assert controller.try_acquire('YouTube')
+    assert controller.try_acquire('YouTube')
+    assert not controller.try_acquire('YouTube')
+    controller.release('YouTube')
+    assert controller.try_acquire('YouTube')
+
+
+def test_iter_ready_defers_cooling_platform():
+    controller = AdaptiveConcurrency()
+    controller.record_throttle('YouTube', retry_after=0.2)
+    urls = ['https://youtu.be/a', 'https://www.bilibili.com/video/b', 'https://youtu.be/c']
+    order = list(controller.iter_ready(urls, detect_platform))
+    assert order == ['https://www.bilibili.com/video/b', 'https://youtu.be/a', 'https://youtu.be/c']
+    assert controller.stats()['YouTube']['running'] == 0
+
+
+def test_smart_retry_waits_for_retry_after(monkeypatch):
+    slept = []
+    monkeypatch.setattr('download.time.sleep', slept.append)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise wrapped(http_error(429, {'Retry-After': '90'}))
+        return 'ok'
+
+    assert SmartRetry(initial_delay=5).execute_with_retry(flaky) == 'ok'
+    assert slept == [90]
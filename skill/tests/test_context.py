@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-wide DownloaderContext.
+
+Run with: pytest tests/test_context.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import download
+from download import BingoDownloader, DownloaderContext, DownloadHistory
+
+
+@pytest.fixture
+def context(tmp_path):
+    return DownloaderContext(history=DownloadHistory(tmp_path / "history.db"), console=object())
+
+
+def test_downloaders_share_context_resources(context, tmp_path):
+    first = BingoDownloader(download_path=tmp_path, context=context)
+    second = BingoDownloader(download_path=tmp_path, audio_only=True, context=context)
+    assert first.history is second.history is context.history
+    assert first.preferences is second.preferences is context.preferences
+    assert first.retry_manager is second.retry_manager is context.retry_manager
+    assert first.console is context.console
+
+
+def test_default_context_is_a_singleton(monkeypatch, tmp_path):
+    monkeypatch.setattr(DownloaderContext, "_default", None)
+    monkeypatch.setattr(download.Path, "home", lambda: tmp_path)
+    assert DownloaderContext.default() is DownloaderContext.default()
+    downloader = BingoDownloader(download_path=tmp_path)
+    assert downloader.context is DownloaderContext.default()
+
+
+def test_derive_overrides_single_resource(context, tmp_path):
+    history = DownloadHistory(tmp_path / "other.db")
+    derived = context.derive(history=history)
+    assert derived.history is history
+    assert derived.preferences is context.preferences
+    assert derived.retry_manager is context.retry_manager
+
+
+def test_derive_rejects_unknown_resources(context):
+    with pytest.raises(TypeError):
+        context.derive(cache={})
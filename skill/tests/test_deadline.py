@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for download deadlines and maximum durations.
+
+Run with: pytest tests/test_deadline.py -v
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import BingoDownloader, DownloadTimeout, classify_error, parse_deadline
+
+
+def test_parse_deadline_clock_time_rolls_over_to_tomorrow():
+    now = datetime(2026, 1, 1, 22, 0)
+    assert parse_deadline('23:30', now) == datetime(2026, 1, 1, 23, 30).timestamp()
+    assert parse_deadline('07:00', now) == datetime(2026, 1, 2, 7, 0).timestamp()
+
+
+def test_parse_deadline_iso():
+    assert parse_deadline('2026-01-01T08:00') == datetime(2026, 1, 1, 8, 0).timestamp()
+    with pytest.raises(ValueError):
+        parse_deadline('tomorrow')
+
+
+def test_progress_hook_stops_download_past_deadline(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, deadline=time.time() - 1)
+    downloader._expires_at = downloader.deadline
+    with pytest.raises(DownloadTimeout, match="Deadline"):
+        downloader._progress_hook({'status': 'downloading', 'downloaded_bytes': 1})
+
+
+def test_abort_stops_download(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path)
+    downloader._progress_hook({'status': 'finished'})
+    downloader.abort("Download timed out")
+    with pytest.raises(DownloadTimeout, match="timed out") as exc:
+        downloader._progress_hook({'status': 'downloading', 'downloaded_bytes': 1})
+    # Running out of time is never retried
+    assert classify_error(exc.value) == 'fatal'
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the fork server and running batch downloads in forked children.
+
+Run with: pytest tests/test_fork_server.py -v
+"""
+
+import os
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import BingoDownloader, DownloadRetry, FeedbackRelay, ForkServer
+
+pytestmark = pytest.mark.skipif(not ForkServer.available(), reason="fork server needs fork()")
+
+
+def _loaded(emit, name):
+    emit({'event': 'progress', 'pid': os.getpid()})
+    return name in sys.modules
+
+
+def _fail(emit):
+    raise ValueError("bad input")
+
+
+def _die(emit):
+    os._exit(3)
+
+
+@pytest.fixture(scope="module")
+def fork_server():
+    server = ForkServer()
+    server.start()
+    yield server
+    server.close()
+
+
+def test_children_start_with_preloaded_modules(fork_server):
+    events = []
+    assert fork_server.run(_loaded, 'yt_dlp.extractor.extractors', on_event=events.append) is True
+    assert fork_server.run(_loaded, 'download') is True
+    # Each job gets its own process
+    assert events[0]['pid'] != os.getpid()
+    stats = fork_server.stats()
+    assert stats['forks'] == stats['jobs'] == 2
+    assert stats['startup_ms'] is not None
+
+
+def test_errors_and_crashes_fail_only_the_job(fork_server):
+    with pytest.raises(RuntimeError, match="ValueError: bad input"):
+        fork_server.run(_fail)
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        fork_server.run(_die)
+    stats = fork_server.stats()
+    assert stats['failed'] == 1
+    assert stats['crashed'] == 1
+    # The zygote keeps serving
+    assert fork_server.run(_loaded, 'yt_dlp') is True
+
+
+def test_feedback_replay_only_accepts_record_calls():
+    concurrency = Mock()
+    controllers = {'concurrency': concurrency}
+    assert FeedbackRelay.replay(
+        {'event': 'feedback', 'controller': 'concurrency', 'method': 'record_throttle', 'args': ['YouTube', 30]},
+        controllers,
+    )
+    assert not FeedbackRelay.replay(
+        {'event': 'feedback', 'controller': 'concurrency', 'method': 'reset', 'args': []}, controllers
+    )
+    concurrency.record_throttle.assert_called_once_with('YouTube', 30)
+    concurrency.reset.assert_not_called()
+
+
+class _FakeForkServer:
+    """Returns a fixed outcome after replaying events"""
+
+    def __init__(self, outcome, events=()):
+        self.outcome = outcome
+        self.events = events
+        self.calls = []
+
+    def run(self, target, *args, on_event=None):
+        self.calls.append(args)
+        for event in self.events:
+            on_event(event)
+        return self.outcome
+
+
+def test_download_forked_mirrors_deferred_retries(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, quality=720, interactive=False, defer_retries=True)
+    downloader.breaker = Mock()
+    server = _FakeForkServer(
+        {'status': 'retry', 'error': 'HTTP Error 503', 'delay': 4, 'attempt': 1},
+        events=[{'event': 'feedback', 'controller': 'breaker', 'method': 'record_failure', 'args': ['youtube']}],
+    )
+    with pytest.raises(DownloadRetry) as excinfo:
+        downloader.download_forked(server, "https://example.com/v", {'watchdog': {'timeout': 5}})
+    assert excinfo.value.delay == 4
+    assert downloader.attempt == 1
+    downloader.breaker.record_failure.assert_called_once_with('youtube')
+
+    options, context_options, url, attempt = server.calls[0]
+    assert options['quality'] == 720 and options['download_path'] == str(tmp_path)
+    assert context_options == {'watchdog': {'timeout': 5}}
+    assert attempt == 0
+
+    with pytest.raises(RuntimeError, match="Download failed"):
+        downloader.download_forked(_FakeForkServer({'status': 'failed', 'error': 'Download failed'}), "u")
+    result = {'success': True, 'files': ['a.mp4']}
+    assert downloader.download_forked(_FakeForkServer({'status': 'success', 'result': result}), "u") == result
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the staged extract → download → post-process → record pipeline.
+
+Run with: pytest tests/test_pipeline.py -v
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import DownloadPipeline, download_batch_pipelined
+
+
+def _fake_pipeline(delays, **kwargs):
+    """Pipeline whose stages sleep instead of calling yt-dlp, logging (stage, url, start, end)"""
+    pipeline = DownloadPipeline(**kwargs)
+    log = []
+    lock = threading.Lock()
+
+    def make_handler(name):
+        def handler(job):
+            started = time.monotonic()
+            time.sleep(delays.get(name, 0))
+            if name == 'download' and 'bad' in job.url:
+                raise OSError("connection reset")
+            if name == 'postprocess':
+                job.files = [job.url + '.mp4']
+            with lock:
+                log.append((name, job.url, started, time.monotonic()))
+        return handler
+
+    for name, stage in pipeline.stages.items():
+        stage.handler = make_handler(name)
+    return pipeline, log
+
+
+def test_stages_overlap_across_items():
+    pipeline, log = _fake_pipeline(
+        {'extract': 0.1, 'download': 0.1, 'postprocess': 0.1},
+        extract_workers=1, download_workers=1, postprocess_workers=1,
+    )
+    started = time.monotonic()
+    jobs = [pipeline.submit(object(), f"u{i}") for i in range(4)]
+    assert [job.wait() for job in jobs] == [[f"u{i}.mp4"] for i in range(4)]
+    elapsed = time.monotonic() - started
+    pipeline.close()
+
+    # Serial: 4 × 0.3s; pipelined: fill (0.3s) + one stage per further item
+    assert elapsed < 0.9
+    spans = {(name, url): (start, end) for name, url, start, end in log}
+    # u1 was extracted while u0 was downloading
+    assert spans[('extract', 'u1')][0] < spans[('download', 'u0')][1]
+
+
+def test_stage_error_finishes_job_and_skips_later_stages():
+    pipeline, log = _fake_pipeline({})
+    job = pipeline.submit(object(), "bad")
+    with pytest.raises(OSError):
+        job.wait()
+    pipeline.close()
+    assert [name for name, *_ in log] == ['extract']
+    stats = pipeline.stats()
+    assert stats['download']['failed'] == 1
+    assert stats['postprocess']['processed'] == 0
+
+
+def test_full_queue_blocks_previous_stage():
+    pipeline, _ = _fake_pipeline(
+        {'download': 0.3},
+        extract_workers=1, download_workers=1, postprocess_workers=1, queue_size=1,
+    )
+    submitter = threading.Thread(
+        target=lambda: [pipeline.submit(object(), f"u{i}") for i in range(6)], daemon=True
+    )
+    submitter.start()
+    time.sleep(0.15)
+    stats = pipeline.stats()
+    # One downloading, one waiting in front of download, one extracted and
+    # blocked on the full download queue, one waiting in front of extract
+    assert stats['download']['busy'] == 1
+    assert stats['download']['queued'] == 1
+    assert stats['extract']['queued'] == 1
+    assert submitter.is_alive()
+    submitter.join(timeout=5)
+    pipeline.close()
+
+
+def test_stats_report_utilisation():
+    pipeline, _ = _fake_pipeline({'download': 0.1}, download_workers=1)
+    for job in [pipeline.submit(object(), f"u{i}") for i in range(3)]:
+        job.wait()
+    pipeline.close()
+    download = pipeline.stats()['download']
+    assert download['processed'] == 3
+    assert download['avg_seconds'] == pytest.approx(0.1, abs=0.05)
+    assert 0 < download['utilization'] <= 1
+    assert pipeline.capacity == sum(s['workers'] + s['queue_size'] for s in pipeline.stats().values())
+
+
+def test_batch_yields_each_url_once():
+    pipeline, _ = _fake_pipeline({'download': 0.05})
+
+    class _Downloader:
+        def download(self, url):
+            return pipeline.run(self, url)
+
+    urls = ["u0", "bad", "u2"]
+    results = dict(download_batch_pipelined(urls, _Downloader, pipeline))
+    pipeline.close()
+    assert set(results) == set(urls)
+    assert results["u0"] is None and results["u2"] is None
+    assert results["bad"] == "connection reset"
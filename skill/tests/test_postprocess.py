@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the post-processing pool that runs ffmpeg work apart from downloads.
+
+Run with: pytest tests/test_postprocess.py -v
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import BingoDownloader, DownloaderContext, DownloadHistory, PostProcessPool
+
+
+class _GatedExecutor:
+    """Runs submitted calls in this process once the gate opens, logging the order"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.order = []
+
+    def submit(self, fn, postprocessors, downloads):
+        future = Future()
+        self.gate.wait(5)
+        self.order.append(downloads[0]['id'])
+        future.set_result([{**d, 'filepath': d['filepath'] + '.mp3'} for d in downloads])
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@pytest.fixture
+def gated_pool(monkeypatch):
+    pool = PostProcessPool(workers=1)
+    executor = _GatedExecutor()
+    monkeypatch.setattr(pool, '_get_executor', lambda: executor)
+    yield pool, executor
+    executor.gate.set()
+    pool.close()
+
+
+def _download(name):
+    return {'id': name, 'title': name, 'filepath': f'/tmp/{name}.webm'}
+
+
+def test_queue_is_ordered_by_priority_then_submission(gated_pool):
+    pool, executor = gated_pool
+    # The first job occupies the only worker while the rest queue up
+    jobs = [pool.submit([], [_download('first')], priority=1)]
+    deadline = time.monotonic() + 5
+    while pool.stats()['busy'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    jobs += [pool.submit([], [_download(name)], priority=priority)
+             for name, priority in [('bulk1', 1), ('bulk2', 1), ('interactive', 0)]]
+
+    stats = pool.stats()
+    assert stats['busy'] == 1
+    assert stats['queued'] == 3
+    assert stats['queued_by_priority'] == {0: 1, 1: 2}
+
+    executor.gate.set()
+    assert [job.wait(5) for job in jobs][0] == ['/tmp/first.webm.mp3']
+    assert executor.order == ['first', 'interactive', 'bulk1', 'bulk2']
+    stats = pool.stats()
+    assert stats['processed'] == 4
+    assert stats['peak_queued'] == 3
+    assert stats['avg_wait_seconds'] >= 0
+
+
+def test_postprocessors_run_in_worker_process(tmp_path):
+    media = tmp_path / "clip.mp4"
+    media.write_bytes(b"data")
+    pool = PostProcessPool(workers=1)
+    try:
+        job = pool.submit([{'key': 'Exec', 'exec_cmd': 'touch {}.done', 'when': 'post_process'}],
+                          [{'id': 'clip', 'title': 'clip', 'ext': 'mp4', 'filepath': str(media)}])
+        assert job.wait(60) == [str(media)]
+    finally:
+        pool.close()
+    assert (tmp_path / "clip.mp4.done").exists()
+    assert pool.stats()['processed'] == 1
+
+
+def test_download_returns_before_postprocessing(gated_pool, tmp_path, monkeypatch):
+    pool, executor = gated_pool
+    context = DownloaderContext(history=DownloadHistory(tmp_path / "history.db"),
+                                postprocessing=pool, console=object())
+    downloader = BingoDownloader(download_path=tmp_path, audio_only=True, context=context, interactive=False)
+    downloaded = tmp_path / "clip.webm"
+    downloaded.write_bytes(b"audio")
+    files = []
+    downloader.on_file = files.append
+    monkeypatch.setattr('download.RICH_AVAILABLE', False)
+
+    def fake_download(ydl, url, info):
+        # The download itself runs without the ffmpeg post-processors
+        assert not ydl.params.get('postprocessors')
+        return {'id': 'clip', 'title': 'clip', 'ext': 'webm', 'filepath': str(downloaded)}
+
+    monkeypatch.setattr(downloader, '_download_info', fake_download)
+    result = downloader.download("https://example.com/clip.webm")
+
+    assert result['postprocessing'] is True
+    assert result['filepath'] == str(downloaded)
+    job = downloader.pending_postprocess
+    assert not job.done() and files == []
+
+    executor.gate.set()
+    assert job.wait(5) == [str(downloaded) + '.mp3']
+    assert files == [str(downloaded) + '.mp3']
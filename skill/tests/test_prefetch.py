@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the metadata prefetcher and signed URL expiry detection.
+
+Run with: pytest tests/test_prefetch.py -v
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import MetadataPrefetcher, info_expiry, signed_url_expiry
+
+
+def _info(url, title="clip"):
+    return {
+        'id': url.rsplit('/', 1)[-1],
+        'title': title,
+        'url': url,
+        'ext': 'mp4',
+        'heatmap': [{'start_time': i, 'value': 0.5} for i in range(100)],
+    }
+
+
+def test_signed_url_expiry_formats():
+    assert signed_url_expiry("https://r1.googlevideo.com/videoplayback?expire=1790000000&ei=x") == 1790000000
+    assert signed_url_expiry("https://d1.cloudfront.net/v.mp4?Expires=1790000000&Signature=abc") == 1790000000
+    assert signed_url_expiry("https://cdn.example/hls/exp=1790000000~acl=/*~hmac=ff/index.m3u8") == 1790000000
+    assert signed_url_expiry("https://manifest.googlevideo.com/api/manifest/dash/expire/1790000000/ei/x") == 1790000000
+    assert signed_url_expiry(
+        "https://bucket.s3.amazonaws.com/v.mp4?X-Amz-Date=20260101T000000Z&X-Amz-Expires=3600&X-Amz-Signature=ab"
+    ) == 1767225600 + 3600
+    assert signed_url_expiry("https://example.com/video.mp4?id=17900000001") is None
+
+
+def test_info_expiry_uses_earliest_format():
+    info = {
+        'url': "https://cdn.example/v.mp4",
+        'formats': [
+            {'url': "https://cdn.example/a?expire=1790000500"},
+            {'url': "https://cdn.example/b?expire=1790000000"},
+            {'url': "https://cdn.example/c"},
+        ],
+    }
+    assert info_expiry(info) == 1790000000
+    assert info_expiry({'url': "https://cdn.example/v.mp4"}) is None
+
+
+def test_take_returns_compact_copy_once():
+    prefetcher = MetadataPrefetcher(depth=2)
+    prefetcher.schedule(["u1", "u2", "u3"], _info)
+    # Let the background extractions finish so u2 is counted as cached
+    time.sleep(0.1)
+
+    info = prefetcher.take("u1")
+    assert info['title'] == "clip"
+    # Fields downloads never use are not cached
+    assert 'heatmap' not in info
+    # A result is only used once; u3 was beyond the depth
+    assert prefetcher.take("u1") is None
+    assert prefetcher.take("u3") is None
+    stats = prefetcher.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['cached'] == 1
+    assert stats['cached_bytes'] > 0
+
+
+def test_take_waits_for_extraction_in_flight():
+    release = threading.Event()
+
+    def slow_extract(url):
+        release.wait(5)
+        return _info(url)
+
+    prefetcher = MetadataPrefetcher()
+    prefetcher.schedule(["u1"], slow_extract)
+    threading.Timer(0.1, release.set).start()
+    assert prefetcher.take("u1")['id'] == "u1"
+
+
+def test_expiring_signed_urls_are_invalidated():
+    soon = int(time.time()) + 60
+    later = int(time.time()) + 6 * 3600
+    prefetcher = MetadataPrefetcher(expiry_margin=300)
+    prefetcher.schedule([f"https://cdn.example/a?expire={soon}", f"https://cdn.example/b?expire={later}"], _info)
+
+    assert prefetcher.take(f"https://cdn.example/a?expire={soon}") is None
+    assert prefetcher.take(f"https://cdn.example/b?expire={later}") is not None
+    assert prefetcher.stats()['expired'] == 1
+
+
+def test_old_results_are_invalidated(monkeypatch):
+    prefetcher = MetadataPrefetcher(max_age=10)
+    prefetcher.schedule(["u1"], _info)
+    # Let the background extraction finish before moving the clock
+    time.sleep(0.1)
+    now = time.time()
+    monkeypatch.setattr('download.time.time', lambda: now + 60)
+    assert prefetcher.take("u1") is None
+    assert prefetcher.stats()['expired'] == 1
+
+
+def test_failed_extraction_falls_back():
+    def broken(url):
+        raise OSError("boom")
+
+    prefetcher = MetadataPrefetcher()
+    prefetcher.schedule(["u1"], broken)
+    assert prefetcher.take("u1") is None
+    assert prefetcher.stats()['errors'] == 1
+
+
+class _FakeYDL:
+    """Records which playlist entries were extracted and which were served from the cache"""
+
+    def __init__(self):
+        self.extracted = []
+        self.processed = []
+
+    def extract_info(self, url, download=True, ie_key=None, extra_info=None,
+                     process=True, force_generic_extractor=False):
+        self.extracted.append(url)
+        return _info(url)
+
+    def process_ie_result(self, info, download=True, extra_info=None):
+        self.processed.append((info['url'], extra_info))
+        return info
+
+
+def test_serve_prefetches_following_playlist_entries():
+    entries = ["e1", "e2", "e3", "e4"]
+    ydl = _FakeYDL()
+    prefetcher = MetadataPrefetcher(depth=1)
+    with prefetcher.serve(ydl, entries, _info):
+        for i, url in enumerate(entries, 1):
+            ydl.extract_info(url, True, extra_info={'playlist_index': i})
+            time.sleep(0.05)
+    # Only the first entry is extracted by yt-dlp itself
+    assert ydl.extracted == ["e1"]
+    assert ydl.processed == [(url, {'playlist_index': i}) for i, url in enumerate(entries[1:], 2)]
+    # The instance is restored afterwards
+    assert 'extract_info' not in vars(ydl)
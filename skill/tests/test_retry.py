@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for error classification, jittered backoff, the retry budget and
+deferred retries.
+
+Run with: pytest tests/test_retry.py -v
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+from yt_dlp.utils import DownloadError, ExtractorError
+
+from download import (
+    AdaptiveConcurrency, BatchQueue, CircuitOpenError, RetryBudget, SmartRetry,
+    classify_error,
+)
+
+
+def download_error(error):
+    """A DownloadError as raised by YoutubeDL.download()"""
+    return DownloadError(f'ERROR: {error}', (type(error), error, None))
+
+
+def http_error(status):
+    return HTTPError(Response(io.BytesIO(b''), 'https://example.com', {}, status=status))
+
+
+class TestClassification:
+
+    def test_status_codes(self):
+        assert classify_error(download_error(http_error(429))) == 'throttled'
+        assert classify_error(download_error(http_error(502))) == 'transient'
+        assert classify_error(download_error(http_error(404))) == 'fatal'
+        assert classify_error(download_error(http_error(403))) == 'fatal'
+
+    def test_network_errors_are_transient(self):
+        assert classify_error(download_error(TransportError('connection reset'))) == 'transient'
+        assert classify_error(TimeoutError('read timed out')) == 'transient'
+
+    def test_cause_of_extractor_error_is_used(self):
+        error = ExtractorError('Unable to download webpage', cause=http_error(500))
+        assert classify_error(download_error(error)) == 'transient'
+
+    def test_unknown_errors_are_fatal(self):
+        # No longer matched by substring ("unable to download ...")
+        assert classify_error(download_error(ExtractorError('unable to download: video is private', expected=True))) == 'fatal'
+        assert classify_error(CircuitOpenError('YouTube', 30)) == 'fatal'
+
+
+class TestBackoff:
+
+    def test_full_jitter_stays_under_cap(self):
+        retry = SmartRetry(initial_delay=5, backoff_multiplier=2, max_delay=12)
+        delays = [retry.backoff(3) for _ in range(200)]
+        assert all(0 <= d <= 12 for d in delays)
+        # Spread out rather than all equal
+        assert max(delays) - min(delays) > 1
+
+    def test_retry_delay_decisions(self):
+        retry = SmartRetry(max_attempts=3)
+        transient = download_error(http_error(502))
+        assert retry.retry_delay(transient, 1) is not None
+        assert retry.retry_delay(transient, 3) is None
+        assert retry.retry_delay(download_error(http_error(404)), 1) is None
+
+
+class TestRetryBudget:
+
+    def test_ratio_limits_retries(self):
+        budget = RetryBudget(ratio=0.2, min_retries=0)
+        for _ in range(10):
+            budget.record_attempt()
+        assert budget.try_spend()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        assert budget.stats()['denied'] == 1
+
+    def test_minimum_allows_retries_at_low_volume(self):
+        budget = RetryBudget(ratio=0.2, min_retries=2)
+        budget.record_attempt()
+        assert budget.try_spend()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+
+    def test_exhausted_budget_stops_retrying(self):
+        retry = SmartRetry(budget=RetryBudget(ratio=0, min_retries=0))
+        assert retry.retry_delay(download_error(http_error(502)), 1) is None
+
+
+class TestBatchQueue:
+
+    def test_deferred_item_does_not_block_others(self):
+        queue = BatchQueue(['a', 'b', 'c'], AdaptiveConcurrency(), lambda item: 'Site')
+        order = []
+        started = time.monotonic()
+        for item in queue:
+            order.append(item)
+            if item == 'a' and order.count('a') == 1:
+                queue.defer('a', 0.2)
+        assert order == ['a', 'b', 'c', 'a']
+        assert time.monotonic() - started >= 0.2
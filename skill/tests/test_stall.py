@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the stall watchdog.
+
+Run with: pytest tests/test_stall.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+yt_dlp = pytest.importorskip("yt_dlp")
+
+from download import DownloadStalled, StallWatchdog, classify_error
+
+
+class _Task:
+    """Stand-in for a downloader (must be weak-referenceable)"""
+
+
+def _feed(watchdog, task, samples, key='video.mp4.part'):
+    for now, downloaded in samples:
+        watchdog.sample(task, 'YouTube', key, downloaded, now)
+
+
+def test_healthy_download_is_left_alone():
+    watchdog = StallWatchdog(min_speed=1000, window=10, timeout=30)
+    task = _Task()
+    _feed(watchdog, task, [(t, t * 5000) for t in range(0, 60)])
+    assert watchdog.stats()['stalls'] == 0
+
+
+def test_slow_download_is_restarted_after_window():
+    watchdog = StallWatchdog(min_speed=1000, window=10, timeout=0)
+    task = _Task()
+    # Fast start, then a trickle of 100 B/s
+    _feed(watchdog, task, [(0, 0), (1, 50_000)])
+    with pytest.raises(yt_dlp.utils.ReExtractInfo):
+        _feed(watchdog, task, [(1 + t, 50_000 + t * 100) for t in range(1, 20)])
+    stats = watchdog.stats()
+    assert stats['stalls'] == 1
+    assert stats['restarts'] == 1
+
+
+def test_no_data_timeout():
+    watchdog = StallWatchdog(min_speed=0, window=10, timeout=30)
+    task = _Task()
+    _feed(watchdog, task, [(0, 1000), (10, 1000), (29, 1000)])
+    with pytest.raises(yt_dlp.utils.ReExtractInfo, match="no data for 30s"):
+        _feed(watchdog, task, [(30, 1000)])
+
+
+def test_gives_up_after_max_restarts():
+    watchdog = StallWatchdog(min_speed=0, timeout=5, max_restarts=1)
+    task = _Task()
+    with pytest.raises(yt_dlp.utils.ReExtractInfo):
+        _feed(watchdog, task, [(0, 10), (5, 10)])
+    # The restarted transfer gets a fresh grace period
+    _feed(watchdog, task, [(6, 10), (10, 10)])
+    with pytest.raises(DownloadStalled) as exc:
+        _feed(watchdog, task, [(11, 10)])
+    # Handed to the retry policy as a transient network error
+    assert classify_error(exc.value) == 'transient'
+    assert watchdog.stats()['gave_up'] == 1
+
+
+def test_recovery_is_counted_on_success():
+    watchdog = StallWatchdog(min_speed=0, timeout=5)
+    task = _Task()
+    watchdog.begin(task)
+    with pytest.raises(yt_dlp.utils.ReExtractInfo):
+        _feed(watchdog, task, [(0, 10), (5, 10)])
+    assert watchdog.finish(task, 'YouTube', success=True) == 1
+    platform = watchdog.stats()['platforms']['YouTube']
+    assert platform == {'stalls': 1, 'restarts': 1, 'recovered': 1, 'gave_up': 0}
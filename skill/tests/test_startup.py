@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Startup regression tests for download.py.
+
+History, stats and preset commands must not import yt-dlp.
+
+Run with: pytest tests/test_startup.py -v
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "download.py"
+
+
+def imported_modules(args, home):
+    """Run download.py under -X importtime and return imported module names."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(SCRIPT), *args],
+        capture_output=True, text=True, env={"HOME": str(home), "PATH": ""},
+    )
+    return {
+        line.split("|")[-1].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize("args", [["--stats"], ["--history"], ["--list-presets"]])
+def test_commands_do_not_import_yt_dlp(args, tmp_path):
+    """Test that non-download commands stay lazy."""
+    modules = imported_modules(args, tmp_path)
+    assert "yt_dlp" not in modules
+    assert "rich.progress" not in modules
+
+
+def test_yt_dlp_loaded_on_first_use():
+    """Test that the lazy proxy resolves to the real module."""
+    sys.path.insert(0, str(SCRIPT.parent))
+    try:
+        import download
+    except ImportError:
+        pytest.skip("download.py dependencies not available")
+    assert download.yt_dlp.YoutubeDL is not None
+    assert "yt_dlp" in sys.modules
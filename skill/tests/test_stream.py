@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for resolving formats that can be relayed without staging on disk.
+
+Run with: pytest tests/test_stream.py -v
+"""
+
+import contextlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from download import BingoDownloader, DownloaderContext, DownloadHistory
+
+
+class FakePool:
+    """Stands in for YoutubeDLPool: every checkout extracts the given info"""
+
+    def __init__(self, info):
+        self.info = info
+        self.opts = []
+
+    @contextlib.contextmanager
+    def checkout(self, opts):
+        self.opts.append(opts)
+        ydl = type("FakeYDL", (), {"extract_info": lambda _, url, download: self.info})()
+        yield ydl
+
+
+def make_downloader(tmp_path, info, **kwargs):
+    context = DownloaderContext(
+        history=DownloadHistory(tmp_path / "history.db"),
+        ydl_pool=FakePool(info),
+        console=object(),
+    )
+    return BingoDownloader(download_path=tmp_path, context=context, **kwargs)
+
+
+PROGRESSIVE = {
+    "id": "abc", "title": "Clip", "ext": "mp4", "protocol": "https",
+    "url": "https://cdn.example/clip.mp4", "http_headers": {"User-Agent": "x"}, "filesize": 10,
+}
+
+
+def test_single_http_format_is_streamable(tmp_path):
+    downloader = make_downloader(tmp_path, PROGRESSIVE, quality=720)
+    stream_format = downloader.resolve_stream_format("https://youtu.be/abc")
+    assert stream_format["url"] == PROGRESSIVE["url"]
+    assert stream_format["http_headers"] == {"User-Agent": "x"}
+    assert stream_format["platform"] == "YouTube"
+    # Uses the same format policy as a regular download
+    assert downloader.ydl_pool.opts[0]["format"] == downloader._get_ydl_opts()["format"]
+
+
+@pytest.mark.parametrize("info", [
+    {**PROGRESSIVE, "requested_formats": [{}, {}]},
+    {**PROGRESSIVE, "protocol": "m3u8_native"},
+    {"_type": "playlist", "entries": []},
+])
+def test_merge_fragments_and_playlists_need_staging(tmp_path, info):
+    downloader = make_downloader(tmp_path, info)
+    assert downloader.resolve_stream_format("https://youtu.be/abc") is None
+
+
+def test_post_processing_needs_staging(tmp_path):
+    downloader = make_downloader(tmp_path, PROGRESSIVE, audio_only=True)
+    assert downloader.resolve_stream_format("https://youtu.be/abc") is None
+    assert downloader.ydl_pool.opts == []
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for targeted subtitle selection and concurrent subtitle fetching.
+
+Run with: pytest tests/test_subtitles.py -v
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import BingoDownloader, select_subtitles
+
+
+def _track(lang, *exts):
+    return [{'ext': ext, 'url': f"https://subs.example/{lang}.{ext}"} for ext in exts]
+
+
+INFO = {
+    'id': 'v1',
+    'title': 'clip',
+    'ext': 'mp4',
+    'language': 'ja',
+    'subtitles': {'en-US': _track('en-US', 'json3', 'vtt'), 'zh-Hans': _track('zh-Hans', 'srv3')},
+    'automatic_captions': {
+        'en': _track('en-auto', 'vtt'),
+        'ja-orig': _track('ja-orig', 'vtt'),
+        'ja': _track('ja', 'vtt'),
+        'fr': _track('fr', 'vtt'),
+    },
+}
+
+
+def test_manual_subtitles_win_and_only_requested_languages_are_selected():
+    selected = select_subtitles(INFO, ['en', 'zh'])
+    assert set(selected) == {'en-US', 'zh-Hans'}
+    # A common format is preferred, otherwise the last (best) one
+    assert selected['en-US']['ext'] == 'vtt'
+    assert selected['zh-Hans']['ext'] == 'srv3'
+    assert not selected['en-US']['automatic']
+
+
+def test_automatic_captions_fill_missing_languages():
+    selected = select_subtitles(INFO, ['fr'])
+    assert list(selected) == ['fr']
+    assert selected['fr']['automatic']
+
+
+def test_original_language_fallback():
+    assert list(select_subtitles(INFO, ['de'])) == ['ja']
+    no_language = {**INFO, 'language': None}
+    assert list(select_subtitles(no_language, ['de'])) == ['ja-orig']
+    assert select_subtitles({'subtitles': {}, 'automatic_captions': {}}, ['en']) == {}
+
+
+def test_ydl_opts_no_longer_request_every_track(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, subtitles=True, sub_langs=['en'])
+    opts = downloader._get_ydl_opts()
+    assert not opts.get('writesubtitles') and not opts.get('writeautomaticsub')
+    assert opts['subtitleslangs'] == ['en']
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+
+    def read(self):
+        return self.body
+
+    def close(self):
+        pass
+
+
+class _FakeYDL:
+    """Serves each subtitle after a delay, recording the peak number in flight"""
+
+    def __init__(self, tmp_path, fail=()):
+        self.tmp_path = tmp_path
+        self.fail = fail
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def prepare_filename(self, info, dir_type=''):
+        return str(self.tmp_path / f"{info['title']}.{info['ext']}")
+
+    def urlopen(self, request):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+        if any(lang in request.url for lang in self.fail):
+            raise OSError("HTTP Error 429: Too Many Requests")
+        return _Response(b"WEBVTT\n")
+
+
+def test_tracks_are_fetched_concurrently(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, subtitles=True, sub_langs=['en', 'zh', 'fr'])
+    ydl = _FakeYDL(tmp_path)
+    files = downloader._fetch_subtitles(ydl, INFO)
+    assert ydl.peak == 3
+    assert sorted(Path(f).name for f in files) == ['clip.en-US.vtt', 'clip.fr.vtt', 'clip.zh-Hans.srv3']
+    assert (tmp_path / 'clip.fr.vtt').read_bytes() == b"WEBVTT\n"
+
+
+def test_failed_track_only_fails_subtitles_only_mode(tmp_path):
+    downloader = BingoDownloader(download_path=tmp_path, subtitles=True, sub_langs=['fr'])
+    assert downloader._fetch_subtitles(_FakeYDL(tmp_path, fail=['fr']), INFO) == []
+
+    downloader = BingoDownloader(download_path=tmp_path, subtitles_only=True, sub_langs=['fr'])
+    with pytest.raises(OSError, match="429"):
+        downloader._fetch_subtitles(_FakeYDL(tmp_path, fail=['fr']), INFO)
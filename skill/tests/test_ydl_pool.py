@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm YoutubeDL instance pool.
+
+Run with: pytest tests/test_ydl_pool.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("yt_dlp")
+
+from download import YoutubeDLPool
+
+
+def test_same_options_reuse_instance():
+    pool = YoutubeDLPool()
+    with pool.checkout({'quiet': True, 'format': 'best'}) as first:
+        pass
+    with pool.checkout({'quiet': True, 'format': 'best'}) as second:
+        pass
+    assert first is second
+    assert pool.stats() == {'created': 1, 'reused': 1, 'idle': 1}
+
+
+def test_shared_options_select_separate_instances():
+    pool = YoutubeDLPool()
+    with pool.checkout({'quiet': True, 'format': 'best'}) as plain:
+        pass
+    with pool.checkout({'quiet': True, 'format': 'bestaudio'}) as audio:
+        pass
+    with pool.checkout({'quiet': True, 'format': 'best', 'proxy': 'http://p:1'}) as proxied:
+        pass
+    assert len({id(plain), id(audio), id(proxied)}) == 3
+
+
+def test_task_options_are_reset_between_checkouts(tmp_path):
+    pool = YoutubeDLPool()
+    hook = lambda d: None
+    with pool.checkout({
+        'quiet': True,
+        'outtmpl': str(tmp_path / 'a' / '%(title)s.%(ext)s'),
+        'playlistitems': '1-3',
+        'progress_hooks': [hook],
+    }) as ydl:
+        assert ydl.params['outtmpl']['default'].startswith(str(tmp_path / 'a'))
+        assert ydl._progress_hooks == [hook]
+
+    with pool.checkout({'quiet': True, 'outtmpl': str(tmp_path / 'b' / '%(id)s')}) as reused:
+        assert reused is ydl
+        assert reused.params['outtmpl']['default'] == str(tmp_path / 'b' / '%(id)s')
+        assert 'playlistitems' not in reused.params
+        assert reused._progress_hooks == []
+
+
+def test_failed_checkout_is_discarded():
+    pool = YoutubeDLPool()
+    with pytest.raises(RuntimeError):
+        with pool.checkout({'quiet': True}):
+            raise RuntimeError("boom")
+    assert pool.stats()['idle'] == 0
+
+
+def test_idle_limit_and_expiry():
+    pool = YoutubeDLPool(max_idle=1, idle_ttl=0)
+    with pool.checkout({'quiet': True}):
+        with pool.checkout({'quiet': True}):
+            pass
+    assert pool.stats()['idle'] == 1
+    # Expired instances are closed instead of reused
+    with pool.checkout({'quiet': True}):
+        pass
+    assert pool.stats()['created'] == 3
+    assert pool.stats()['reused'] == 0
@@ -7,5 +7,10 @@ from .download import router as download_router
 from .history import router as history_router
 from .stats import router as stats_router
 from .formats import router as formats_router
+from .files import router as files_router
+from .playlists import router as playlists_router
 
-__all__ = ["download_router", "history_router", "stats_router", "formats_router"]
+__all__ = [
+    "download_router", "history_router", "stats_router", "formats_router",
+    "files_router", "playlists_router",
+]
@@ -2,18 +2,73 @@
 Bingo Downloader Web - Download API Endpoints
 """
 import asyncio
+import json
+import math
+import mimetypes
+import shutil
+import tempfile
+import time
 import uuid
 import subprocess
 from pathlib import Path
-from typing import Dict
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from ..models import DownloadRequest, DownloadProgress, ApiResponse
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from ..models import DownloadRequest, DownloadProgress, ApiResponse, BatchProgress
+from ..config import (
+    MAX_CONCURRENT_DOWNLOADS, BATCH_MAX_ITEMS, DEDUP_COMPLETED_TTL,
+    DOWNLOAD_DIR, STREAM_CHUNK_SIZE, STREAM_BUFFER_CHUNKS,
+    SCHEDULER_KEY_WEIGHTS, SCHEDULER_KEY_MAX_CONCURRENT, SCHEDULER_DEFAULT_KEY_MAX_CONCURRENT,
+    SCHEDULER_POLICY, DOWNLOAD_MAX_DURATION, DOWNLOAD_TIMEOUT_GRACE,
+    DOWNLOAD_PIPELINE, PIPELINE_EXTRACT_WORKERS, PIPELINE_POSTPROCESS_WORKERS,
+    DOWNLOAD_EXECUTOR, WORKER_MAX_JOBS, WORKER_MAX_MEMORY_MB, WORKER_START_METHOD,
+)
+from ..core.scheduler import DownloadScheduler, RetryLater, DEFAULT_OWNER
+from ..security.auth import api_key_owner, client_identity
+from ..core.streaming import relay_chunks
+from ..core.dedup import DownloadDeduplicator, download_fingerprint
+from ..core.workers import ProcessWorkerPool, RemoteDownload
 
 router = APIRouter(prefix="/api/download", tags=["download"])
 
 # In-memory task storage (in production, use Redis or similar)
 active_tasks: Dict[str, DownloadProgress] = {}
 task_locks: Dict[str, asyncio.Lock] = {}
+batches: Dict[str, list[str]] = {}
+task_results: Dict[str, Dict[str, Any]] = {}
+# Downloaders of tasks that are currently running (their files appear as items finish)
+running_downloaders: Dict[str, Any] = {}
+
+# Concurrency-limited runner shared by single and batch submissions, with
+# single downloads ahead of batches and fair sharing between API keys.
+# The app lifespan attaches the per-platform concurrency controller.
+# With the staged pipeline a worker only waits for its job to pass through
+# the stages, so extra workers keep the extract and post-process stages fed
+# while MAX_CONCURRENT_DOWNLOADS transfers run.
+download_scheduler = DownloadScheduler(
+    max_workers=MAX_CONCURRENT_DOWNLOADS + (
+        PIPELINE_EXTRACT_WORKERS + PIPELINE_POSTPROCESS_WORKERS if DOWNLOAD_PIPELINE else 0
+    ),
+    owner_weights={api_key_owner(k): v for k, v in SCHEDULER_KEY_WEIGHTS.items()},
+    owner_max_running={api_key_owner(k): v for k, v in SCHEDULER_KEY_MAX_CONCURRENT.items()},
+    default_max_running=SCHEDULER_DEFAULT_KEY_MAX_CONCURRENT,
+    policy=SCHEDULER_POLICY,
+    timeout_grace=DOWNLOAD_TIMEOUT_GRACE,
+)
+
+# With DOWNLOAD_EXECUTOR=process each attempt runs in a worker process and
+# the scheduler thread only relays its progress
+worker_pool = ProcessWorkerPool(
+    size=download_scheduler.max_workers,
+    max_jobs_per_worker=WORKER_MAX_JOBS,
+    max_rss=WORKER_MAX_MEMORY_MB * 1024 * 1024,
+    start_method=WORKER_START_METHOD,
+) if DOWNLOAD_EXECUTOR == "process" else None
+
+# Identical concurrent submissions attach to the same task
+download_dedup = DownloadDeduplicator(completed_ttl=DEDUP_COMPLETED_TTL)
 
 # Cookies cache directory
 COOKIES_CACHE_DIR = Path.home() / '.bingo-downloader' / 'cookies'
@@ -110,67 +165,282 @@ async def ensure_cookies(browser: str = "chrome") -> str:
     return browser
 
 
-async def run_download(task_id: str, request: DownloadRequest):
-    """Run download in background"""
+def build_downloader(request: DownloadRequest, postprocess_priority: int = 0):
+    """
+    Create a BingoDownloader configured for a download request
+
+    postprocess_priority orders its work in the post-processing pool (lower
+    runs first: single downloads 0, batch items 1).
+    """
+    from ..core import BingoDownloader, get_downloader_context
+
+    # Map quality string to int (best = None, 1080 = 1080, etc.)
+    quality_val = None if request.quality == "best" else int(request.quality)
+
+    # Check for cached cookies
+    cookies_file = None
+    cookies_browser = request.cookies_browser
+
+    if request.cookies_browser and are_cookies_cached(request.cookies_browser):
+        cookies_file = str(get_cookies_path(request.cookies_browser))
+        cookies_browser = None  # Use file instead of browser
+    elif request.cookies_browser:
+        # First time using this browser - will trigger keychain prompt
+        cookies_browser = request.cookies_browser
+
+    return BingoDownloader(
+        audio_only=(request.format_type == "audio"),
+        audio_format=request.audio_format or "mp3",
+        quality=quality_val,
+        subtitles=request.subtitles,
+        sub_langs=[lang.strip() for lang in (request.sub_langs or "").split(",") if lang.strip()] or None,
+        subtitles_only=(request.format_type == "subtitles"),
+        cookies_browser=cookies_browser,
+        cookies_file=cookies_file,
+        context=get_downloader_context(),
+        interactive=False,
+        defer_retries=True,
+        max_duration=_max_duration(request),
+        deadline=request.deadline.timestamp() if request.deadline else None,
+        postprocess_priority=postprocess_priority,
+    )
+
+
+def _max_duration(request: DownloadRequest) -> Optional[float]:
+    """The request's running-time limit, or the server default"""
+    return request.max_duration or DOWNLOAD_MAX_DURATION or None
+
+
+def _size_hint(request: DownloadRequest) -> Optional[int]:
+    """Expected size from a format listing the client fetched earlier, if cached"""
+    from .formats import formats_cache
+
+    listing = formats_cache.get((request.url, request.cookies_browser or ""))
+    if listing is None or request.format_type != "video":
+        return None
+    max_height = None if request.quality == "best" else int(request.quality)
+    sizes = [
+        fmt.filesize for fmt in listing.formats
+        if fmt.filesize and (max_height is None or (fmt.height or 0) <= max_height)
+    ]
+    return max(sizes) if sizes else None
+
+
+def _on_timeout(task_id: str):
+    """Fail a task whose worker the scheduler gave up on"""
+    downloader = running_downloaders.pop(task_id, None)
+    if downloader is not None:
+        # Stops it at the next progress update if it ever gets that far
+        downloader.abort("Download timed out")
+    progress = active_tasks.get(task_id)
+    if progress is not None and progress.status in ("downloading", "processing"):
+        progress.status = "failed"
+        progress.error = "Download timed out"
+    download_dedup.release(task_id)
+
+
+def _apply_progress(task_id: str, d: dict):
+    """Copy a yt-dlp progress update onto the task"""
+    progress = active_tasks.get(task_id)
+    if progress is None or progress.status not in ("downloading", "processing"):
+        return
+    if d.get("status") == "finished":
+        # File complete; merging/post-processing follows
+        progress.status = "processing"
+        return
+    if d.get("status") != "downloading":
+        return
+    progress.status = "downloading"
+    progress.downloaded_bytes = d.get("downloaded_bytes") or 0
+    progress.total_bytes = d.get("total_bytes") or d.get("total_bytes_estimate")
+    if progress.total_bytes:
+        progress.progress = min(100.0, round(progress.downloaded_bytes * 100 / progress.total_bytes, 1))
+    progress.speed = (d.get("_speed_str") or "").strip() or None
+    progress.eta = (d.get("_eta_str") or "").strip() or None
+
+
+def _worker_download(task_id: str, request: DownloadRequest) -> RemoteDownload:
+    """Stand-in downloader that runs this attempt in a worker process"""
+    from ..core import get_downloader_context
+
+    context = get_downloader_context()
+    controllers = {"concurrency": context.concurrency, "breaker": context.breaker} if context else {}
+    return RemoteDownload(
+        worker_pool, task_id, request.model_dump(mode="json"),
+        attempt=active_tasks[task_id].attempt - 1,
+        controllers=controllers,
+    )
+
+
+def _complete_task(task_id: str, request: DownloadRequest, result: Dict[str, Any], elapsed: float):
+    """Record a finished download's result on its task (elapsed: transfer seconds)"""
+    from ..core import platform_key
+
+    task_results[task_id] = result
+    if result.get("success"):
+        active_tasks[task_id].status = "completed"
+        active_tasks[task_id].progress = 100.0
+        active_tasks[task_id].filename = result.get("filename")
+        active_tasks[task_id].stalls = result.get("stalls", 0)
+        active_tasks[task_id].transcoded = result.get("transcoded")
+        if result.get("filepath"):
+            # Throughput for the scheduler's duration estimates
+            filepath = Path(result["filepath"])
+            if filepath.is_file():
+                download_scheduler.record_transfer(
+                    platform_key(request.url), filepath.stat().st_size, elapsed
+                )
+            active_tasks[task_id].file_url = f"/api/files/{task_id}"
+        elif result.get("playlist"):
+            active_tasks[task_id].file_url = f"/api/playlists/{task_id}/archive"
+    else:
+        active_tasks[task_id].status = "failed"
+        active_tasks[task_id].error = result.get("error", "Unknown error")
+
+
+def _finish_postprocessing(task_id: str, request: DownloadRequest, result: Dict[str, Any],
+                           elapsed: float, job):
+    """Complete a task once the post-processing pool is done with its files"""
+    progress = active_tasks.get(task_id)
+    if progress is None or progress.status != "processing":
+        # Cancelled while waiting for post-processing
+        download_dedup.release(task_id)
+        return
+    if job.error is not None:
+        progress.status = "failed"
+        progress.error = f"Post-processing failed: {job.error}"
+        download_dedup.release(task_id)
+        return
+    if job.files:
+        result = {**result, "filepath": job.files[-1], "filename": Path(job.files[-1]).name,
+                  "files": list(job.files), "postprocessing": False}
+    # Transfer time only: post-processing does not reflect platform throughput
+    _complete_task(task_id, request, result, elapsed)
+    download_dedup.complete(task_id, result.get("filepath"))
+
+
+def run_download(task_id: str, request: DownloadRequest, downloader=None):
+    """
+    Run download on a scheduler worker thread.
+
+    Each call makes one attempt. A retryable failure puts the task back to
+    pending and re-queues it on the scheduler after the backoff delay. With
+    the post-processing pool the attempt returns once the file is on disk;
+    the task stays "processing" until the pool finishes it.
+    """
+    retrying = False
+    postprocessing = False
     try:
-        from ..core import BingoDownloader, CORE_AVAILABLE
+        from ..core import CORE_AVAILABLE, DownloadRetry
 
         if not CORE_AVAILABLE:
             active_tasks[task_id].status = "failed"
             active_tasks[task_id].error = "Core modules not available"
             return
 
+        # Cancelled while waiting in the queue
+        if active_tasks[task_id].status != "pending":
+            return
+
         # Update status to downloading
         active_tasks[task_id].status = "downloading"
         active_tasks[task_id].progress = 0.0
+        active_tasks[task_id].retry_at = None
+
+        if worker_pool is not None:
+            downloader = _worker_download(task_id, request)
+        elif downloader is None:
+            downloader = build_downloader(request)
+        downloader.on_progress = lambda d: _apply_progress(task_id, d)
+
+        # Run download (BingoDownloader returns normally on success)
+        running_downloaders[task_id] = downloader
+        started = time.monotonic()
+        try:
+            result = downloader.download(request.url) or {"success": True}
+        except DownloadRetry as e:
+            progress = active_tasks[task_id]
+            if progress.status not in ("downloading", "processing"):
+                # Cancelled while the attempt was running
+                return
+            retrying = True
+            progress.status = "pending"
+            progress.error = str(e)
+            progress.attempt = e.attempt + 1
+            progress.retry_at = time.time() + e.delay
+            raise RetryLater(e.delay)
+
+        if active_tasks[task_id].status not in ("downloading", "processing"):
+            # Cancelled while the attempt was running
+            return
 
-        # Map quality string to int (best = None, 1080 = 1080, etc.)
-        quality_val = None if request.quality == "best" else int(request.quality)
-
-        # Check for cached cookies
-        cookies_file = None
-        cookies_browser = request.cookies_browser
-
-        if request.cookies_browser and are_cookies_cached(request.cookies_browser):
-            cookies_file = str(get_cookies_path(request.cookies_browser))
-            cookies_browser = None  # Use file instead of browser
-        elif request.cookies_browser:
-            # First time using this browser - will trigger keychain prompt
-            cookies_browser = request.cookies_browser
-
-        # Create downloader instance with config
-        downloader = BingoDownloader(
-            audio_only=(request.format_type == "audio"),
-            quality=quality_val,
-            subtitles=request.subtitles,
-            cookies_browser=cookies_browser,
-            cookies_file=cookies_file
-        )
-
-        # Run download
-        result = await asyncio.to_thread(
-            downloader.download,
-            request.url
-        )
-
-        if result.get("success"):
-            active_tasks[task_id].status = "completed"
-            active_tasks[task_id].progress = 100.0
-            active_tasks[task_id].filename = result.get("filename")
-        else:
-            active_tasks[task_id].status = "failed"
-            active_tasks[task_id].error = result.get("error", "Unknown error")
+        if result.get("postprocessing"):
+            # The file is on disk: free this scheduler slot and finish the
+            # task from the post-processing pool
+            postprocessing = True
+            active_tasks[task_id].status = "processing"
+            task_results[task_id] = result
+            elapsed = time.monotonic() - started
+            downloader.pending_postprocess.add_done_callback(
+                lambda job: _finish_postprocessing(task_id, request, result, elapsed, job)
+            )
+            return
+        _complete_task(task_id, request, result, time.monotonic() - started)
 
+    except RetryLater:
+        raise
+    except SystemExit:
+        # The CLI downloader exits on failure
+        active_tasks[task_id].status = "failed"
+        active_tasks[task_id].error = "Download failed"
     except Exception as e:
         active_tasks[task_id].status = "failed"
         active_tasks[task_id].error = str(e)
+    finally:
+        running_downloaders.pop(task_id, None)
+        # A task waiting to retry or for post-processing is still in flight
+        # and keeps its dedup claim
+        if retrying or postprocessing:
+            pass
+        elif active_tasks[task_id].status == "completed":
+            download_dedup.complete(task_id, task_results.get(task_id, {}).get("filepath"))
+        else:
+            download_dedup.release(task_id)
 
 
-@router.post("/start", response_model=ApiResponse)
-async def start_download(request: DownloadRequest, background_tasks: BackgroundTasks):
-    """Start a new download task"""
+def submit_download(request: DownloadRequest, batch_id: Optional[str] = None,
+                    owner: str = DEFAULT_OWNER) -> Tuple[str, bool]:
+    """
+    Register a task and queue it on the download scheduler.
+
+    Batch items go to the bulk lane, everything else to the interactive
+    lane; owner identifies the submitter for fair queuing.
+
+    Returns (task_id, deduplicated). When an identical download (same
+    canonical URL and effective yt-dlp options) is already running, or
+    finished recently and its file still exists, the existing task id is
+    returned instead of starting a second download.
+    """
+    from ..core import CORE_AVAILABLE, platform_key
+
     task_id = str(uuid.uuid4())
 
+    downloader = None
+    platform = None
+    if CORE_AVAILABLE:
+        # Same key the downloader reports throttling and failures under
+        platform = platform_key(request.url)
+        try:
+            downloader = build_downloader(request, postprocess_priority=1 if batch_id else 0)
+            fingerprint = download_fingerprint(request.url, downloader._get_ydl_opts())
+        except Exception:
+            # Let run_download surface the error on the task
+            downloader = None
+        else:
+            existing = download_dedup.claim(fingerprint, task_id)
+            if existing is not None and existing in active_tasks:
+                return existing, True
+
     # Initialize task
     active_tasks[task_id] = DownloadProgress(
         task_id=task_id,
@@ -178,13 +448,273 @@ async def start_download(request: DownloadRequest, background_tasks: BackgroundT
         progress=0.0
     )
 
-    # Start download in background
-    background_tasks.add_task(run_download, task_id, request)
+    download_scheduler.submit(
+        task_id, run_download, task_id, request, downloader,
+        batch_id=batch_id,
+        lane="bulk" if batch_id else "interactive",
+        owner=owner,
+        platform=platform,
+        deadline=request.deadline.timestamp() if request.deadline else None,
+        timeout=_max_duration(request),
+        size_hint=_size_hint(request) if download_scheduler.policy == "edf" else None,
+        on_timeout=_on_timeout,
+    )
+    return task_id, False
+
+
+async def _relay_body(downloader, stream_format: Dict[str, Any], url: str) -> AsyncIterator[bytes]:
+    """Relay a direct format to the client, recording history once fully sent"""
+    chunks = downloader.iter_stream(stream_format, STREAM_CHUNK_SIZE)
+    sent = 0
+    async for chunk in relay_chunks(chunks, STREAM_BUFFER_CHUNKS):
+        sent += len(chunk)
+        yield chunk
+
+    await run_in_threadpool(
+        downloader.history.record_download,
+        url=url,
+        platform=stream_format["platform"],
+        title=stream_format["title"],
+        quality=str(downloader.quality) if downloader.quality else "auto",
+        filesize=sent,
+        success=True,
+    )
+
+
+async def stream_download(request: DownloadRequest):
+    """
+    Send the media in the response instead of keeping a copy (delivery=stream).
+
+    When the selected format is a single direct HTTP stream, bytes are
+    relayed to the client as they arrive. Formats that need merging or
+    post-processing are downloaded to a staging directory first, sent, and
+    deleted afterwards.
+    """
+    from ..core import CORE_AVAILABLE, DownloadRetry, CircuitOpenError
+    from .files import StreamTransferResponse, DownloadFileResponse, content_disposition
+
+    if not CORE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Core modules not available")
+
+    downloader = build_downloader(request)
+    try:
+        stream_format = await run_in_threadpool(downloader.resolve_stream_format, request.url)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not resolve format: {e}")
+
+    if stream_format is not None:
+        filename = f"{stream_format['title']}.{stream_format['ext']}"
+        headers = {"Content-Disposition": content_disposition(filename)}
+        if stream_format.get("filesize"):
+            headers["Content-Length"] = str(stream_format["filesize"])
+        return StreamTransferResponse(
+            _relay_body(downloader, stream_format, request.url),
+            media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            headers=headers,
+        )
+
+    # Merging or post-processing needs a file on disk
+    staging_root = DOWNLOAD_DIR / ".staging"
+    staging_root.mkdir(parents=True, exist_ok=True)
+    staging_dir = Path(tempfile.mkdtemp(dir=staging_root))
+    downloader.download_path = staging_dir
+    try:
+        result = await run_in_threadpool(downloader.download, request.url) or {}
+    except DownloadRetry as e:
+        # The client holds the response open, so hand the backoff to it
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Download failed, retry later: {e.error}",
+            headers={"Retry-After": str(math.ceil(e.delay))},
+        )
+    except CircuitOpenError as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_in))},
+        )
+    except SystemExit:
+        # The CLI downloader exits on failure
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise HTTPException(status_code=502, detail="Download failed")
+    except Exception as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise HTTPException(status_code=502, detail=f"Download failed: {e}")
+    if result.get("postprocessing"):
+        # The response needs the post-processed file
+        try:
+            files = await run_in_threadpool(downloader.pending_postprocess.wait)
+        except Exception as e:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise HTTPException(status_code=502, detail=f"Post-processing failed: {e}")
+        result["filepath"] = files[-1] if files else None
+    filepath = result.get("filepath")
+    if not filepath or not Path(filepath).is_file():
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise HTTPException(status_code=502, detail="Download failed")
+
+    return DownloadFileResponse(
+        filepath,
+        filename=Path(filepath).name,
+        background=BackgroundTask(shutil.rmtree, staging_dir, ignore_errors=True),
+    )
+
+
+@router.post("/start", response_model=ApiResponse)
+async def start_download(request: DownloadRequest, http_request: Request):
+    """
+    Start a new download task.
+
+    With delivery=stream the response body is the media itself rather than
+    a task id.
+    """
+    if request.delivery == "stream":
+        return await stream_download(request)
+
+    task_id, deduplicated = submit_download(request, owner=client_identity(http_request))
+
+    return ApiResponse(
+        success=True,
+        message="Attached to identical download" if deduplicated else "Download started",
+        data={"task_id": task_id, "deduplicated": deduplicated}
+    )
+
+
+def _parse_batch_line(line: str) -> Optional[Union[str, dict]]:
+    """Parse one line of a text or JSONL batch file"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{') or line.startswith('"'):
+        return json.loads(line)
+    return line
+
+
+async def _iter_batch_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines without buffering the whole body"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+async def _upload_chunks(upload, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+@router.post("/batch", response_model=ApiResponse)
+async def start_batch(http_request: Request):
+    """
+    Submit many downloads in one request.
+
+    Accepts either a JSON body (a list of URLs/items, or an object with
+    "urls" and shared "options"), a multipart upload with a "file" field, or
+    a raw text/JSONL body. Text lines are URLs ('#' starts a comment); JSONL
+    lines are DownloadRequest objects. For non-JSON bodies the shared
+    options are taken from the query string.
+    """
+    content_type = http_request.headers.get("content-type", "")
+    items: list = []
+    options: dict = dict(http_request.query_params)
+    rejected: list[dict] = []
+
+    try:
+        if content_type.startswith("application/json"):
+            body = await http_request.json()
+            if isinstance(body, dict):
+                options.update(body.get("options") or {})
+                items = body.get("urls") or []
+            else:
+                items = body
+            if not isinstance(items, list):
+                raise ValueError("Expected a list of URLs")
+        else:
+            if content_type.startswith("multipart/form-data"):
+                form = await http_request.form()
+                upload = form.get("file")
+                if upload is None or isinstance(upload, str):
+                    raise ValueError("Missing 'file' upload field")
+                chunks = _upload_chunks(upload)
+            else:
+                chunks = http_request.stream()
+
+            line_no = 0
+            async for line in _iter_batch_lines(chunks):
+                line_no += 1
+                try:
+                    item = _parse_batch_line(line)
+                except ValueError as e:
+                    rejected.append({"line": line_no, "error": f"Invalid JSON: {e}"})
+                    continue
+                if item is not None:
+                    items.append(item)
+                if len(items) > BATCH_MAX_ITEMS:
+                    break
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items, at most {BATCH_MAX_ITEMS} per batch"
+        )
+
+    # Validate everything before queueing anything
+    requests: list[DownloadRequest] = []
+    for index, item in enumerate(items):
+        fields = {"url": item} if isinstance(item, str) else item
+        try:
+            req = DownloadRequest(**{**options, **fields})
+        except (TypeError, ValidationError) as e:
+            rejected.append({"index": index, "error": str(e)})
+            continue
+        if req.delivery == "stream":
+            rejected.append({"index": index, "error": "delivery=stream is only supported by /start"})
+            continue
+        requests.append(req)
+
+    if not requests:
+        raise HTTPException(status_code=400, detail="No valid URLs in batch")
+
+    batch_id = str(uuid.uuid4())
+    owner = client_identity(http_request)
+    task_ids = [submit_download(req, batch_id=batch_id, owner=owner)[0] for req in requests]
+    batches[batch_id] = task_ids
 
     return ApiResponse(
         success=True,
-        message="Download started",
-        data={"task_id": task_id}
+        message=f"Batch started with {len(task_ids)} downloads",
+        data={"batch_id": batch_id, "task_ids": task_ids, "rejected": rejected}
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=BatchProgress)
+async def get_batch_progress(batch_id: str):
+    """Get aggregate progress of a batch"""
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    tasks = [active_tasks[t] for t in batches[batch_id] if t in active_tasks]
+    counts = {status: 0 for status in ("pending", "downloading", "processing", "completed", "failed")}
+    for task in tasks:
+        counts[task.status] += 1
+
+    return BatchProgress(
+        batch_id=batch_id,
+        total=len(tasks),
+        progress=sum(t.progress for t in tasks) / len(tasks) if tasks else 0.0,
+        task_ids=batches[batch_id],
+        **counts,
     )
 
 
@@ -203,9 +733,18 @@ async def cancel_download(task_id: str):
     if task_id not in active_tasks:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    # Mark as cancelled (actual cancellation will be implemented)
+    # Drop it from the queue if it has not started yet
+    download_scheduler.cancel(task_id)
+    # New submissions of the same URL must not attach to a cancelled task
+    download_dedup.release(task_id)
+
+    # Mark as cancelled (in-process downloads are not interrupted yet)
     active_tasks[task_id].status = "failed"
     active_tasks[task_id].error = "Cancelled by user"
+    downloader = running_downloaders.get(task_id)
+    if isinstance(downloader, RemoteDownload):
+        # A worker process can be stopped right away
+        downloader.abort("Cancelled by user")
 
     return ApiResponse(
         success=True,
@@ -213,6 +752,57 @@ async def cancel_download(task_id: str):
     )
 
 
+@router.get("/queue", response_model=Dict[str, Any])
+async def get_queue_stats():
+    """
+    Scheduler metrics: lane depths, per-owner queue depth, caps and wait
+    times, per-platform limits and circuits, retry budget usage, stall
+    watchdog counts, pipeline stage utilisation, playlist prefetch hits,
+    post-processing queue depth and worker processes
+    """
+    from ..core import get_downloader_context
+
+    stats = download_scheduler.stats()
+    context = get_downloader_context()
+    if context is not None:
+        stats["retry_budget"] = context.retry_manager.stats()
+        stats["stalls"] = context.watchdog.stats()
+        if context.pipeline is not None:
+            stats["pipeline"] = context.pipeline.stats()
+        if context.prefetcher is not None:
+            stats["prefetch"] = context.prefetcher.stats()
+        if context.postprocessing is not None:
+            stats["postprocess"] = context.postprocessing.stats()
+    if worker_pool is not None:
+        stats["workers"] = worker_pool.stats()
+    return stats
+
+
+@router.get("/bandwidth", response_model=Dict[str, Any])
+async def get_bandwidth_stats():
+    """Bandwidth limits in effect and bytes/throttle time accumulated so far"""
+    from ..core import get_downloader_context
+
+    context = get_downloader_context()
+    if context is None:
+        raise HTTPException(status_code=503, detail="Core modules not available")
+    return context.bandwidth.stats()
+
+
+@router.post("/circuits/{platform:path}/reset", response_model=ApiResponse)
+async def reset_circuit(platform: str):
+    """Close a platform's circuit (e.g. after the site or yt-dlp was fixed)"""
+    from ..core import get_downloader_context
+
+    context = get_downloader_context()
+    if context is None:
+        raise HTTPException(status_code=503, detail="Core modules not available")
+    context.breaker.reset(platform)
+    # Deferred jobs for the platform may start now
+    download_scheduler.wake()
+    return ApiResponse(success=True, message=f"Circuit for {platform} reset")
+
+
 @router.get("/tasks", response_model=Dict[str, DownloadProgress])
 async def list_tasks():
     """List all active tasks"""
@@ -0,0 +1,181 @@
+"""
+Bingo Downloader Web - File Delivery Endpoints
+"""
+import os
+import threading
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Query
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+from ..config import (
+    DOWNLOAD_DIR, FILES_MAX_CONCURRENT, FILES_CHUNK_SIZE,
+    FILES_SENDFILE_HEADER, FILES_ACCEL_PREFIX,
+)
+from .download import active_tasks, task_results
+
+router = APIRouter(prefix="/api/files", tags=["files"])
+
+
+class TransferLimiter:
+    """Non-blocking counter of in-progress file transfers"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+transfer_limiter = TransferLimiter(FILES_MAX_CONCURRENT)
+
+
+class LimitedTransfer:
+    """
+    Response mixin that holds a transfer slot while the body is being sent.
+
+    When every slot is busy the client gets 503 with Retry-After instead of
+    queueing behind multi-GB transfers. HEAD requests send no body and are
+    not counted.
+    """
+
+    limiter = transfer_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope.get("method") == "HEAD":
+            await super().__call__(scope, receive, send)
+            return
+
+        if not self.limiter.try_acquire():
+            response = JSONResponse(
+                {"detail": "Too many concurrent file transfers"},
+                status_code=503,
+                headers={"Retry-After": "5"},
+            )
+            await response(scope, receive, send)
+            # Still run cleanup such as removing a staged file
+            if self.background is not None:
+                await self.background()
+            return
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+
+class DownloadFileResponse(LimitedTransfer, FileResponse):
+    """
+    FileResponse for finished downloads that also answers conditional requests.
+
+    Range/If-Range, ETag and Last-Modified come from Starlette. The body is
+    sent with the server's zero-copy "http.response.pathsend" extension when
+    available, otherwise read in FILES_CHUNK_SIZE blocks off the event loop.
+    """
+
+    chunk_size = FILES_CHUNK_SIZE
+
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or self.headers["etag"] in tags
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(self.headers["last-modified"]) <= \
+                    parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._not_modified(Headers(scope=scope)):
+            headers = {k: self.headers[k] for k in ("etag", "last-modified", "accept-ranges")}
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+class StreamTransferResponse(LimitedTransfer, StreamingResponse):
+    """Chunked response relayed while the download is still running"""
+
+
+def _resolve_download_file(filepath: Optional[str]) -> Path:
+    """Return the file path if it exists inside DOWNLOAD_DIR"""
+    if not filepath:
+        raise HTTPException(status_code=404, detail="No file recorded for this download")
+    path = Path(filepath).resolve()
+    # Never serve anything outside the download directory
+    if not path.is_relative_to(DOWNLOAD_DIR.resolve()):
+        raise HTTPException(status_code=403, detail="File is outside the download directory")
+    if not path.is_file():
+        raise HTTPException(status_code=410, detail="File no longer exists")
+    return path
+
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    disposition = "inline" if inline else "attachment"
+    return f"{disposition}; filename*=utf-8''{quote(filename)}"
+
+
+def file_response(path: Path, inline: bool = False) -> Response:
+    """Serve a finished download, directly or via the reverse proxy"""
+    if FILES_SENDFILE_HEADER:
+        # The proxy does the transfer (sendfile, ranges, caching headers)
+        if FILES_SENDFILE_HEADER.lower() == "x-accel-redirect":
+            relative = path.relative_to(DOWNLOAD_DIR.resolve()).as_posix()
+            target = f"{FILES_ACCEL_PREFIX.rstrip('/')}/{quote(relative)}"
+        else:
+            target = str(path)
+        return Response(headers={
+            FILES_SENDFILE_HEADER: target,
+            "Content-Disposition": content_disposition(path.name, inline),
+        })
+
+    return DownloadFileResponse(
+        path,
+        stat_result=os.stat(path),
+        content_disposition_type="inline" if inline else "attachment",
+        filename=path.name,
+    )
+
+
+@router.api_route("/{task_id}", methods=["GET", "HEAD"])
+async def get_task_file(task_id: str, inline: bool = Query(default=False)):
+    """Fetch the file produced by a finished download task"""
+    if task_id not in active_tasks:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if active_tasks[task_id].status != "completed":
+        raise HTTPException(status_code=409, detail="Download has not completed")
+
+    path = _resolve_download_file(task_results.get(task_id, {}).get("filepath"))
+    return file_response(path, inline)
+
+
+@router.api_route("/history/{record_id}", methods=["GET", "HEAD"])
+async def get_history_file(record_id: int, inline: bool = Query(default=False)):
+    """Fetch the file of a download history record"""
+    from ..core import get_downloader_context, CORE_AVAILABLE
+
+    if not CORE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Core modules not available")
+
+    record = get_downloader_context().history.get_record(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+
+    path = _resolve_download_file(record.get("filepath"))
+    return file_response(path, inline)
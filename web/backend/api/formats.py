@@ -1,12 +1,108 @@
 """
 Bingo Downloader Web - Formats API Endpoints
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from fastapi import APIRouter, Query, HTTPException
-from ..models import FormatListResponse, ApiResponse
-from ..config import detect_platform
+from ..models import FormatListResponse, BulkFormatsRequest, BulkFormatsResponse
+from ..config import (
+    detect_platform, FORMATS_MAX_WORKERS, FORMATS_CACHE_TTL,
+    FORMATS_BULK_CONCURRENCY, FORMATS_BULK_MAX_URLS,
+)
+from ..utils import SingleFlight, TTLCache
+from .download import are_cookies_cached, get_cookies_path
 
 router = APIRouter(prefix="/api/formats", tags=["formats"])
 
+# yt-dlp extraction is blocking, keep it off the event loop
+extract_executor = ThreadPoolExecutor(
+    max_workers=FORMATS_MAX_WORKERS, thread_name_prefix="formats"
+)
+formats_cache = TTLCache(ttl=FORMATS_CACHE_TTL)
+formats_flight = SingleFlight()
+
+
+def _cookie_opts(cookies_browser: Optional[str]) -> dict:
+    """Build yt-dlp cookie options, preferring the cached cookies file"""
+    if not cookies_browser:
+        return {}
+    if are_cookies_cached(cookies_browser):
+        return {'cookiefile': str(get_cookies_path(cookies_browser))}
+    return {'cookiesfrombrowser': (cookies_browser,)}
+
+
+def _extract_formats(url: str, cookies_browser: Optional[str]) -> FormatListResponse:
+    """Run yt-dlp extraction (blocking, called in the worker pool)"""
+    from ..core import get_downloader_context
+
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        **_cookie_opts(cookies_browser),
+    }
+
+    # Warm instances keep connections and decrypted browser cookies between calls
+    context = get_downloader_context()
+    if context is not None:
+        with context.ydl_pool.checkout(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    else:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+
+    if not info:
+        raise HTTPException(status_code=400, detail="Could not extract video info")
+
+    # Extract format information
+    formats = []
+    for fmt in info.get('formats', []):
+        if fmt.get('vcodec') != 'none':  # Only video formats
+            formats.append({
+                'format_id': fmt.get('format_id'),
+                'ext': fmt.get('ext'),
+                'quality': f"{fmt.get('height', 0)}p",
+                'filesize': fmt.get('filesize'),
+                'vcodec': fmt.get('vcodec'),
+                'acodec': fmt.get('acodec'),
+                'fps': fmt.get('fps'),
+                'height': fmt.get('height'),
+                'width': fmt.get('width'),
+            })
+
+    return FormatListResponse(
+        url=url,
+        platform=detect_platform(url),
+        title=info.get('title', 'Unknown'),
+        formats=formats,
+        thumbnail=info.get('thumbnail')
+    )
+
+
+async def get_formats(url: str, cookies_browser: Optional[str] = None) -> FormatListResponse:
+    """
+    Return formats for a URL.
+
+    Served from the short-lived cache when possible; concurrent requests for
+    the same URL share a single extraction running in the worker pool.
+    """
+    key = (url, cookies_browser or "")
+    cached = formats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def _extract():
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            extract_executor, _extract_formats, url, cookies_browser
+        )
+        formats_cache.set(key, result)
+        return result
+
+    return await formats_flight.do(key, _extract)
+
 
 @router.get("/list", response_model=FormatListResponse)
 async def list_formats(
@@ -15,47 +111,41 @@ async def list_formats(
 ):
     """List available formats for a video"""
     try:
-        import yt_dlp
+        return await get_formats(url, cookies_browser)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-        }
 
-        if cookies_browser:
-            # Use cookies from browser if needed
-            pass
+@router.post("/bulk", response_model=BulkFormatsResponse)
+async def bulk_formats(request: BulkFormatsRequest):
+    """Probe formats for many URLs with bounded parallelism"""
+    urls = list(dict.fromkeys(request.urls))  # de-duplicate, keep order
+    if len(urls) > FORMATS_BULK_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs, at most {FORMATS_BULK_MAX_URLS} per request"
+        )
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+    semaphore = asyncio.Semaphore(FORMATS_BULK_CONCURRENCY)
 
-        if not info:
-            raise HTTPException(status_code=400, detail="Could not extract video info")
-
-        # Extract format information
-        formats = []
-        for fmt in info.get('formats', []):
-            if fmt.get('vcodec') != 'none':  # Only video formats
-                formats.append({
-                    'format_id': fmt.get('format_id'),
-                    'ext': fmt.get('ext'),
-                    'quality': f"{fmt.get('height', 0)}p",
-                    'filesize': fmt.get('filesize'),
-                    'vcodec': fmt.get('vcodec'),
-                    'acodec': fmt.get('acodec'),
-                    'fps': fmt.get('fps'),
-                    'height': fmt.get('height'),
-                    'width': fmt.get('width'),
-                })
-
-        return FormatListResponse(
-            url=url,
-            platform=detect_platform(url),
-            title=info.get('title', 'Unknown'),
-            formats=formats,
-            thumbnail=info.get('thumbnail')
-        )
+    async def _probe(url: str):
+        async with semaphore:
+            try:
+                return await get_formats(url, request.cookies_browser)
+            except HTTPException as e:
+                return e.detail
+            except Exception as e:
+                return str(e)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    outcomes = await asyncio.gather(*(_probe(url) for url in urls))
+
+    results, errors = [], {}
+    for url, outcome in zip(urls, outcomes):
+        if isinstance(outcome, FormatListResponse):
+            results.append(outcome)
+        else:
+            errors[url] = outcome
+
+    return BulkFormatsResponse(results=results, errors=errors)
@@ -14,12 +14,12 @@ async def get_history(
     platform: Optional[str] = None
 ):
     """Get download history"""
-    from ..core import DownloadHistory, CORE_AVAILABLE
+    from ..core import get_downloader_context, CORE_AVAILABLE
 
     if not CORE_AVAILABLE:
         return HistoryResponse(total=0, records=[])
 
-    history_db = DownloadHistory()
+    history_db = get_downloader_context().history
 
     if platform:
         records = history_db.get_history_by_platform(platform, limit)
@@ -37,12 +37,12 @@ async def get_history(
 @router.delete("/clear", response_model=ApiResponse)
 async def clear_history():
     """Clear all download history"""
-    from ..core import DownloadHistory, CORE_AVAILABLE
+    from ..core import get_downloader_context, CORE_AVAILABLE
 
     if not CORE_AVAILABLE:
         return ApiResponse(success=False, message="Core modules not available")
 
-    history_db = DownloadHistory()
+    history_db = get_downloader_context().history
     history_db.clear_history()
 
     return ApiResponse(
@@ -54,12 +54,12 @@ async def clear_history():
 @router.delete("/{record_id}", response_model=ApiResponse)
 async def delete_record(record_id: int):
     """Delete a specific history record"""
-    from ..core import DownloadHistory, CORE_AVAILABLE
+    from ..core import get_downloader_context, CORE_AVAILABLE
 
     if not CORE_AVAILABLE:
         return ApiResponse(success=False, message="Core modules not available")
 
-    history_db = DownloadHistory()
+    history_db = get_downloader_context().history
     history_db.delete_record(record_id)
 
     return ApiResponse(
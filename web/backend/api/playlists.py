@@ -0,0 +1,109 @@
+"""
+Bingo Downloader Web - Playlist API Endpoints
+"""
+import time
+from pathlib import Path
+from typing import Iterator, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..config import DOWNLOAD_DIR
+from ..core.archive import ArchiveEntry, iter_tar, iter_zip
+from .download import active_tasks, running_downloaders, task_results
+from .files import StreamTransferResponse, content_disposition
+
+router = APIRouter(prefix="/api/playlists", tags=["playlists"])
+
+# Seconds between checks for newly finished items of a running playlist
+ARCHIVE_POLL_INTERVAL = 1.0
+
+# Partial and bookkeeping files yt-dlp leaves next to the media
+INCOMPLETE_SUFFIXES = (".part", ".ytdl", ".temp")
+
+
+def _arcname(path: Path) -> Optional[str]:
+    """Archive name relative to DOWNLOAD_DIR, or None for files outside it"""
+    try:
+        return path.resolve().relative_to(DOWNLOAD_DIR.resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+def _task_entries(task_id: str) -> Iterator[ArchiveEntry]:
+    """
+    Yield a task's files as they finish, until the task has ended.
+
+    Items reach downloaded_files through yt-dlp's post_hooks once they are
+    fully post-processed, so the archive can be sent while later items are
+    still downloading.
+    """
+    sent = set()
+    while True:
+        finished = active_tasks[task_id].status in ("completed", "failed")
+        downloader = running_downloaders.get(task_id)
+        if downloader is not None:
+            files = list(downloader.downloaded_files)
+        else:
+            files = task_results.get(task_id, {}).get("files", [])
+
+        for filepath in files:
+            path = Path(filepath)
+            arcname = _arcname(path)
+            if filepath in sent or arcname is None or not path.is_file():
+                continue
+            sent.add(filepath)
+            yield path, arcname
+
+        if finished:
+            return
+        time.sleep(ARCHIVE_POLL_INTERVAL)
+
+
+def _directory_entries(directory: Path) -> Iterator[ArchiveEntry]:
+    """Yield the finished files of a playlist directory"""
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.name.startswith(".") or path.name.endswith(INCOMPLETE_SUFFIXES):
+            continue
+        yield path, _arcname(path)
+
+
+def _playlist_directory(playlist_id: str) -> Optional[Path]:
+    """A playlist folder directly inside DOWNLOAD_DIR"""
+    root = DOWNLOAD_DIR.resolve()
+    directory = (root / playlist_id).resolve()
+    if directory.parent != root or not directory.is_dir():
+        return None
+    return directory
+
+
+@router.get("/{playlist_id}/archive")
+async def get_playlist_archive(
+    playlist_id: str,
+    archive_format: Literal["zip", "tar"] = Query(default="zip", alias="format"),
+):
+    """
+    Stream a playlist as one ZIP (stored) or TAR archive.
+
+    playlist_id is the task id of a playlist download, which may still be
+    running, or the name of a playlist folder in the download directory.
+    The archive is generated while it is sent: memory use is constant and
+    no archive file is written.
+    """
+    if playlist_id in active_tasks:
+        entries = _task_entries(playlist_id)
+        name = task_results.get(playlist_id, {}).get("playlist") or playlist_id
+    else:
+        directory = _playlist_directory(playlist_id)
+        if directory is None:
+            raise HTTPException(status_code=404, detail="Playlist not found")
+        entries = _directory_entries(directory)
+        name = directory.name
+
+    if archive_format == "zip":
+        body, media_type = iter_zip(entries), "application/zip"
+    else:
+        body, media_type = iter_tar(entries), "application/x-tar"
+
+    return StreamTransferResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": content_disposition(f"{name}.{archive_format}")},
+    )
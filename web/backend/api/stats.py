@@ -10,7 +10,7 @@ router = APIRouter(prefix="/api/stats", tags=["stats"])
 @router.get("/", response_model=StatsResponse)
 async def get_stats():
     """Get download statistics"""
-    from ..core import DownloadHistory, CORE_AVAILABLE
+    from ..core import get_downloader_context, CORE_AVAILABLE
 
     if not CORE_AVAILABLE:
         return StatsResponse(
@@ -23,7 +23,7 @@ async def get_stats():
             by_platform={}
         )
 
-    history_db = DownloadHistory()
+    history_db = get_downloader_context().history
     raw_stats = history_db.get_stats()
 
     # Map raw stats to response model
@@ -62,12 +62,12 @@ def _format_bytes(bytes_size: int) -> str:
 @router.get("/by-platform", response_model=dict)
 async def get_stats_by_platform():
     """Get statistics grouped by platform"""
-    from ..core import DownloadHistory, CORE_AVAILABLE
+    from ..core import get_downloader_context, CORE_AVAILABLE
 
     if not CORE_AVAILABLE:
         return {}
 
-    history_db = DownloadHistory()
+    history_db = get_downloader_context().history
     raw_stats = history_db.get_stats()
 
     return raw_stats.get("by_platform", {})
@@ -33,10 +33,120 @@ DEFAULT_QUALITY: str = os.getenv("DEFAULT_QUALITY", "1080")
 DEFAULT_COOKIES_BROWSER: str = os.getenv("DEFAULT_COOKIES_BROWSER", "chrome")
 MAX_FILE_SIZE_WARNING: int = int(os.getenv("MAX_FILE_SIZE_WARNING", "2147483648"))  # 2GB
 
+# Download scheduling
+MAX_CONCURRENT_DOWNLOADS: int = int(os.getenv("MAX_CONCURRENT_DOWNLOADS", "3"))
+
+
+def _parse_key_map(value: str, cast):
+    """Parse "key1=value1,key2=value2" into a dict"""
+    result = {}
+    for item in value.split(","):
+        key, sep, raw = item.strip().rpartition("=")
+        if sep and key:
+            result[key] = cast(raw)
+    return result
+
+
+# Fair queuing across API keys: relative share of worker slots per key and
+# per-key concurrency caps ("key=value,..."); unlisted keys get weight 1
+SCHEDULER_KEY_WEIGHTS: dict[str, float] = _parse_key_map(os.getenv("SCHEDULER_KEY_WEIGHTS", ""), float)
+SCHEDULER_KEY_MAX_CONCURRENT: dict[str, int] = _parse_key_map(os.getenv("SCHEDULER_KEY_MAX_CONCURRENT", ""), int)
+# Cap for keys without an explicit entry, 0 = no cap beyond MAX_CONCURRENT_DOWNLOADS
+SCHEDULER_DEFAULT_KEY_MAX_CONCURRENT: int = int(os.getenv("SCHEDULER_DEFAULT_KEY_MAX_CONCURRENT", "0"))
+# "fair" (weighted fair share per key) or "edf" (earliest deadline first, then fair share)
+SCHEDULER_POLICY: str = os.getenv("SCHEDULER_POLICY", "fair")
+# Maximum running time for requests that don't set max_duration (seconds, 0 = none)
+DOWNLOAD_MAX_DURATION: float = float(os.getenv("DOWNLOAD_MAX_DURATION", "0"))
+# A download still running this long past its deadline or max duration is
+# abandoned and its worker replaced
+DOWNLOAD_TIMEOUT_GRACE: float = float(os.getenv("DOWNLOAD_TIMEOUT_GRACE", "30"))
+# Where downloads run: "thread" (scheduler threads inside the web process) or
+# "process" (one worker process per scheduler worker, so extractor and
+# ffmpeg work can't stall or crash the API)
+DOWNLOAD_EXECUTOR: str = os.getenv("DOWNLOAD_EXECUTOR", "thread")
+# Replace a worker process after this many downloads (0 = never) or once its
+# peak memory exceeds WORKER_MAX_MEMORY_MB (0 = no limit)
+WORKER_MAX_JOBS: int = int(os.getenv("WORKER_MAX_JOBS", "50"))
+WORKER_MAX_MEMORY_MB: int = int(os.getenv("WORKER_MAX_MEMORY_MB", "0"))
+# How worker processes start: "forkserver" forks them from a process that
+# has already imported yt-dlp (falls back to "spawn" where fork is unavailable)
+WORKER_START_METHOD: str = os.getenv("WORKER_START_METHOD", "forkserver")
+# Staged pipeline: extraction, transfer, post-processing and history writes
+# run in separate worker pools so consecutive downloads overlap; the transfer
+# stage uses MAX_CONCURRENT_DOWNLOADS workers
+DOWNLOAD_PIPELINE: bool = os.getenv("DOWNLOAD_PIPELINE", "false").lower() == "true"
+PIPELINE_EXTRACT_WORKERS: int = int(os.getenv("PIPELINE_EXTRACT_WORKERS", "2"))
+PIPELINE_POSTPROCESS_WORKERS: int = int(os.getenv("PIPELINE_POSTPROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PIPELINE_RECORD_WORKERS: int = int(os.getenv("PIPELINE_RECORD_WORKERS", "1"))
+# Jobs waiting in front of each stage before the previous stage blocks
+PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# Post-processing pool: ffmpeg work (audio extraction, thumbnail conversion)
+# runs in POSTPROCESS_WORKERS separate processes, so a download's scheduler
+# slot is freed as soon as its file is on disk; single downloads are
+# post-processed ahead of batch items
+POSTPROCESS_POOL: bool = os.getenv("POSTPROCESS_POOL", "false").lower() == "true"
+POSTPROCESS_WORKERS: int = int(os.getenv("POSTPROCESS_WORKERS", str(os.cpu_count() or 2)))
+# Playlist downloads extract the next N entries in the background while the
+# current one downloads (0 = off)
+PLAYLIST_PREFETCH_DEPTH: int = int(os.getenv("PLAYLIST_PREFETCH_DEPTH", "0"))
+BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+# Seconds a finished download answers identical requests (while its file exists)
+DEDUP_COMPLETED_TTL: int = int(os.getenv("DEDUP_COMPLETED_TTL", "3600"))
+
+# Per-platform adaptive concurrency: halved on HTTP 429/503 (and paused for
+# Retry-After or PLATFORM_THROTTLE_COOLDOWN seconds), +1 after sustained success
+PLATFORM_CONCURRENCY_INITIAL: int = int(os.getenv("PLATFORM_CONCURRENCY_INITIAL", "2"))
+PLATFORM_CONCURRENCY_MIN: int = int(os.getenv("PLATFORM_CONCURRENCY_MIN", "1"))
+PLATFORM_CONCURRENCY_MAX: int = int(os.getenv("PLATFORM_CONCURRENCY_MAX", str(MAX_CONCURRENT_DOWNLOADS)))
+PLATFORM_THROTTLE_COOLDOWN: float = float(os.getenv("PLATFORM_THROTTLE_COOLDOWN", "30"))
+# Per-platform circuit breaker: open after CIRCUIT_FAILURE_RATE of the last
+# CIRCUIT_WINDOW attempts failed (at least CIRCUIT_MIN_REQUESTS), hold queued
+# jobs for CIRCUIT_OPEN_SECONDS, then let one probe through
+CIRCUIT_WINDOW: int = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_MIN_REQUESTS: int = int(os.getenv("CIRCUIT_MIN_REQUESTS", "5"))
+CIRCUIT_FAILURE_RATE: float = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "60"))
+# Stall watchdog: restart a transfer slower than STALL_MIN_SPEED (bytes/s,
+# accepts K/M suffixes) for STALL_WINDOW seconds, or with no data for
+# STALL_TIMEOUT seconds, at most STALL_MAX_RESTARTS times per file (0 = off)
+STALL_MIN_SPEED: str = os.getenv("STALL_MIN_SPEED", "16K")
+STALL_WINDOW: float = float(os.getenv("STALL_WINDOW", "30"))
+STALL_TIMEOUT: float = float(os.getenv("STALL_TIMEOUT", "60"))
+STALL_MAX_RESTARTS: int = int(os.getenv("STALL_MAX_RESTARTS", "3"))
+
+# File delivery (GET /api/files/...)
+FILES_MAX_CONCURRENT: int = int(os.getenv("FILES_MAX_CONCURRENT", "8"))
+FILES_CHUNK_SIZE: int = int(os.getenv("FILES_CHUNK_SIZE", str(1024 * 1024)))  # bytes per read
+# Hand transfers to a reverse proxy: "X-Accel-Redirect" (nginx) or "X-Sendfile"
+FILES_SENDFILE_HEADER: str = os.getenv("FILES_SENDFILE_HEADER", "")
+FILES_ACCEL_PREFIX: str = os.getenv("FILES_ACCEL_PREFIX", "/protected-downloads")
+
+# delivery=stream: bytes relayed per read and chunks buffered per client
+STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", str(256 * 1024)))
+STREAM_BUFFER_CHUNKS: int = int(os.getenv("STREAM_BUFFER_CHUNKS", "16"))
+
+# Bandwidth limits in bytes/s with K/M/G suffixes ("5M"), 0 = unlimited
+BANDWIDTH_GLOBAL: str = os.getenv("BANDWIDTH_GLOBAL", "0")
+BANDWIDTH_PER_TASK: str = os.getenv("BANDWIDTH_PER_TASK", "0")
+BANDWIDTH_PER_PLATFORM: str = os.getenv("BANDWIDTH_PER_PLATFORM", "")  # "YouTube=3M,Bilibili=1M"
+BANDWIDTH_SCHEDULE: str = os.getenv("BANDWIDTH_SCHEDULE", "")  # "00:00-07:00=0,09:00-18:00=2M"
+# File shared by every process on the host so they split one global budget
+BANDWIDTH_SHARED_FILE: str = os.getenv("BANDWIDTH_SHARED_FILE", "")
+
+# Format listing (metadata extraction runs in a worker pool)
+FORMATS_MAX_WORKERS: int = int(os.getenv("FORMATS_MAX_WORKERS", "4"))
+FORMATS_CACHE_TTL: int = int(os.getenv("FORMATS_CACHE_TTL", "300"))  # seconds
+FORMATS_BULK_CONCURRENCY: int = int(os.getenv("FORMATS_BULK_CONCURRENCY", "4"))
+FORMATS_BULK_MAX_URLS: int = int(os.getenv("FORMATS_BULK_MAX_URLS", "50"))
+
 # Retry settings
 MAX_RETRY_ATTEMPTS: int = int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
 INITIAL_RETRY_DELAY: int = int(os.getenv("INITIAL_RETRY_DELAY", "5"))
 RETRY_BACKOFF_MULTIPLIER: int = int(os.getenv("RETRY_BACKOFF_MULTIPLIER", "2"))
+RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "300"))  # seconds
+# Retries may use at most this share of recent attempts (at least RETRY_BUDGET_MIN per minute)
+RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MIN: int = int(os.getenv("RETRY_BUDGET_MIN", "10"))
 
 # Security Settings
 # API Key Authentication (optional, disabled by default)
@@ -1,6 +1,10 @@
 """
 Bingo Downloader Web - Core Module
 Reuses core logic from skill/scripts/download.py
+
+The download module is imported lazily on first access of one of the names
+below, so endpoints that never touch the downloader (health, formats cache
+hits, static pages) don't pay for loading it.
 """
 import sys
 from pathlib import Path
@@ -10,21 +14,145 @@ skill_scripts_path = Path(__file__).resolve().parent.parent.parent.parent / "ski
 if str(skill_scripts_path) not in sys.path:
     sys.path.insert(0, str(skill_scripts_path))
 
-try:
-    from download import (
-        BingoDownloader,
-        DownloadHistory,
-        SmartFormatSelector,
-        SmartRetry,
-        ConfigPresets,
-        UserPreferences
-    )
-    CORE_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: Could not import core modules: {e}")
-    CORE_AVAILABLE = False
-    BingoDownloader = None
-    DownloadHistory = None
+_CORE_NAMES = (
+    "BingoDownloader",
+    "DownloadHistory",
+    "SmartFormatSelector",
+    "SmartRetry",
+    "ConfigPresets",
+    "UserPreferences",
+    "DownloaderContext",
+    "BandwidthGovernor",
+    "AdaptiveConcurrency",
+    "CircuitBreaker",
+    "RetryBudget",
+    "DownloadRetry",
+    "CircuitOpenError",
+    "StallWatchdog",
+    "DownloadPipeline",
+    "MetadataPrefetcher",
+    "PostProcessPool",
+    "FeedbackRelay",
+    "ForkServer",
+    "platform_key",
+    "parse_rate",
+)
+
+_context = None
+
+
+def _load_core():
+    """Import download.py once and publish its classes on this module"""
+    core = globals()
+    try:
+        import download
+    except ImportError as e:
+        print(f"Warning: Could not import core modules: {e}")
+        core["CORE_AVAILABLE"] = False
+        for name in _CORE_NAMES:
+            core[name] = None
+        return
+
+    core["CORE_AVAILABLE"] = True
+    for name in _CORE_NAMES:
+        core[name] = getattr(download, name)
+
+
+def get_downloader_context():
+    """
+    Process-wide DownloaderContext shared by every download and endpoint.
+
+    Created by the app lifespan on startup (or on first use); None when the
+    core modules are unavailable.
+    """
+    global _context
+    if _context is None:
+        from . import (
+            CORE_AVAILABLE, DownloaderContext, BandwidthGovernor,
+            AdaptiveConcurrency, CircuitBreaker, SmartRetry, RetryBudget,
+            StallWatchdog, DownloadPipeline, MetadataPrefetcher, PostProcessPool,
+            parse_rate,
+        )
+        from ..config import (
+            BANDWIDTH_GLOBAL, BANDWIDTH_PER_TASK, BANDWIDTH_PER_PLATFORM,
+            BANDWIDTH_SCHEDULE, BANDWIDTH_SHARED_FILE,
+            PLATFORM_CONCURRENCY_INITIAL, PLATFORM_CONCURRENCY_MIN,
+            PLATFORM_CONCURRENCY_MAX, PLATFORM_THROTTLE_COOLDOWN,
+            CIRCUIT_WINDOW, CIRCUIT_MIN_REQUESTS, CIRCUIT_FAILURE_RATE, CIRCUIT_OPEN_SECONDS,
+            MAX_RETRY_ATTEMPTS, INITIAL_RETRY_DELAY, RETRY_BACKOFF_MULTIPLIER,
+            RETRY_MAX_DELAY, RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN,
+            STALL_MIN_SPEED, STALL_WINDOW, STALL_TIMEOUT, STALL_MAX_RESTARTS,
+            MAX_CONCURRENT_DOWNLOADS, DOWNLOAD_PIPELINE, PIPELINE_EXTRACT_WORKERS,
+            PIPELINE_POSTPROCESS_WORKERS, PIPELINE_RECORD_WORKERS, PIPELINE_QUEUE_SIZE,
+            PLAYLIST_PREFETCH_DEPTH, POSTPROCESS_POOL, POSTPROCESS_WORKERS,
+        )
+        if CORE_AVAILABLE:
+            bandwidth = BandwidthGovernor.from_spec(
+                global_rate=BANDWIDTH_GLOBAL,
+                task_rate=BANDWIDTH_PER_TASK,
+                platform_rates=BANDWIDTH_PER_PLATFORM,
+                schedule=BANDWIDTH_SCHEDULE,
+                shared_path=BANDWIDTH_SHARED_FILE or None,
+            )
+            concurrency = AdaptiveConcurrency(
+                initial=PLATFORM_CONCURRENCY_INITIAL,
+                min_limit=PLATFORM_CONCURRENCY_MIN,
+                max_limit=PLATFORM_CONCURRENCY_MAX,
+                cooldown=PLATFORM_THROTTLE_COOLDOWN,
+            )
+            breaker = CircuitBreaker(
+                window=CIRCUIT_WINDOW,
+                min_requests=CIRCUIT_MIN_REQUESTS,
+                failure_rate=CIRCUIT_FAILURE_RATE,
+                open_seconds=CIRCUIT_OPEN_SECONDS,
+            )
+            retry_manager = SmartRetry(
+                max_attempts=MAX_RETRY_ATTEMPTS,
+                initial_delay=INITIAL_RETRY_DELAY,
+                backoff_multiplier=RETRY_BACKOFF_MULTIPLIER,
+                max_delay=RETRY_MAX_DELAY,
+                budget=RetryBudget(ratio=RETRY_BUDGET_RATIO, min_retries=RETRY_BUDGET_MIN),
+            )
+            watchdog = StallWatchdog(
+                min_speed=parse_rate(STALL_MIN_SPEED),
+                window=STALL_WINDOW,
+                timeout=STALL_TIMEOUT,
+                max_restarts=STALL_MAX_RESTARTS,
+            )
+            pipeline = None
+            if DOWNLOAD_PIPELINE:
+                pipeline = DownloadPipeline(
+                    extract_workers=PIPELINE_EXTRACT_WORKERS,
+                    download_workers=MAX_CONCURRENT_DOWNLOADS,
+                    postprocess_workers=PIPELINE_POSTPROCESS_WORKERS,
+                    record_workers=PIPELINE_RECORD_WORKERS,
+                    queue_size=PIPELINE_QUEUE_SIZE,
+                )
+            prefetcher = None
+            if PLAYLIST_PREFETCH_DEPTH > 0:
+                prefetcher = MetadataPrefetcher(depth=PLAYLIST_PREFETCH_DEPTH)
+            postprocessing = None
+            if POSTPROCESS_POOL:
+                postprocessing = PostProcessPool(workers=POSTPROCESS_WORKERS)
+            _context = DownloaderContext(
+                retry_manager=retry_manager,
+                bandwidth=bandwidth,
+                concurrency=concurrency,
+                breaker=breaker,
+                watchdog=watchdog,
+                pipeline=pipeline,
+                prefetcher=prefetcher,
+                postprocessing=postprocessing,
+            )
+    return _context
+
+
+def __getattr__(name: str):
+    if name in _CORE_NAMES or name == "CORE_AVAILABLE":
+        _load_core()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "BingoDownloader",
@@ -33,5 +161,21 @@ __all__ = [
     "SmartRetry",
     "ConfigPresets",
     "UserPreferences",
+    "DownloaderContext",
+    "BandwidthGovernor",
+    "AdaptiveConcurrency",
+    "CircuitBreaker",
+    "RetryBudget",
+    "DownloadRetry",
+    "CircuitOpenError",
+    "StallWatchdog",
+    "DownloadPipeline",
+    "MetadataPrefetcher",
+    "PostProcessPool",
+    "FeedbackRelay",
+    "ForkServer",
+    "platform_key",
+    "parse_rate",
     "CORE_AVAILABLE",
+    "get_downloader_context",
 ]
@@ -0,0 +1,99 @@
+"""
+Bingo Downloader Web - Streaming Archives
+Builds ZIP (stored) and TAR archives on the fly with constant memory
+"""
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+# (file on disk, name inside the archive)
+ArchiveEntry = Tuple[Path, str]
+
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkSink:
+    """Write-only file object whose output is drained after every write"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        """Yield what was written since the last drain (if anything)"""
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def _read_chunks(path: Path, chunk_size: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_zip(entries: Iterable[ArchiveEntry], chunk_size: int = ARCHIVE_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of entries without compression.
+
+    Media is already compressed, so entries are stored as-is. The archive
+    is written to a non-seekable sink, so sizes and CRCs go into data
+    descriptors and ZIP64 records are used for large files. Entries are
+    pulled lazily, which lets the caller keep adding files while the
+    archive is being sent.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for path, arcname in entries:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zipfile.ZIP_STORED
+            with zf.open(info, mode="w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dest:
+                yield from sink.drain()
+                for chunk in _read_chunks(path, chunk_size):
+                    dest.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    # Central directory
+    yield from sink.drain()
+
+
+def iter_tar(entries: Iterable[ArchiveEntry], chunk_size: int = ARCHIVE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield an uncompressed POSIX (pax) TAR archive of entries"""
+    for path, arcname in entries:
+        stat = os.stat(path)
+        info = tarfile.TarInfo(arcname)
+        info.size = stat.st_size
+        info.mtime = int(stat.st_mtime)
+        info.mode = 0o644
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+
+        sent = 0
+        for chunk in _read_chunks(path, chunk_size):
+            # The header announced st_size; never send more than that
+            chunk = chunk[:info.size - sent]
+            sent += len(chunk)
+            yield chunk
+            if sent >= info.size:
+                break
+        if sent < info.size:
+            raise OSError(f"{path} shrank while being archived")
+
+        remainder = info.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+    # End-of-archive marker
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE)
@@ -0,0 +1,117 @@
+"""
+Bingo Downloader Web - Download Deduplication
+Fingerprints download requests so identical submissions share one task
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change what gets downloaded
+TRACKING_PARAMS = {"si", "feature", "pp", "fbclid", "gclid", "spm_id_from", "vd_source", "share_source"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalise a URL so trivially different spellings compare equal.
+
+    Lowercases scheme and host, drops "www.", fragments and tracking
+    parameters, sorts the query string and rewrites youtu.be short links.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    ]
+
+    # youtu.be/<id> and m.youtube.com are the same video as youtube.com/watch?v=<id>
+    if host == "youtu.be" and path != "/":
+        query.append(("v", path.lstrip("/")))
+        host, path = "youtube.com", "/watch"
+    elif host == "m.youtube.com":
+        host = "youtube.com"
+
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def _stable_opts(opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop callables (progress hooks etc.) that don't affect the output"""
+    return {k: v for k, v in opts.items() if not callable(v) and not k.endswith("_hooks")}
+
+
+def download_fingerprint(url: str, ydl_opts: Dict[str, Any]) -> str:
+    """Fingerprint a download from its canonical URL and effective yt-dlp options"""
+    payload = json.dumps(
+        {"url": canonicalize_url(url), "opts": _stable_opts(ydl_opts)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DownloadDeduplicator:
+    """
+    Registry of in-flight and recently completed downloads by fingerprint.
+
+    claim() either registers a new task as the owner of a fingerprint or
+    returns the task id that already owns it, so duplicate submissions
+    attach to the same progress and result.
+    """
+
+    def __init__(self, completed_ttl: float = 3600):
+        self.completed_ttl = completed_ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, str] = {}
+        self._completed: Dict[str, Tuple[str, str, float]] = {}
+        self._by_task: Dict[str, str] = {}
+
+    def claim(self, fingerprint: str, task_id: str) -> Optional[str]:
+        """Return the task already serving fingerprint, or register task_id"""
+        with self._lock:
+            existing = self._inflight.get(fingerprint)
+            if existing is not None:
+                return existing
+
+            completed = self._completed.get(fingerprint)
+            if completed is not None:
+                done_task, filepath, finished_at = completed
+                fresh = time.monotonic() - finished_at < self.completed_ttl
+                if fresh and filepath and os.path.exists(filepath):
+                    return done_task
+                del self._completed[fingerprint]
+
+            self._inflight[fingerprint] = task_id
+            self._by_task[task_id] = fingerprint
+            return None
+
+    def complete(self, task_id: str, filepath: Optional[str]):
+        """Mark a task finished; remember it while its file exists"""
+        with self._lock:
+            fingerprint = self._by_task.pop(task_id, None)
+            if fingerprint is None:
+                return
+            self._inflight.pop(fingerprint, None)
+            if filepath and self.completed_ttl > 0:
+                self._completed[fingerprint] = (task_id, filepath, time.monotonic())
+
+    def release(self, task_id: str):
+        """Forget a failed or cancelled task so the next submission retries"""
+        with self._lock:
+            fingerprint = self._by_task.pop(task_id, None)
+            if fingerprint is not None and self._inflight.get(fingerprint) == task_id:
+                del self._inflight[fingerprint]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"inflight": len(self._inflight), "completed": len(self._completed)}
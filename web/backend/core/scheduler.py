@@ -0,0 +1,517 @@
+"""
+Bingo Downloader Web - Download Scheduler
+Concurrency-limited runner shared by single and batch download submissions
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+# Priority lanes, highest first: single downloads are served before batches
+LANES = ("interactive", "bulk")
+DEFAULT_OWNER = "anonymous"
+# fair: weighted fair share between owners; edf: earliest deadline first
+POLICIES = ("fair", "edf")
+# Weight of the newest sample in the per-platform duration/throughput averages
+ESTIMATE_SMOOTHING = 0.3
+
+
+class RetryLater(Exception):
+    """Raised by a job function to run the same job again after delay seconds"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        super().__init__(f"Retry in {delay:.0f}s")
+
+
+@dataclass
+class ScheduledJob:
+    """A unit of work waiting for (or running on) a worker thread"""
+    task_id: str
+    func: Callable[..., Any]
+    args: tuple = ()
+    batch_id: Optional[str] = None
+    lane: str = "interactive"
+    owner: str = DEFAULT_OWNER
+    platform: Optional[str] = None
+    holds_platform_slot: bool = False
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    # Retries wait in the queue until this monotonic time
+    not_before: float = 0.0
+    attempts: int = 0
+    # Monotonic deadline and maximum running time (seconds)
+    deadline: Optional[float] = None
+    timeout: Optional[float] = None
+    # Expected download size in bytes, for the duration estimate
+    size_hint: Optional[int] = None
+    # Called with the task id when the job is abandoned after its time limit
+    on_timeout: Optional[Callable[[str], Any]] = None
+    worker: Optional[threading.Thread] = None
+    abandoned: bool = False
+
+
+@dataclass
+class OwnerState:
+    """Fair-share bookkeeping for one submitter (API key or client)"""
+    weight: float = 1.0
+    max_running: int = 0  # 0 = only limited by the worker count
+    running: int = 0
+    started: int = 0
+    total_wait: float = 0.0
+    # Virtual time per lane: advances by 1/weight for each job started
+    vtime: Dict[str, float] = field(default_factory=dict)
+
+
+class DownloadScheduler:
+    """
+    Runs download jobs on a fixed number of worker threads.
+
+    Jobs wait in priority lanes (interactive before bulk). Within a lane
+    each owner has its own queue and the next job comes from the owner with
+    the smallest virtual time, which advances by 1/weight per started job:
+    owners get worker slots in proportion to their weights no matter how
+    many jobs each has queued. Owners at their concurrency cap are skipped.
+
+    With a platform concurrency controller attached, a job only starts when
+    its platform has a free slot and is not cooling down after throttling;
+    with a circuit breaker attached, jobs for a platform whose circuit is
+    open stay queued until it allows a half-open probe. An owner's later
+    jobs for other platforms may start ahead of a held-back one.
+
+    A job that raises RetryLater goes back to the front of its owner's queue
+    with a not-before time; the worker moves on instead of sleeping through
+    the backoff.
+
+    Jobs may carry a deadline and a maximum running time. The job function
+    is expected to stop itself when it runs out of time; one still running
+    timeout_grace seconds later is abandoned: its slot is freed, on_timeout
+    is called and a fresh worker replaces the stuck thread, which is left
+    to finish in the background (Python threads cannot be killed). With the
+    "edf" policy, jobs with a deadline are started in order of their latest
+    start time (deadline minus estimated duration), those that can no
+    longer make it after those that can, and jobs without one after that in
+    fair-share order. Durations are estimated from the size hint and the
+    platform's measured throughput, or the platform's average run time.
+
+    Workers are started lazily on the first submission, so importing the
+    module has no side effects. Threads (rather than event-loop tasks) keep
+    the runner independent of whichever loop accepted the request.
+    """
+
+    def __init__(self, max_workers: int = 3,
+                 owner_weights: Optional[Dict[str, float]] = None,
+                 owner_max_running: Optional[Dict[str, int]] = None,
+                 default_max_running: int = 0,
+                 concurrency: Any = None,
+                 breaker: Any = None,
+                 policy: str = "fair",
+                 timeout_grace: float = 30.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.max_workers = max(1, max_workers)
+        self.owner_weights = dict(owner_weights or {})
+        self.owner_max_running = dict(owner_max_running or {})
+        self.default_max_running = default_max_running
+        # Per-platform controller (AdaptiveConcurrency): try_acquire/release/ready_in
+        self.concurrency = concurrency
+        # Per-platform CircuitBreaker: available/retry_in
+        self.breaker = breaker
+        self.policy = policy
+        self.timeout_grace = timeout_grace
+        self._queues: Dict[str, Dict[str, Deque[ScheduledJob]]] = {lane: {} for lane in LANES}
+        self._owners: Dict[str, OwnerState] = {}
+        # Virtual time of the last job started per lane
+        self._clock: Dict[str, float] = {lane: 0.0 for lane in LANES}
+        lock = threading.RLock()
+        self._cond = threading.Condition(lock)
+        # Wakes the reaper when a job with a time limit starts
+        self._limits = threading.Condition(lock)
+        self._reaper: Optional[threading.Thread] = None
+        self._workers: list[threading.Thread] = []
+        self._running: Dict[str, ScheduledJob] = {}
+        self._completed = 0
+        self._retried = 0
+        self._timed_out = 0
+        self._deadlines = {"met": 0, "missed": 0}
+        # Per-platform moving averages: run time (s) and throughput (bytes/s)
+        self._estimates: Dict[str, Dict[str, float]] = {}
+        self._shutdown = False
+        # Seconds until a platform cooldown ends, set by _pick when it blocks a job
+        self._wake_in: Optional[float] = None
+
+    def submit(self, task_id: str, func: Callable[..., Any], *args,
+               batch_id: Optional[str] = None, lane: str = "interactive",
+               owner: str = DEFAULT_OWNER, platform: Optional[str] = None,
+               deadline: Optional[float] = None, timeout: Optional[float] = None,
+               size_hint: Optional[int] = None,
+               on_timeout: Optional[Callable[[str], Any]] = None) -> ScheduledJob:
+        """
+        Queue func(*args) to run on the next free worker.
+
+        deadline is a Unix timestamp, timeout the maximum running time in
+        seconds.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane}")
+        if deadline is not None:
+            deadline = time.monotonic() + (deadline - time.time())
+        job = ScheduledJob(task_id=task_id, func=func, args=args,
+                           batch_id=batch_id, lane=lane, owner=owner, platform=platform,
+                           deadline=deadline, timeout=timeout, size_hint=size_hint,
+                           on_timeout=on_timeout)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            state = self._owner(owner)
+            queue = self._queues[lane].setdefault(owner, deque())
+            if not queue:
+                # An owner that was idle starts at the current virtual time
+                # instead of spending credit saved up while it had nothing queued
+                state.vtime[lane] = max(state.vtime.get(lane, 0.0), self._clock[lane])
+            queue.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def cancel(self, task_id: str) -> bool:
+        """Remove a job that has not started yet. Returns True if removed."""
+        with self._cond:
+            for owners in self._queues.values():
+                for owner, queue in owners.items():
+                    for job in queue:
+                        if job.task_id == task_id:
+                            queue.remove(job)
+                            if not queue:
+                                del owners[owner]
+                            return True
+        return False
+
+    def record_transfer(self, platform: Optional[str], nbytes: int, seconds: float):
+        """Feed the throughput estimate with a finished download"""
+        if not platform or nbytes <= 0 or seconds <= 0:
+            return
+        with self._cond:
+            self._smooth(platform, "throughput", nbytes / seconds)
+
+    def estimate(self, job: ScheduledJob) -> float:
+        """Expected running time of a job in seconds (0 when unknown)"""
+        with self._cond:
+            estimates = self._estimates.get(job.platform or "", {})
+            if job.size_hint and estimates.get("throughput"):
+                return job.size_hint / estimates["throughput"]
+            return estimates.get("duration", 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, worker utilisation and per-owner fair-share metrics"""
+        now = time.monotonic()
+        with self._cond:
+            owners = {}
+            for name, state in self._owners.items():
+                queued = {lane: len(self._queues[lane].get(name, ())) for lane in LANES}
+                oldest = [q[0].submitted_at for q in (self._queues[lane].get(name) for lane in LANES) if q]
+                owners[name] = {
+                    "weight": state.weight,
+                    "max_running": state.max_running,
+                    "running": state.running,
+                    "queued": queued,
+                    "started": state.started,
+                    "avg_wait": round(state.total_wait / state.started, 3) if state.started else 0.0,
+                    "oldest_wait": round(now - min(oldest), 3) if oldest else 0.0,
+                }
+            return {
+                "max_workers": self.max_workers,
+                "running": len(self._running),
+                "queued": sum(len(q) for owners in self._queues.values() for q in owners.values()),
+                "retrying": sum(
+                    1 for owners in self._queues.values() for q in owners.values()
+                    for job in q if job.not_before > now
+                ),
+                "retried": self._retried,
+                "completed": self._completed,
+                "timed_out": self._timed_out,
+                "policy": self.policy,
+                "deadlines": dict(self._deadlines),
+                "estimates": {
+                    platform: {k: round(v, 3) for k, v in values.items()}
+                    for platform, values in self._estimates.items()
+                },
+                "lanes": {
+                    lane: sum(len(q) for q in self._queues[lane].values()) for lane in LANES
+                },
+                "owners": owners,
+                "platforms": self.concurrency.stats() if self.concurrency is not None else {},
+                "circuits": self.breaker.stats() if self.breaker is not None else {},
+            }
+
+    def wake(self):
+        """Re-check queued jobs after a platform gate changed outside a job"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and let workers exit once the queue is empty"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            self._limits.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _owner(self, owner: str) -> OwnerState:
+        # Called with the condition held
+        state = self._owners.get(owner)
+        if state is None:
+            state = OwnerState(
+                weight=max(self.owner_weights.get(owner, 1.0), 0.001),
+                max_running=self.owner_max_running.get(owner, self.default_max_running),
+            )
+            self._owners[owner] = state
+        return state
+
+    def _ensure_workers(self):
+        # Called with the condition held
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"download-worker-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _wake_after(self, delay: float):
+        # Called with the condition held
+        if delay > 0 and (self._wake_in is None or delay < self._wake_in):
+            self._wake_in = delay
+
+    def _admissible(self, job: ScheduledJob, platforms: Dict[str, bool]) -> bool:
+        """Whether the job may start now (retry delay over, platform has room)"""
+        if job.not_before:
+            delay = job.not_before - time.monotonic()
+            if delay > 0:
+                self._wake_after(delay)
+                return False
+        if job.platform is None:
+            return True
+        if job.platform not in platforms:
+            allowed, delay = True, 0.0
+            if self.breaker is not None and not self.breaker.available(job.platform):
+                allowed, delay = False, self.breaker.retry_in(job.platform)
+            elif self.concurrency is not None and not self.concurrency.available(job.platform):
+                allowed, delay = False, self.concurrency.ready_in(job.platform)
+            # Wake up when the platform's cooldown or open circuit ends
+            self._wake_after(delay)
+            platforms[job.platform] = allowed
+        return platforms[job.platform]
+
+    def _pick_fair(self, lane: str, platforms: Dict[str, bool]):
+        """The admissible job of the owner with the smallest virtual time"""
+        best = None
+        for owner, queue in self._queues[lane].items():
+            state = self._owners[owner]
+            if state.max_running and state.running >= state.max_running:
+                continue
+            if best is not None and state.vtime[lane] >= best[0]:
+                continue
+            # The owner's oldest job whose platform has room
+            job = next((j for j in queue if self._admissible(j, platforms)), None)
+            if job is not None:
+                best = (state.vtime[lane], owner, queue, job)
+        return best
+
+    def _pick_edf(self, lane: str, platforms: Dict[str, bool]):
+        """The admissible job with a deadline that has to start first"""
+        now = time.monotonic()
+        best = None
+        for owner, queue in self._queues[lane].items():
+            state = self._owners[owner]
+            if state.max_running and state.running >= state.max_running:
+                continue
+            for job in queue:
+                if job.deadline is None or not self._admissible(job, platforms):
+                    continue
+                latest_start = job.deadline - self.estimate(job)
+                # Jobs that can still finish in time go first
+                key = (latest_start < now, latest_start, job.submitted_at)
+                if best is None or key < best[0]:
+                    best = (key, owner, queue, job)
+        return best
+
+    def _pick(self) -> Optional[ScheduledJob]:
+        """Pop the next job by lane priority, then deadline or weighted fair share"""
+        # Called with the condition held
+        self._wake_in = None
+        platforms: Dict[str, bool] = {}
+        for lane in LANES:
+            best = self._pick_edf(lane, platforms) if self.policy == "edf" else None
+            by_deadline = best is not None
+            if best is None:
+                best = self._pick_fair(lane, platforms)
+            if best is None:
+                continue
+
+            _, owner, queue, job = best
+            if job.platform is not None and self.concurrency is not None:
+                job.holds_platform_slot = self.concurrency.try_acquire(job.platform)
+            queue.remove(job)
+            if not queue:
+                del self._queues[lane][owner]
+            state = self._owners[owner]
+            vtime = state.vtime[lane]
+            if not by_deadline:
+                # Deadline picks still use up the owner's share but do not
+                # move the lane clock, which tracks the fair-share order
+                self._clock[lane] = vtime
+            state.vtime[lane] = vtime + 1.0 / state.weight
+            return job
+        return None
+
+    def _has_queued(self) -> bool:
+        return any(self._queues[lane] for lane in LANES)
+
+    def _next_job(self) -> Optional[ScheduledJob]:
+        with self._cond:
+            while True:
+                job = self._pick()
+                if job is not None:
+                    break
+                if self._shutdown and not self._has_queued():
+                    return None
+                # Nothing eligible: empty queues, every owner at its cap or
+                # every queued platform busy (cooling down, at its limit or
+                # with its circuit open)
+                self._cond.wait(self._wake_in)
+            job.started_at = time.monotonic()
+            state = self._owners[job.owner]
+            state.running += 1
+            state.started += 1
+            state.total_wait += job.started_at - job.submitted_at
+            job.worker = threading.current_thread()
+            self._running[job.task_id] = job
+            if self._hard_limit(job) is not None:
+                self._ensure_reaper()
+                self._limits.notify()
+            return job
+
+    def _worker_loop(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            retry_in = None
+            try:
+                job.func(*job.args)
+            except RetryLater as e:
+                retry_in = e.delay
+            except BaseException:
+                # Job functions record their own failures; never kill the worker
+                pass
+            finally:
+                with self._cond:
+                    if job.abandoned:
+                        # The reaper freed the slot and replaced this worker
+                        return
+                    self._running.pop(job.task_id, None)
+                    self._owners[job.owner].running -= 1
+                    if job.holds_platform_slot:
+                        self.concurrency.release(job.platform)
+                        job.holds_platform_slot = False
+                    if retry_in is not None and not self._shutdown:
+                        self._requeue(job, retry_in)
+                    else:
+                        self._completed += 1
+                        self._finished(job)
+                    # A finished job may free an owner that was at its cap
+                    self._cond.notify_all()
+
+    def _requeue(self, job: ScheduledJob, delay: float):
+        """Put a job back at the front of its owner's queue, due after delay"""
+        # Called with the condition held
+        job.attempts += 1
+        job.not_before = time.monotonic() + delay
+        job.started_at = None
+        queue = self._queues[job.lane].setdefault(job.owner, deque())
+        if not queue:
+            state = self._owner(job.owner)
+            state.vtime[job.lane] = max(state.vtime.get(job.lane, 0.0), self._clock[job.lane])
+        queue.appendleft(job)
+        self._retried += 1
+
+    def _smooth(self, platform: str, name: str, value: float):
+        # Called with the condition held
+        estimates = self._estimates.setdefault(platform, {})
+        previous = estimates.get(name)
+        estimates[name] = value if previous is None else \
+            previous + ESTIMATE_SMOOTHING * (value - previous)
+
+    def _finished(self, job: ScheduledJob):
+        """Record run time and deadline outcome of a job that ran to the end"""
+        # Called with the condition held
+        now = time.monotonic()
+        if job.platform is not None and job.started_at is not None:
+            self._smooth(job.platform, "duration", now - job.started_at)
+        if job.deadline is not None:
+            self._deadlines["met" if now <= job.deadline else "missed"] += 1
+
+    def _hard_limit(self, job: ScheduledJob) -> Optional[float]:
+        """Monotonic time after which a running job is abandoned"""
+        limits = [job.deadline] if job.deadline is not None else []
+        if job.timeout is not None and job.started_at is not None:
+            limits.append(job.started_at + job.timeout)
+        return min(limits) + self.timeout_grace if limits else None
+
+    def _ensure_reaper(self):
+        # Called with the condition held
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reaper_loop, name="download-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reaper_loop(self):
+        """Abandon running jobs that overran their time limit"""
+        while True:
+            expired = []
+            with self._cond:
+                if self._shutdown and not self._running:
+                    return
+                now = time.monotonic()
+                wait = None
+                for job in list(self._running.values()):
+                    limit = self._hard_limit(job)
+                    if limit is None:
+                        continue
+                    if limit <= now:
+                        self._abandon(job)
+                        expired.append(job)
+                    elif wait is None or limit - now < wait:
+                        wait = limit - now
+                if not expired:
+                    self._limits.wait(wait)
+                    continue
+            for job in expired:
+                if job.on_timeout is not None:
+                    try:
+                        job.on_timeout(job.task_id)
+                    except Exception:
+                        pass
+
+    def _abandon(self, job: ScheduledJob):
+        """Free a stuck job's slot and start a worker in its place"""
+        # Called with the condition held
+        job.abandoned = True
+        self._running.pop(job.task_id, None)
+        self._owners[job.owner].running -= 1
+        if job.holds_platform_slot:
+            self.concurrency.release(job.platform)
+            job.holds_platform_slot = False
+        self._timed_out += 1
+        if job.deadline is not None:
+            self._deadlines["missed"] += 1
+        if job.worker in self._workers:
+            self._workers.remove(job.worker)
+        if not self._shutdown:
+            self._ensure_workers()
+        self._cond.notify_all()
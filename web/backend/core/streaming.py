@@ -0,0 +1,65 @@
+"""
+Bingo Downloader Web - Streaming Relay
+Moves chunks from a blocking producer to an async HTTP response with bounded buffering
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import AsyncIterator, Iterator
+
+_DONE = object()
+
+
+async def relay_chunks(source: Iterator[bytes], max_chunks: int = 16) -> AsyncIterator[bytes]:
+    """
+    Iterate a blocking chunk iterator on a producer thread.
+
+    At most max_chunks chunks are buffered; when the client reads slower
+    than the upstream delivers, the producer blocks and stops pulling from
+    source, which in turn stops reading from the upstream connection. When
+    the consumer goes away (client disconnect) the producer closes source.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_chunks))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        try:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        except RuntimeError:
+            # Event loop already closed
+            return False
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def produce():
+        try:
+            for chunk in source:
+                if stop.is_set() or not put(chunk):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(e)
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="stream-relay", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,373 @@
+"""
+Bingo Downloader Web - Process Workers
+Runs downloads in worker processes that report back as JSON lines
+"""
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Minimum seconds between two progress events of a worker
+PROGRESS_INTERVAL = 0.5
+# Seconds a retiring worker gets to exit before it is killed
+WORKER_STOP_TIMEOUT = 5.0
+# Modules the fork server's zygote imports besides yt-dlp and download.py:
+# the job entry point and cookie decryption
+_PACKAGE = __name__.rsplit(".", 2)[0]
+WORKER_PRELOAD = (__name__, f"{_PACKAGE}.api.download", f"{_PACKAGE}.security.encryption")
+# Events that end a job; everything before them is progress
+TERMINAL_EVENTS = ("result", "retry", "error")
+# yt-dlp progress fields forwarded to the web process
+PROGRESS_FIELDS = ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "_speed_str", "_eta_str")
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process exited (or was killed) while running a job"""
+
+
+def _encode(event: Any) -> bytes:
+    return (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+
+def _decode(data: bytes) -> Any:
+    return json.loads(data.decode("utf-8"))
+
+
+def _peak_rss() -> int:
+    """Peak resident memory of this process in bytes (0 where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_job(job: Dict[str, Any], emit: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """Run one download in the worker and return its terminal event"""
+    from . import DownloadRetry, FeedbackRelay
+    from ..api.download import build_downloader
+    from ..models import DownloadRequest
+
+    last_progress = 0.0
+
+    def on_progress(d: dict):
+        nonlocal last_progress
+        now = time.monotonic()
+        if d.get("status") == "downloading" and now - last_progress < PROGRESS_INTERVAL:
+            return
+        last_progress = now
+        emit({"event": "progress", **{k: d.get(k) for k in PROGRESS_FIELDS}})
+
+    try:
+        downloader = build_downloader(DownloadRequest(**job["request"]))
+        downloader.attempt = job.get("attempt", 0)
+        # The worker is already a separate process; post-process in it
+        downloader.postprocessing = None
+        downloader.on_progress = on_progress
+        downloader.on_file = lambda path: emit({"event": "file", "path": path})
+        FeedbackRelay.wrap(downloader, emit)
+        result = downloader.download(job["url"]) or {"success": True}
+        return {"event": "result", "result": result}
+    except DownloadRetry as e:
+        return {"event": "retry", "error": str(e.error), "delay": e.delay, "attempt": e.attempt}
+    except SystemExit:
+        # The CLI downloader exits on failure
+        return {"event": "error", "error": "Download failed"}
+    except Exception as e:
+        return {"event": "error", "error": str(e)}
+
+
+def _worker_main(conn):
+    """Worker process: run jobs received on conn until the pipe closes or None arrives"""
+    from . import CORE_AVAILABLE, get_downloader_context
+
+    def emit(event: Dict[str, Any]):
+        conn.send_bytes(_encode(event))
+
+    # Pay for yt-dlp's imports and the context once, not on the first job
+    if CORE_AVAILABLE:
+        import yt_dlp  # noqa: F401
+        get_downloader_context()
+    emit({"event": "ready", "pid": os.getpid()})
+
+    while True:
+        try:
+            job = _decode(conn.recv_bytes())
+        except EOFError:
+            return
+        if job is None:
+            return
+        event = _run_job(job, emit)
+        event["max_rss"] = _peak_rss()
+        emit(event)
+
+
+class _Worker:
+    """Web-process handle of one worker process"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+        self.max_rss = 0
+        self.task_id: Optional[str] = None
+        self.kill_reason: Optional[str] = None
+
+
+class ProcessWorkerPool:
+    """
+    Download worker processes, started on demand and reused between jobs.
+
+    Each job is one download attempt. The worker sends progress, finished
+    files and throttling/failure feedback as JSON lines while it runs, then
+    a result, retry or error line. A worker is replaced after
+    max_jobs_per_worker jobs or once its peak memory exceeds max_rss, so
+    leaks in extractors don't accumulate; a crash only fails the job that
+    was running.
+
+    With start_method="forkserver" workers are forked from a zygote that
+    has already imported yt-dlp and the download code, so replacing a
+    worker takes milliseconds instead of a fresh interpreter start; this
+    makes max_jobs_per_worker=1 (a clean process per job) affordable.
+    Where fork isn't available the pool falls back to spawn.
+    """
+
+    def __init__(self, size: int, max_jobs_per_worker: int = 50, max_rss: int = 0,
+                 start_method: str = "forkserver"):
+        self.size = max(1, size)
+        self.max_jobs_per_worker = max_jobs_per_worker  # 0 = never recycle by job count
+        self.max_rss = max_rss  # bytes, 0 = no limit
+        self.start_method = start_method
+        self._mp = multiprocessing.get_context("spawn" if start_method == "forkserver" else start_method)
+        self._fork_server = None  # Started with the first worker
+        self._cond = threading.Condition()
+        self._idle: List[_Worker] = []
+        self._running: Dict[str, _Worker] = {}
+        self._count = 0  # Started and not yet retired
+        self.started = 0
+        self.jobs = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.killed = 0
+
+    def _get_fork_server(self):
+        """The zygote workers are forked from, or None when falling back to spawn"""
+        with self._cond:
+            if self._fork_server is None and self.start_method == "forkserver":
+                from . import ForkServer
+                if ForkServer is not None and ForkServer.available():
+                    self._fork_server = ForkServer(preload=WORKER_PRELOAD)
+                else:
+                    self.start_method = "spawn"
+            return self._fork_server
+
+    def _start(self) -> _Worker:
+        fork_server = self._get_fork_server()
+        if fork_server is not None:
+            process, parent = fork_server.fork(_worker_main)
+        else:
+            parent, child = self._mp.Pipe()
+            process = self._mp.Process(target=_worker_main, args=(child,), name="download-worker", daemon=True)
+            process.start()
+            child.close()
+        with self._cond:
+            self.started += 1
+        return _Worker(process, parent)
+
+    def _checkout(self, task_id: str) -> _Worker:
+        with self._cond:
+            while True:
+                # Drop idle workers that died in the meantime (OOM killer, signals)
+                while self._idle and not self._idle[-1].process.is_alive():
+                    self._idle.pop().conn.close()
+                    self._count -= 1
+                    self.crashed += 1
+                if self._idle or self._count < self.size:
+                    break
+                self._cond.wait()
+            worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                self._count += 1
+        if worker is None:
+            try:
+                worker = self._start()
+            except Exception:
+                with self._cond:
+                    self._count -= 1
+                    self._cond.notify()
+                raise
+        with self._cond:
+            worker.task_id = task_id
+            self._running[task_id] = worker
+        return worker
+
+    def _worn_out(self, worker: _Worker) -> bool:
+        if self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+            return True
+        return bool(self.max_rss and worker.max_rss > self.max_rss)
+
+    def _checkin(self, worker: _Worker, healthy: bool):
+        with self._cond:
+            self._running.pop(worker.task_id, None)
+            worker.task_id = None
+            retire = not healthy or self._worn_out(worker)
+            if retire:
+                self._count -= 1
+                if healthy:
+                    self.recycled += 1
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+        if retire:
+            self._stop(worker)
+
+    def _stop(self, worker: _Worker):
+        """Ask a worker to exit after its current job, killing it if it doesn't"""
+        if worker.process.is_alive():
+            try:
+                worker.conn.send_bytes(_encode(None))
+            except OSError:
+                pass
+            worker.process.join(WORKER_STOP_TIMEOUT)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        worker.conn.close()
+
+    def run(self, task_id: str, job: Dict[str, Any],
+            on_event: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        Run a job on a worker and return its terminal event.
+
+        Blocks the calling thread (a scheduler worker) while the download
+        runs; on_event receives every event before the last one. Raises
+        WorkerCrashed if the process dies or is killed mid-job.
+        """
+        worker = self._checkout(task_id)
+        healthy = False
+        try:
+            worker.conn.send_bytes(_encode(job))
+            while True:
+                event = _decode(worker.conn.recv_bytes())
+                if event.get("event") in TERMINAL_EVENTS:
+                    worker.jobs += 1
+                    worker.max_rss = event.get("max_rss", 0)
+                    healthy = True
+                    return event
+                on_event(event)
+        except (EOFError, OSError) as e:
+            worker.process.join(1)
+            with self._cond:
+                if worker.kill_reason:
+                    self.killed += 1
+                else:
+                    self.crashed += 1
+            exitcode = worker.process.exitcode
+            raise WorkerCrashed(
+                worker.kill_reason
+                or "Download worker exited unexpectedly"
+                + (f" (exit code {exitcode})" if exitcode is not None else f" (pid {worker.process.pid})")
+            ) from e
+        finally:
+            with self._cond:
+                self.jobs += 1
+            self._checkin(worker, healthy)
+
+    def kill(self, task_id: str, reason: str) -> bool:
+        """Kill the worker running task_id; its run() raises WorkerCrashed(reason)"""
+        with self._cond:
+            worker = self._running.get(task_id)
+            if worker is None:
+                return False
+            worker.kill_reason = reason
+        worker.process.kill()
+        return True
+
+    def close(self):
+        """Stop idle workers, kill running ones and stop the fork server"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            running = list(self._running.values())
+            self._count -= len(idle)
+        for worker in running:
+            worker.kill_reason = "Server shutting down"
+            worker.process.kill()
+        for worker in idle:
+            self._stop(worker)
+        if self._fork_server is not None:
+            self._fork_server.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker counts, jobs run, recycling and per-process memory"""
+        with self._cond:
+            workers = self._idle + list(self._running.values())
+            return {
+                "size": self.size,
+                "start_method": self.start_method,
+                "workers": self._count,
+                "busy": len(self._running),
+                "jobs": self.jobs,
+                "started": self.started,
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+                "killed": self.killed,
+                "max_jobs_per_worker": self.max_jobs_per_worker,
+                "fork_server": self._fork_server.stats() if self._fork_server is not None else None,
+                "processes": [
+                    {"pid": w.process.pid, "task_id": w.task_id, "jobs": w.jobs, "max_rss": w.max_rss}
+                    for w in workers
+                ],
+            }
+
+
+class RemoteDownload:
+    """
+    Stand-in for a BingoDownloader whose attempt runs in a worker process.
+
+    Offers what the API uses while a task runs: download(), the growing
+    downloaded_files list (playlist archives), on_progress and abort()
+    (timeouts). Throttling and failure feedback from the worker is applied
+    to this process's controllers so the scheduler sees it.
+    """
+
+    def __init__(self, pool: ProcessWorkerPool, task_id: str, request: Dict[str, Any],
+                 attempt: int = 0, controllers: Optional[Dict[str, Any]] = None):
+        self.pool = pool
+        self.task_id = task_id
+        self.request = request
+        self.attempt = attempt
+        self.controllers = controllers or {}
+        self.downloaded_files: List[str] = []
+        self.on_progress: Optional[Callable[[dict], None]] = None
+
+    def _on_event(self, event: Dict[str, Any]):
+        kind = event.get("event")
+        if kind == "progress" and self.on_progress is not None:
+            self.on_progress(event)
+        elif kind == "file":
+            self.downloaded_files.append(event["path"])
+        elif kind == "feedback":
+            from . import FeedbackRelay
+            FeedbackRelay.replay(event, self.controllers)
+
+    def download(self, url: str) -> Dict[str, Any]:
+        """Run the attempt; raises DownloadRetry or RuntimeError like the in-process path"""
+        event = self.pool.run(
+            self.task_id, {"url": url, "request": self.request, "attempt": self.attempt}, self._on_event
+        )
+        if event["event"] == "retry":
+            from . import DownloadRetry
+            self.attempt = event["attempt"]
+            raise DownloadRetry(RuntimeError(event["error"]), event["delay"], event["attempt"])
+        if event["event"] == "error":
+            raise RuntimeError(event["error"])
+        return event["result"]
+
+    def abort(self, reason: str):
+        """Stop the attempt now by killing its worker"""
+        self.pool.kill(self.task_id, reason)
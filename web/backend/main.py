@@ -2,38 +2,68 @@
 Bingo Downloader Web - Main Entry Point
 FastAPI application for video download web interface
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
-import uvicorn
 
 from .config import (
     HOST, PORT, RELOAD, CORS_ORIGINS, CORS_ALLOW_CREDENTIALS,
     CORS_ALLOW_METHODS, CORS_ALLOW_HEADERS, BASE_DIR, DOWNLOAD_DIR,
 )
-from .api import download_router, history_router, stats_router, formats_router
+from .api import (
+    download_router, history_router, stats_router, formats_router,
+    files_router, playlists_router,
+)
 from .models import ApiResponse
-from .security import api_key_middleware, rate_limit_middleware
+from .security import APIKeyMiddleware, RateLimitMiddleware
 from .utils import BingoLogger
 
 # Initialize logger
 logger = BingoLogger.get_logger('bingo_downloader_web', log_file='web')
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create process-wide downloader resources once, before the first request"""
+    from .core import get_downloader_context
+    from .api.download import download_scheduler
+
+    app.state.downloader_context = get_downloader_context()
+    if app.state.downloader_context is not None:
+        # Queued jobs wait while their platform is throttled, at its limit
+        # or has its circuit open
+        download_scheduler.concurrency = app.state.downloader_context.concurrency
+        download_scheduler.breaker = app.state.downloader_context.breaker
+    logger.info("Downloader context initialised")
+    yield
+
+    from .api.download import worker_pool
+    if worker_pool is not None:
+        worker_pool.close()
+    context = app.state.downloader_context
+    if context is not None and context.postprocessing is not None:
+        # Let queued post-processing finish so completed tasks keep their files
+        context.postprocessing.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Bingo Downloader Web",
     description="Web interface for video downloader supporting 1000+ websites",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan,
 )
 
-# Apply security middlewares
-# Order matters: rate limit first, then API key auth
-app = rate_limit_middleware(app)
-app = api_key_middleware(app)
+# Apply security middlewares (pure ASGI, registered on the FastAPI app)
+# add_middleware wraps outward: API key auth runs before rate limiting,
+# and CORS (added below) stays outermost so preflight requests are answered
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(APIKeyMiddleware)
 
 # CORS middleware - more restrictive by default
 app.add_middleware(
@@ -56,6 +86,8 @@ app.include_router(download_router)
 app.include_router(history_router)
 app.include_router(stats_router)
 app.include_router(formats_router)
+app.include_router(files_router)
+app.include_router(playlists_router)
 
 
 # Root route
@@ -97,6 +129,8 @@ async def health_check():
 # Run server
 def run():
     """Run the development server"""
+    import uvicorn
+
     logger.info(f"Starting Bingo Downloader Web server on {HOST}:{PORT}")
     uvicorn.run(
         "web.backend.main:app",
@@ -10,12 +10,33 @@ class DownloadRequest(BaseModel):
     """Download request model"""
     url: str = Field(..., description="Video URL to download")
     quality: str = Field(default="1080", description="Video quality (360, 480, 720, 1080, best)")
-    format_type: Literal["video", "audio"] = Field(default="video", description="Download type")
-    audio_format: Optional[str] = Field(default="mp3", description="Audio format (mp3, wav, m4a, flac, aac)")
+    format_type: Literal["video", "audio", "subtitles"] = Field(
+        default="video", description="Download type (subtitles: only the subtitle files, no media)"
+    )
+    audio_format: Optional[Literal["mp3", "m4a", "aac", "opus", "flac", "wav", "best"]] = Field(
+        default="mp3",
+        description="Audio format; a source stream already in this codec is copied instead of re-encoded, "
+                    "best keeps the original codec",
+    )
     subtitles: bool = Field(default=False, description="Include subtitles")
-    sub_langs: Optional[str] = Field(default="en,zh", description="Subtitle languages")
+    sub_langs: Optional[str] = Field(
+        default="en,zh",
+        description="Subtitle languages, comma separated; manual subtitles win over automatic ones "
+                    "and the original language is used when none match",
+    )
     cookies_browser: Optional[str] = Field(default="chrome", description="Browser for cookies")
     download_path: Optional[str] = Field(default=None, description="Custom download path")
+    delivery: Literal["disk", "stream"] = Field(
+        default="disk",
+        description="disk: save and track as a task; stream: send the media in the response without keeping a copy",
+    )
+    max_duration: Optional[float] = Field(
+        default=None, gt=0, description="Stop the download after this many seconds of running"
+    )
+    deadline: Optional[datetime] = Field(
+        default=None,
+        description="Stop the download if it has not finished by then; orders the queue under the edf policy",
+    )
 
 
 class FormatInfo(BaseModel):
@@ -40,6 +61,18 @@ class FormatListResponse(BaseModel):
     thumbnail: Optional[str] = None
 
 
+class BulkFormatsRequest(BaseModel):
+    """Request for probing formats of several URLs"""
+    urls: list[str] = Field(..., min_length=1, description="Video URLs to probe")
+    cookies_browser: Optional[str] = Field(default="chrome", description="Browser for cookies")
+
+
+class BulkFormatsResponse(BaseModel):
+    """Response for bulk format probing"""
+    results: list[FormatListResponse]
+    errors: dict[str, str] = {}
+
+
 class DownloadProgress(BaseModel):
     """Download progress update"""
     task_id: str
@@ -50,7 +83,25 @@ class DownloadProgress(BaseModel):
     speed: Optional[str] = None
     eta: Optional[str] = None
     filename: Optional[str] = None
+    file_url: Optional[str] = None  # GET this to fetch the finished file
     error: Optional[str] = None
+    attempt: int = 1
+    retry_at: Optional[float] = None  # Unix time of the next attempt while waiting to retry
+    stalls: int = 0  # Transfers restarted by the stall watchdog
+    transcoded: Optional[bool] = None  # Audio downloads: re-encoded (False = stream copied, None = unknown)
+
+
+class BatchProgress(BaseModel):
+    """Aggregate progress of a batch submission"""
+    batch_id: str
+    total: int
+    pending: int = 0
+    downloading: int = 0
+    processing: int = 0
+    completed: int = 0
+    failed: int = 0
+    progress: float = 0.0  # 0-100, mean over all tasks
+    task_ids: list[str]
 
 
 class DownloadHistory(BaseModel):
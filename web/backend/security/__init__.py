@@ -2,15 +2,28 @@
 Bingo Downloader Web - Security Module
 Provides authentication, rate limiting, and encryption utilities
 """
-from .auth import api_key_middleware, verify_api_key, get_api_key_from_header
-from .rate_limit import rate_limit_middleware
+from .auth import (
+    APIKeyMiddleware, api_key_middleware, verify_api_key, get_api_key_from_header,
+    api_key_owner, client_identity,
+)
+from .rate_limit import RateLimitMiddleware, rate_limit_middleware
+from .routes import RoutePolicy, RouteRule, RoutePolicyTable, route_policy_table, classify_scope
 from .encryption import encrypt_data, decrypt_data, generate_encryption_key
 
 __all__ = [
+    "APIKeyMiddleware",
+    "RateLimitMiddleware",
     "api_key_middleware",
     "verify_api_key",
     "get_api_key_from_header",
+    "api_key_owner",
+    "client_identity",
     "rate_limit_middleware",
+    "RoutePolicy",
+    "RouteRule",
+    "RoutePolicyTable",
+    "route_policy_table",
+    "classify_scope",
     "encrypt_data",
     "decrypt_data",
     "generate_encryption_key",
@@ -3,12 +3,15 @@ Bingo Downloader Web - API Key Authentication
 Optional API Key authentication for API endpoints
 """
 from fastapi import Request, HTTPException, status
-from fastapi.security import APIKeyHeader
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 from typing import Optional
+import hashlib
 import os
 
+from .routes import classify_scope
+
 # Configuration
 API_KEY_ENABLED = os.getenv("API_KEY_ENABLED", "false").lower() == "true"
 API_KEY_NAME = os.getenv("API_KEY_NAME", "X-API-Key")
@@ -18,53 +21,52 @@ VALID_API_KEYS = set(
     if key.strip()
 )
 
-# Public endpoints that don't require authentication
-PUBLIC_PATHS = [
-    "/",
-    "/health",
-    "/static",
-    "/api/docs",
-    "/api/redoc",
-    "/openapi.json",
-]
-
 
-class APIKeyMiddleware(BaseHTTPMiddleware):
+class APIKeyMiddleware:
     """
-    Middleware to check API key authentication.
+    Pure ASGI middleware to check API key authentication.
     Can be enabled/disabled via API_KEY_ENABLED environment variable.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        # Skip authentication if disabled
-        if not API_KEY_ENABLED:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Only HTTP requests carry API keys; lifespan/websocket pass through
+        if scope["type"] != "http" or not API_KEY_ENABLED:
+            await self.app(scope, receive, send)
+            return
 
-        # Skip authentication for public paths
-        if any(request.url.path.startswith(path) for path in PUBLIC_PATHS):
-            return await call_next(request)
+        # Skip authentication for public routes (see security/routes.py)
+        if not classify_scope(scope).require_auth:
+            await self.app(scope, receive, send)
+            return
 
         # Verify API key
-        api_key = request.headers.get(API_KEY_NAME)
+        api_key = Headers(scope=scope).get(API_KEY_NAME)
         if not api_key:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={
                     "success": False,
                     "message": "API key is missing. Please provide X-API-Key header.",
                 },
             )
+            await response(scope, receive, send)
+            return
 
         if api_key not in VALID_API_KEYS:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_403_FORBIDDEN,
                 content={
                     "success": False,
                     "message": "Invalid API key.",
                 },
             )
+            await response(scope, receive, send)
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
 
 def api_key_middleware(app):
@@ -100,6 +102,25 @@ def get_api_key_from_header(request: Request) -> Optional[str]:
     return request.headers.get(API_KEY_NAME)
 
 
+def api_key_owner(api_key: str) -> str:
+    """Stable, non-reversible label for an API key (safe to show in metrics)"""
+    return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def client_identity(request: Request) -> str:
+    """
+    Identify who submitted a request, for fair scheduling.
+
+    A valid API key identifies its holder; otherwise the client address is
+    used, so an arbitrary header cannot claim a fresh share of the queue.
+    """
+    api_key = get_api_key_from_header(request)
+    if api_key and api_key in VALID_API_KEYS:
+        return api_key_owner(api_key)
+    client = request.client.host if request.client else "unknown"
+    return f"ip:{client}"
+
+
 # FastAPI dependency for route-level authentication
 async def require_api_key(request: Request) -> Optional[str]:
     """
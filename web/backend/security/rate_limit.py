@@ -2,27 +2,23 @@
 Bingo Downloader Web - Rate Limiting
 IP-based rate limiting to prevent API abuse
 """
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from collections import defaultdict
 from typing import Dict, Tuple
 import time
 import os
 import asyncio
 
+from .routes import classify_scope
+
 # Configuration
 RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
 RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "60"))  # requests per minute
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # seconds
 
-# Public paths excluded from rate limiting
-PUBLIC_PATHS = [
-    "/",
-    "/health",
-    "/static",
-]
-
 
 class RateLimiter:
     """
@@ -84,33 +80,39 @@ class RateLimiter:
 rate_limiter = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
-    Middleware to enforce rate limiting on all API requests.
+    Pure ASGI middleware to enforce rate limiting on all API requests.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting if disabled
-        if not RATE_LIMIT_ENABLED:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Skip rate limiting if disabled or not an HTTP request
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
 
-        # Skip rate limiting for public paths
-        if any(request.url.path.startswith(path) for path in PUBLIC_PATHS):
-            return await call_next(request)
+        # Skip rate limiting for exempt routes (see security/routes.py)
+        if not classify_scope(scope).rate_limited:
+            await self.app(scope, receive, send)
+            return
 
         # Get client IP address
         # Try to get real IP from headers (for proxied requests)
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = Headers(scope=scope).get("X-Forwarded-For")
         if forwarded_for:
             client_ip = forwarded_for.split(",")[0].strip()
         else:
-            client_ip = request.client.host if request.client else "unknown"
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
 
         # Check rate limit
         allowed, retry_after = await rate_limiter.is_allowed(client_ip)
 
         if not allowed:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "success": False,
@@ -123,14 +125,18 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "X-RateLimit-Window": str(RATE_LIMIT_WINDOW),
                 },
             )
-
-        response = await call_next(request)
-
-        # Add rate limit headers to response
-        response.headers["X-RateLimit-Limit"] = str(RATE_LIMIT_REQUESTS)
-        response.headers["X-RateLimit-Window"] = str(RATE_LIMIT_WINDOW)
-
-        return response
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            # Add rate limit headers to response without buffering the body
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = str(RATE_LIMIT_REQUESTS)
+                headers["X-RateLimit-Window"] = str(RATE_LIMIT_WINDOW)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
 def rate_limit_middleware(app):
@@ -0,0 +1,134 @@
+"""
+Bingo Downloader Web - Route Policy
+Precompiled route table shared by the authentication and rate limiting middlewares
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+import re
+
+# Key used to cache the classification result on the ASGI scope state
+SCOPE_STATE_KEY = "route_policy"
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """Security policy applied to a matched route"""
+    name: str
+    require_auth: bool = True
+    rate_limited: bool = True
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """
+    A single entry of the route table.
+
+    match is either "exact" (path must be equal) or "prefix" (path must equal
+    the prefix or continue with a "/" after it). methods restricts the rule to
+    the given HTTP methods; None matches every method.
+    """
+    path: str
+    policy: RoutePolicy
+    match: str = "exact"
+    methods: Optional[Tuple[str, ...]] = None
+
+    def allows_method(self, method: str) -> bool:
+        return self.methods is None or method in self.methods
+
+
+# Default policy for everything that is not listed in the table
+PROTECTED = RoutePolicy(name="protected")
+PUBLIC = RoutePolicy(name="public", require_auth=False, rate_limited=False)
+
+DEFAULT_RULES = [
+    RouteRule("/", PUBLIC, methods=("GET", "HEAD")),
+    RouteRule("/health", PUBLIC, methods=("GET", "HEAD")),
+    RouteRule("/static", PUBLIC, match="prefix", methods=("GET", "HEAD")),
+    RouteRule("/api/docs", PUBLIC, match="prefix", methods=("GET", "HEAD")),
+    RouteRule("/api/redoc", PUBLIC, match="prefix", methods=("GET", "HEAD")),
+    RouteRule("/openapi.json", PUBLIC, methods=("GET", "HEAD")),
+    # Progress is polled once per second by the frontend, keep it out of the
+    # request budget but still behind the API key
+    RouteRule(
+        "/api/download/progress",
+        RoutePolicy(name="progress", require_auth=True, rate_limited=False),
+        match="prefix",
+        methods=("GET",),
+    ),
+    # Players issue many Range requests for one file; transfers are bounded
+    # by FILES_MAX_CONCURRENT instead of the request budget
+    RouteRule(
+        "/api/files",
+        RoutePolicy(name="files", require_auth=True, rate_limited=False),
+        match="prefix",
+        methods=("GET", "HEAD"),
+    ),
+]
+
+
+class RoutePolicyTable:
+    """
+    Compiled route table.
+
+    Exact rules are looked up in a dict, prefix rules are folded into a single
+    regular expression ordered longest-prefix first, so classifying a request
+    costs one dict lookup and at most one regex match.
+    """
+
+    def __init__(self, rules: Iterable[RouteRule], default: RoutePolicy = PROTECTED):
+        self.default = default
+        self._exact: dict[str, list[RouteRule]] = {}
+        by_prefix: dict[str, list[RouteRule]] = {}
+
+        for rule in rules:
+            if rule.match == "exact":
+                self._exact.setdefault(rule.path, []).append(rule)
+            elif rule.match == "prefix":
+                by_prefix.setdefault(rule.path.rstrip("/"), []).append(rule)
+            else:
+                raise ValueError(f"Unknown match type: {rule.match}")
+
+        # One named group per prefix, longest first so the most specific wins
+        self._prefix_groups: dict[str, list[RouteRule]] = {}
+        alternatives = []
+        for i, prefix in enumerate(sorted(by_prefix, key=len, reverse=True)):
+            group = f"p{i}"
+            self._prefix_groups[group] = by_prefix[prefix]
+            alternatives.append(f"(?P<{group}>{re.escape(prefix)}(?:/|$))")
+        self._prefix_re = re.compile("|".join(alternatives)) if alternatives else None
+
+    def classify(self, path: str, method: str = "GET") -> RoutePolicy:
+        """Return the policy for a path and HTTP method"""
+        method = method.upper()
+
+        for rule in self._exact.get(path, ()):
+            if rule.allows_method(method):
+                return rule.policy
+
+        if self._prefix_re is not None:
+            match = self._prefix_re.match(path)
+            if match:
+                for rule in self._prefix_groups[match.lastgroup]:
+                    if rule.allows_method(method):
+                        return rule.policy
+
+        return self.default
+
+
+route_policy_table = RoutePolicyTable(DEFAULT_RULES)
+
+
+def classify_scope(scope: dict, table: Optional[RoutePolicyTable] = None) -> RoutePolicy:
+    """
+    Classify an ASGI request scope, caching the result on scope["state"].
+
+    Both security middlewares call this; the second call is a dict lookup.
+    """
+    state = scope.setdefault("state", {})
+    policy = state.get(SCOPE_STATE_KEY)
+    if policy is None:
+        policy = (table or route_policy_table).classify(
+            scope.get("path", ""), scope.get("method", "GET")
+        )
+        state[SCOPE_STATE_KEY] = policy
+    return policy
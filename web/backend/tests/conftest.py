@@ -10,6 +10,16 @@ import sys
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
+# Add repository root so the backend is importable as web.backend
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """Give every test a fresh rate limit budget"""
+    from web.backend.security import rate_limit
+    rate_limit.rate_limiter.clients.clear()
+    yield
 
 
 @pytest.fixture
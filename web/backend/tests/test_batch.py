@@ -0,0 +1,145 @@
+"""
+Tests for batch submission and the shared download scheduler
+"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+
+from web.backend.api import download
+from web.backend.core.scheduler import DownloadScheduler
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def client():
+    from web.backend.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_downloader():
+    with patch("web.backend.core.BingoDownloader") as mock_cls:
+        mock_cls.return_value.download.return_value = {"success": True, "filename": "x.mp4"}
+        yield mock_cls
+
+
+class TestDownloadScheduler:
+    """Test the concurrency-limited runner"""
+
+    def test_limits_concurrency(self):
+        scheduler = DownloadScheduler(max_workers=2)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        done = []
+
+        def job(i):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+                done.append(i)
+
+        for i in range(6):
+            scheduler.submit(f"t{i}", job, i)
+        assert wait_for(lambda: len(done) == 6)
+        assert peak == 2
+        assert scheduler.stats()["completed"] == 6
+        scheduler.shutdown()
+
+    def test_cancel_pending_job(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        gate = threading.Event()
+        ran = []
+
+        scheduler.submit("blocker", gate.wait)
+        scheduler.submit("victim", ran.append, "victim")
+        assert scheduler.cancel("victim") is True
+        gate.set()
+        scheduler.shutdown()
+        assert ran == []
+
+    def test_failing_job_does_not_kill_worker(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        ran = []
+
+        def boom():
+            raise SystemExit(1)
+
+        scheduler.submit("a", boom)
+        scheduler.submit("b", ran.append, "b")
+        scheduler.shutdown()
+        assert ran == ["b"]
+
+
+class TestBatchEndpoint:
+    """Test POST /api/download/batch"""
+
+    def test_json_list(self, client, mock_downloader):
+        urls = [f"https://www.youtube.com/watch?v={i}" for i in range(3)]
+        response = client.post("/api/download/batch?quality=720", json=urls)
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert len(data["task_ids"]) == 3
+
+        batch_url = f"/api/download/batch/{data['batch_id']}"
+        assert wait_for(lambda: client.get(batch_url).json()["completed"] == 3)
+        progress = client.get(batch_url).json()
+        assert progress["total"] == 3
+        assert progress["progress"] == 100.0
+        assert mock_downloader.call_args.kwargs["quality"] == 720
+
+    def test_json_object_with_options(self, client, mock_downloader):
+        body = {
+            "urls": ["https://youtu.be/a", {"url": "https://youtu.be/b", "format_type": "audio"}, 42],
+            "options": {"format_type": "video"},
+        }
+        response = client.post("/api/download/batch", json=body)
+        data = response.json()["data"]
+        assert len(data["task_ids"]) == 2
+        assert [r["index"] for r in data["rejected"]] == [2]
+
+    def test_uploaded_text_file(self, client, mock_downloader):
+        content = b"# my list\nhttps://youtu.be/a\n\nhttps://youtu.be/b\n"
+        response = client.post(
+            "/api/download/batch",
+            files={"file": ("urls.txt", content, "text/plain")},
+        )
+        assert response.status_code == 200
+        assert len(response.json()["data"]["task_ids"]) == 2
+
+    def test_streamed_jsonl_body(self, client, mock_downloader):
+        content = (
+            b'{"url": "https://youtu.be/a", "quality": "480"}\n'
+            b'{not json\n'
+            b'"https://youtu.be/b"'
+        )
+        response = client.post(
+            "/api/download/batch",
+            content=content,
+            headers={"content-type": "application/x-ndjson"},
+        )
+        data = response.json()["data"]
+        assert len(data["task_ids"]) == 2
+        assert data["rejected"][0]["line"] == 2
+
+    def test_too_many_items(self, client):
+        with patch.object(download, "BATCH_MAX_ITEMS", 2):
+            response = client.post("/api/download/batch", json=["a", "b", "c"])
+        assert response.status_code == 400
+
+    def test_unknown_batch(self, client):
+        assert client.get("/api/download/batch/missing").status_code == 404
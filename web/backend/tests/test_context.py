@@ -0,0 +1,26 @@
+"""
+Tests for the app-lifespan downloader context
+"""
+from fastapi.testclient import TestClient
+
+from web.backend import core
+
+
+def test_lifespan_creates_shared_context():
+    from web.backend.main import app
+
+    with TestClient(app) as client:
+        context = app.state.downloader_context
+        assert context is not None
+        assert context is core.get_downloader_context()
+        assert client.get("/health").status_code == 200
+
+
+def test_downloaders_built_for_requests_share_context():
+    from web.backend.api.download import build_downloader
+    from web.backend.models import DownloadRequest
+
+    request = DownloadRequest(url="https://youtu.be/abc", cookies_browser=None)
+    first = build_downloader(request)
+    second = build_downloader(request)
+    assert first.history is second.history is core.get_downloader_context().history
@@ -0,0 +1,98 @@
+"""
+Tests for deadlines, time limits and earliest-deadline-first scheduling
+"""
+import threading
+import time
+
+from web.backend.core.scheduler import DownloadScheduler
+
+from .test_batch import wait_for
+
+
+def _blocker(release: threading.Event):
+    release.wait(5)
+
+
+class TestEarliestDeadlineFirst:
+    """The edf policy starts jobs by latest start time"""
+
+    def test_orders_by_deadline_then_fair_share(self):
+        scheduler = DownloadScheduler(max_workers=1, policy="edf")
+        release = threading.Event()
+        order = []
+        scheduler.submit("busy", _blocker, release)
+        assert wait_for(lambda: scheduler.stats()["running"] == 1)
+
+        now = time.time()
+        scheduler.submit("none", order.append, "none")
+        scheduler.submit("late", order.append, "late", deadline=now + 600)
+        scheduler.submit("soon", order.append, "soon", deadline=now + 60)
+        release.set()
+
+        assert wait_for(lambda: len(order) == 3)
+        assert order == ["soon", "late", "none"]
+        assert scheduler.stats()["deadlines"] == {"met": 2, "missed": 0}
+
+    def test_long_job_starts_before_short_job_with_earlier_deadline(self):
+        scheduler = DownloadScheduler(max_workers=1, policy="edf")
+        # 1 MB/s measured for this platform
+        scheduler.record_transfer("YouTube", 1_000_000, 1.0)
+        release = threading.Event()
+        order = []
+        scheduler.submit("busy", _blocker, release)
+        assert wait_for(lambda: scheduler.stats()["running"] == 1)
+
+        now = time.time()
+        # Needs ~300s, so it has to start before the small one (~1s)
+        scheduler.submit("small", order.append, "small", platform="YouTube",
+                         deadline=now + 100, size_hint=1_000_000)
+        scheduler.submit("big", order.append, "big", platform="YouTube",
+                         deadline=now + 350, size_hint=300_000_000)
+        release.set()
+
+        assert wait_for(lambda: len(order) == 2)
+        assert order == ["big", "small"]
+
+    def test_fair_policy_ignores_deadlines(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        release = threading.Event()
+        order = []
+        scheduler.submit("busy", _blocker, release)
+        assert wait_for(lambda: scheduler.stats()["running"] == 1)
+
+        scheduler.submit("first", order.append, "first", deadline=time.time() + 600)
+        scheduler.submit("second", order.append, "second", deadline=time.time() + 60)
+        release.set()
+
+        assert wait_for(lambda: len(order) == 2)
+        assert order == ["first", "second"]
+
+
+class TestTimeouts:
+    """Jobs that overrun their limit are abandoned and their worker replaced"""
+
+    def test_stuck_job_is_abandoned(self):
+        scheduler = DownloadScheduler(max_workers=1, timeout_grace=0.1)
+        release = threading.Event()
+        timed_out = []
+        done = []
+        scheduler.submit("stuck", _blocker, release, timeout=0.2, on_timeout=timed_out.append)
+        scheduler.submit("next", done.append, "next")
+
+        # The queued job runs on a replacement worker while the first is stuck
+        assert wait_for(lambda: done == ["next"])
+        assert timed_out == ["stuck"]
+        stats = scheduler.stats()
+        assert stats["timed_out"] == 1
+        assert stats["running"] == 0
+        release.set()
+
+    def test_job_within_limit_is_not_touched(self):
+        scheduler = DownloadScheduler(max_workers=1, timeout_grace=0.1)
+        timed_out = []
+        done = []
+        scheduler.submit("quick", done.append, "quick", timeout=5, on_timeout=timed_out.append)
+        assert wait_for(lambda: done == ["quick"])
+        time.sleep(0.2)
+        assert timed_out == []
+        assert scheduler.stats()["timed_out"] == 0
@@ -0,0 +1,173 @@
+"""
+Tests for fingerprinting and single-flight deduplication of downloads
+"""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from web.backend.api import download
+from web.backend.core.dedup import (
+    DownloadDeduplicator,
+    canonicalize_url,
+    download_fingerprint,
+)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestFingerprint:
+    """Test URL canonicalisation and option fingerprints"""
+
+    def test_equivalent_youtube_urls(self):
+        expected = canonicalize_url("https://www.youtube.com/watch?v=abc")
+        assert canonicalize_url("https://youtu.be/abc") == expected
+        assert canonicalize_url("http://m.youtube.com/watch?v=abc&si=xyz#t=10") == expected
+        assert canonicalize_url("https://www.youtube.com/watch?utm_source=x&v=abc") == expected
+
+    def test_meaningful_params_are_kept(self):
+        assert canonicalize_url("https://youtube.com/watch?v=a") != \
+            canonicalize_url("https://youtube.com/watch?v=b")
+
+    def test_options_change_fingerprint(self):
+        video = {"format": "bestvideo+bestaudio/best", "outtmpl": "/tmp/%(title)s.%(ext)s"}
+        audio = {**video, "format": "bestaudio/best"}
+        url = "https://youtu.be/abc"
+        assert download_fingerprint(url, video) != download_fingerprint(url, audio)
+
+    def test_subtitles_only_changes_fingerprint(self):
+        from web.backend import core
+        if not core.CORE_AVAILABLE:
+            pytest.skip("Core modules not available")
+        from web.backend.models import DownloadRequest
+
+        url = "https://youtu.be/abc"
+        subtitles = download.build_downloader(
+            DownloadRequest(url=url, format_type="subtitles", sub_langs="en", cookies_browser=None))
+        video = download.build_downloader(
+            DownloadRequest(url=url, format_type="video", subtitles=True, sub_langs="en", cookies_browser=None))
+        assert download_fingerprint(url, subtitles._get_ydl_opts()) != download_fingerprint(url, video._get_ydl_opts())
+
+    def test_hooks_are_ignored(self):
+        opts = {"format": "best"}
+        hooked = {**opts, "progress_hooks": [print], "post_hooks": [len]}
+        url = "https://youtu.be/abc"
+        assert download_fingerprint(url, opts) == download_fingerprint(url, hooked)
+
+
+class TestDownloadDeduplicator:
+    """Test the in-flight / completed registry"""
+
+    def test_inflight_claim(self):
+        dedup = DownloadDeduplicator()
+        assert dedup.claim("fp", "t1") is None
+        assert dedup.claim("fp", "t2") == "t1"
+        dedup.release("t1")
+        assert dedup.claim("fp", "t3") is None
+
+    def test_completed_requires_existing_file(self, tmp_path):
+        dedup = DownloadDeduplicator()
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"data")
+
+        dedup.claim("fp", "t1")
+        dedup.complete("t1", str(video))
+        assert dedup.claim("fp", "t2") == "t1"
+
+        video.unlink()
+        assert dedup.claim("fp", "t3") is None
+
+    def test_completed_entries_expire(self, tmp_path):
+        dedup = DownloadDeduplicator(completed_ttl=0.01)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"data")
+        dedup.claim("fp", "t1")
+        dedup.complete("t1", str(video))
+        time.sleep(0.02)
+        assert dedup.claim("fp", "t2") is None
+
+
+class TestDedupEndpoint:
+    """Test duplicate submissions through the API"""
+
+    def test_duplicate_attaches_to_inflight_task(self, tmp_path):
+        from web.backend.main import app
+
+        gate = threading.Event()
+        video = tmp_path / "video.mp4"
+
+        def slow_download(url):
+            gate.wait(5)
+            video.write_bytes(b"data")
+            return {"success": True, "filename": video.name, "filepath": str(video)}
+
+        body = {"url": "https://www.youtube.com/watch?v=dedup1", "cookies_browser": None}
+        with patch("web.backend.core.BingoDownloader") as mock_cls:
+            mock_cls.return_value._get_ydl_opts.return_value = {"format": "best"}
+            mock_cls.return_value.download.side_effect = slow_download
+            client = TestClient(app)
+
+            first = client.post("/api/download/start", json=body).json()["data"]
+            second = client.post(
+                "/api/download/start",
+                json={**body, "url": "https://youtu.be/dedup1"},
+            ).json()["data"]
+            assert second == {"task_id": first["task_id"], "deduplicated": True}
+
+            gate.set()
+            progress_url = f"/api/download/progress/{first['task_id']}"
+            assert wait_for(lambda: client.get(progress_url).json()["status"] == "completed")
+
+            # Finished and the file exists: answered immediately
+            third = client.post("/api/download/start", json=body).json()["data"]
+            assert third["task_id"] == first["task_id"]
+            assert mock_cls.return_value.download.call_count == 1
+
+            # File gone: downloads again
+            video.unlink()
+            fourth = client.post("/api/download/start", json=body).json()["data"]
+            assert fourth["task_id"] != first["task_id"]
+            assert fourth["deduplicated"] is False
+            assert wait_for(lambda: mock_cls.return_value.download.call_count == 2)
+
+    def test_cancelled_running_task_is_not_reused(self, tmp_path):
+        from web.backend.main import app
+
+        gate = threading.Event()
+        video = tmp_path / "cancelled.mp4"
+
+        def slow_download(url):
+            gate.wait(5)
+            video.write_bytes(b"data")
+            return {"success": True, "filename": video.name, "filepath": str(video)}
+
+        body = {"url": "https://www.youtube.com/watch?v=dedup2", "cookies_browser": None}
+        with patch("web.backend.core.BingoDownloader") as mock_cls:
+            mock_cls.return_value._get_ydl_opts.return_value = {"format": "best"}
+            mock_cls.return_value.download.side_effect = slow_download
+            client = TestClient(app)
+
+            first = client.post("/api/download/start", json=body).json()["data"]
+            progress_url = f"/api/download/progress/{first['task_id']}"
+            assert wait_for(lambda: client.get(progress_url).json()["status"] == "downloading")
+            assert client.post(f"/api/download/cancel/{first['task_id']}").status_code == 200
+
+            # Cancelled while running: a new submission starts its own download
+            second = client.post("/api/download/start", json=body).json()["data"]
+            assert second["deduplicated"] is False
+
+            gate.set()
+            assert wait_for(lambda: mock_cls.return_value.download.call_count == 2)
+            assert wait_for(lambda: client.get(f"/api/download/progress/{second['task_id']}")
+                            .json()["status"] == "completed")
+            # The attempt that finished after the cancel does not complete the task
+            assert client.get(progress_url).json()["status"] == "failed"
+            assert first["task_id"] not in download.task_results
@@ -0,0 +1,144 @@
+"""
+Tests for priority lanes and weighted fair queuing in the download scheduler
+"""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from web.backend.core.scheduler import DownloadScheduler
+from web.backend.security import auth
+
+
+def run_in_order(scheduler, submissions):
+    """Queue submissions behind a blocker and return the order they ran in"""
+    gate = threading.Event()
+    order = []
+    scheduler.submit("blocker", gate.wait, owner="blocker")
+    for task_id, kwargs in submissions:
+        scheduler.submit(task_id, order.append, task_id, **kwargs)
+    gate.set()
+    scheduler.shutdown()
+    return order
+
+
+class TestLanes:
+    """Interactive downloads overtake queued batch items"""
+
+    def test_interactive_before_bulk(self):
+        order = run_in_order(DownloadScheduler(max_workers=1), [
+            ("b1", {"lane": "bulk"}),
+            ("b2", {"lane": "bulk"}),
+            ("i1", {"lane": "interactive"}),
+        ])
+        assert order == ["i1", "b1", "b2"]
+
+    def test_unknown_lane(self):
+        with pytest.raises(ValueError):
+            DownloadScheduler().submit("t", print, lane="urgent")
+
+
+class TestFairQueuing:
+    """Owners share workers regardless of how much each has queued"""
+
+    def test_equal_weights_interleave(self):
+        submissions = [(f"a{i}", {"lane": "bulk", "owner": "a"}) for i in range(6)]
+        submissions += [(f"b{i}", {"lane": "bulk", "owner": "b"}) for i in range(2)]
+        order = run_in_order(DownloadScheduler(max_workers=1), submissions)
+        assert order[:4] == ["a0", "b0", "a1", "b1"]
+
+    def test_weights_set_share(self):
+        scheduler = DownloadScheduler(max_workers=1, owner_weights={"a": 3})
+        submissions = [(f"a{i}", {"owner": "a"}) for i in range(6)]
+        submissions += [(f"b{i}", {"owner": "b"}) for i in range(6)]
+        order = run_in_order(scheduler, submissions)
+        assert [t[0] for t in order[:8]].count("a") == 6
+
+    def test_idle_owner_does_not_bank_credit(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        gate = threading.Event()
+        order = []
+        scheduler.submit("blocker", gate.wait)
+        for i in range(4):
+            scheduler.submit(f"a{i}", order.append, f"a{i}", owner="a")
+        gate.set()
+        time.sleep(0.1)
+
+        # "b" shows up late: it gets its fair turn, not a burst of 4
+        gate2 = threading.Event()
+        scheduler.submit("blocker2", gate2.wait, owner="x")
+        for i in range(3):
+            scheduler.submit(f"a{i + 4}", order.append, f"a{i + 4}", owner="a")
+            scheduler.submit(f"b{i}", order.append, f"b{i}", owner="b")
+        gate2.set()
+        scheduler.shutdown()
+        assert order[4:] == ["b0", "a4", "b1", "a5", "b2", "a6"]
+
+    def test_per_owner_cap(self):
+        scheduler = DownloadScheduler(max_workers=3, owner_max_running={"a": 1})
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+        lock = threading.Lock()
+
+        def job(owner):
+            with lock:
+                running[owner] += 1
+                peak[owner] = max(peak[owner], running[owner])
+            time.sleep(0.03)
+            with lock:
+                running[owner] -= 1
+
+        for i in range(4):
+            scheduler.submit(f"a{i}", job, "a", owner="a")
+            scheduler.submit(f"b{i}", job, "b", owner="b")
+        scheduler.shutdown()
+        assert peak["a"] == 1
+        assert peak["b"] == 2
+
+    def test_owner_metrics(self):
+        scheduler = DownloadScheduler(max_workers=1, owner_weights={"a": 2}, owner_max_running={"a": 1})
+        gate = threading.Event()
+        scheduler.submit("blocker", gate.wait, owner="a")
+        scheduler.submit("q1", print, owner="a", lane="bulk")
+        time.sleep(0.05)
+
+        stats = scheduler.stats()
+        owner = stats["owners"]["a"]
+        assert stats["lanes"] == {"interactive": 0, "bulk": 1}
+        assert owner["queued"] == {"interactive": 0, "bulk": 1}
+        assert owner["running"] == 1
+        assert owner["weight"] == 2
+        assert owner["max_running"] == 1
+        assert owner["oldest_wait"] >= 0.05
+        gate.set()
+        scheduler.shutdown()
+
+
+class TestClientIdentity:
+    """Fair-share owner resolution from requests"""
+
+    def make_request(self, headers=None):
+        scope = {
+            "type": "http", "method": "POST", "path": "/",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+            "client": ("10.0.0.1", 1234),
+        }
+        return Request(scope)
+
+    def test_valid_key_identifies_owner(self):
+        with patch.object(auth, "VALID_API_KEYS", {"secret"}):
+            owner = auth.client_identity(self.make_request({"X-API-Key": "secret"}))
+        assert owner == auth.api_key_owner("secret")
+        assert "secret" not in owner
+
+    def test_unknown_key_falls_back_to_address(self):
+        with patch.object(auth, "VALID_API_KEYS", {"secret"}):
+            owner = auth.client_identity(self.make_request({"X-API-Key": "made-up"}))
+        assert owner == "ip:10.0.0.1"
+
+    def test_queue_endpoint(self):
+        from web.backend.main import app
+        stats = TestClient(app).get("/api/download/queue").json()
+        assert set(stats) >= {"running", "queued", "lanes", "owners"}
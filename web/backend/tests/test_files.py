@@ -0,0 +1,120 @@
+"""
+Tests for serving finished downloads from /api/files
+"""
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from web.backend import core
+from web.backend.api import download, files
+from web.backend.models import DownloadProgress
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client():
+    from web.backend.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def finished_task(tmp_path):
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(CONTENT)
+    task_id = "files-test-task"
+    download.active_tasks[task_id] = DownloadProgress(task_id=task_id, status="completed", progress=100.0)
+    download.task_results[task_id] = {"success": True, "filepath": str(video)}
+    with patch.object(files, "DOWNLOAD_DIR", tmp_path):
+        yield task_id, video
+    download.active_tasks.pop(task_id, None)
+    download.task_results.pop(task_id, None)
+
+
+class TestTaskFiles:
+    """Test GET /api/files/{task_id}"""
+
+    def test_full_file(self, client, finished_task):
+        task_id, _ = finished_task
+        response = client.get(f"/api/files/{task_id}")
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"]
+        assert response.headers["last-modified"]
+        assert response.headers["content-disposition"].startswith("attachment")
+
+    def test_range_request(self, client, finished_task):
+        task_id, _ = finished_task
+        response = client.get(f"/api/files/{task_id}", headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206
+        assert response.content == CONTENT[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    def test_if_range_mismatch_returns_full_file(self, client, finished_task):
+        task_id, _ = finished_task
+        response = client.get(
+            f"/api/files/{task_id}",
+            headers={"Range": "bytes=0-9", "If-Range": '"stale-etag"'},
+        )
+        assert response.status_code == 200
+        assert len(response.content) == len(CONTENT)
+
+    def test_conditional_get(self, client, finished_task):
+        task_id, _ = finished_task
+        etag = client.head(f"/api/files/{task_id}").headers["etag"]
+        response = client.get(f"/api/files/{task_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_concurrent_transfer_limit(self, client, finished_task):
+        task_id, _ = finished_task
+        with patch.object(files.transfer_limiter, "limit", 0):
+            response = client.get(f"/api/files/{task_id}")
+            assert response.status_code == 503
+            assert response.headers["retry-after"]
+            # HEAD does not transfer the body and is not limited
+            assert client.head(f"/api/files/{task_id}").status_code == 200
+        assert files.transfer_limiter.active == 0
+
+    def test_unfinished_and_missing(self, client, finished_task):
+        task_id, video = finished_task
+        assert client.get("/api/files/unknown").status_code == 404
+
+        download.active_tasks[task_id].status = "downloading"
+        assert client.get(f"/api/files/{task_id}").status_code == 409
+
+        download.active_tasks[task_id].status = "completed"
+        video.unlink()
+        assert client.get(f"/api/files/{task_id}").status_code == 410
+
+    def test_file_outside_download_dir(self, client, finished_task, tmp_path_factory):
+        task_id, _ = finished_task
+        outside = tmp_path_factory.mktemp("elsewhere") / "secret.txt"
+        outside.write_text("secret")
+        download.task_results[task_id]["filepath"] = str(outside)
+        assert client.get(f"/api/files/{task_id}").status_code == 403
+
+    def test_accel_redirect(self, client, finished_task):
+        task_id, _ = finished_task
+        with patch.object(files, "FILES_SENDFILE_HEADER", "X-Accel-Redirect"):
+            response = client.get(f"/api/files/{task_id}")
+        assert response.status_code == 200
+        assert response.headers["x-accel-redirect"] == "/protected-downloads/clip.mp4"
+        assert response.content == b""
+
+
+class TestHistoryFiles:
+    """Test GET /api/files/history/{record_id}"""
+
+    def test_history_record_file(self, client, finished_task, tmp_path):
+        _, video = finished_task
+        history = core.DownloadHistory(tmp_path / "history.db")
+        record_id = history.record_download(url="https://youtu.be/x", platform="YouTube", filepath=str(video))
+        context = core.get_downloader_context().derive(history=history)
+        with patch.object(core, "_context", context):
+            response = client.get(f"/api/files/history/{record_id}", params={"inline": True})
+            assert client.get("/api/files/history/999999").status_code == 404
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["content-disposition"].startswith("inline")
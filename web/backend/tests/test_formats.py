@@ -0,0 +1,160 @@
+"""
+Tests for non-blocking, coalesced and cached format listing
+"""
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from web.backend.api import formats
+from web.backend.models import FormatListResponse
+from web.backend.utils import SingleFlight, TTLCache
+
+
+def _fake_response(url):
+    return FormatListResponse(url=url, platform="YouTube", title="Test", formats=[])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    formats.formats_cache.clear()
+    yield
+    formats.formats_cache.clear()
+
+
+class SlowExtractor:
+    """Stands in for yt-dlp: blocks the calling thread and counts calls"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url, cookies_browser):
+        with self.lock:
+            self.calls.append((url, cookies_browser))
+        time.sleep(self.delay)
+        if "bad" in url:
+            raise RuntimeError("Unsupported URL")
+        return _fake_response(url)
+
+
+class TestGetFormats:
+    """Test the executor, single-flight and cache layers"""
+
+    def test_extraction_does_not_block_event_loop(self):
+        extractor = SlowExtractor(delay=0.3)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            tick_task = asyncio.create_task(ticker())
+            await formats.get_formats("https://youtu.be/a", "chrome")
+            tick_task.cancel()
+            return ticks
+
+        with patch.object(formats, "_extract_formats", extractor):
+            assert asyncio.run(scenario()) > 5
+
+    def test_concurrent_requests_share_one_extraction(self):
+        extractor = SlowExtractor()
+
+        async def scenario():
+            return await asyncio.gather(*(
+                formats.get_formats("https://youtu.be/a", "chrome") for _ in range(5)
+            ))
+
+        with patch.object(formats, "_extract_formats", extractor):
+            results = asyncio.run(scenario())
+        assert len(extractor.calls) == 1
+        assert all(r.url == "https://youtu.be/a" for r in results)
+
+    def test_results_are_cached(self):
+        extractor = SlowExtractor(delay=0)
+        with patch.object(formats, "_extract_formats", extractor):
+            asyncio.run(formats.get_formats("https://youtu.be/a", "chrome"))
+            asyncio.run(formats.get_formats("https://youtu.be/a", "chrome"))
+            asyncio.run(formats.get_formats("https://youtu.be/a", "firefox"))
+        assert extractor.calls == [
+            ("https://youtu.be/a", "chrome"),
+            ("https://youtu.be/a", "firefox"),
+        ]
+
+    def test_cookies_browser_is_honoured(self):
+        with patch.object(formats, "are_cookies_cached", return_value=False):
+            assert formats._cookie_opts("firefox") == {"cookiesfrombrowser": ("firefox",)}
+        with patch.object(formats, "are_cookies_cached", return_value=True):
+            assert "cookiefile" in formats._cookie_opts("chrome")
+        assert formats._cookie_opts(None) == {}
+
+
+class TestBulkEndpoint:
+    """Test POST /api/formats/bulk"""
+
+    def test_bulk_probe_bounds_parallelism(self):
+        from web.backend.main import app
+
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def extractor(url, cookies_browser):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            if "bad" in url:
+                raise RuntimeError("Unsupported URL")
+            return _fake_response(url)
+
+        urls = [f"https://youtu.be/{i}" for i in range(6)] + ["https://bad.example/x"]
+        with patch.object(formats, "_extract_formats", extractor), \
+                patch.object(formats, "FORMATS_BULK_CONCURRENCY", 2):
+            response = TestClient(app).post("/api/formats/bulk", json={"urls": urls})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["results"]) == 6
+        assert data["errors"] == {"https://bad.example/x": "Unsupported URL"}
+        assert peak <= 2
+
+    def test_bulk_rejects_too_many_urls(self):
+        from web.backend.main import app
+
+        with patch.object(formats, "FORMATS_BULK_MAX_URLS", 2):
+            response = TestClient(app).post(
+                "/api/formats/bulk", json={"urls": ["a", "b", "c"]}
+            )
+        assert response.status_code == 400
+
+
+class TestHelpers:
+    """Test SingleFlight and TTLCache directly"""
+
+    def test_ttl_cache_expires(self):
+        cache = TTLCache(ttl=0.05)
+        cache.set("k", 1)
+        assert cache.get("k") == 1
+        time.sleep(0.06)
+        assert cache.get("k") is None
+
+    def test_single_flight_propagates_errors(self):
+        flight = SingleFlight()
+
+        async def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            asyncio.run(flight.do("k", boom))
+        assert not flight.is_inflight("k")
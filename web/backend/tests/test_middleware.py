@@ -0,0 +1,55 @@
+"""
+Tests for the pure-ASGI security middleware stack
+"""
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from web.backend.security import auth, rate_limit
+from web.backend.security import APIKeyMiddleware, RateLimitMiddleware
+
+
+@pytest.fixture
+def streaming_app():
+    """Small app with a streaming endpoint behind both middlewares"""
+    test_app = FastAPI()
+
+    @test_app.get("/api/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    test_app.add_middleware(RateLimitMiddleware)
+    test_app.add_middleware(APIKeyMiddleware)
+    return test_app
+
+
+class TestMiddlewareStack:
+    """Test middleware registration and pass-through behaviour"""
+
+    def test_main_app_is_fastapi_instance(self):
+        from web.backend.main import app
+        assert isinstance(app, FastAPI)
+        registered = [m.cls for m in app.user_middleware]
+        assert APIKeyMiddleware in registered
+        assert RateLimitMiddleware in registered
+
+    def test_streaming_response_passes_through(self, streaming_app):
+        limiter = rate_limit.RateLimiter(requests=10, window=60)
+        with patch.object(rate_limit, "RATE_LIMIT_ENABLED", True), \
+                patch.object(rate_limit, "rate_limiter", limiter):
+            response = TestClient(streaming_app).get("/api/stream")
+        assert response.status_code == 200
+        assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+        assert response.headers["X-RateLimit-Limit"] == str(rate_limit.RATE_LIMIT_REQUESTS)
+
+    def test_rejected_request_never_reaches_app(self, streaming_app):
+        with patch.object(auth, "API_KEY_ENABLED", True), \
+                patch.object(auth, "VALID_API_KEYS", {"secret"}):
+            response = TestClient(streaming_app).get("/api/stream")
+        assert response.status_code == 401
+        assert response.json()["success"] is False
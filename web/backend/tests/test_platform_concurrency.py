@@ -0,0 +1,91 @@
+"""
+Tests for per-platform adaptive concurrency and circuit breaking in the download scheduler
+"""
+import threading
+import time
+import pytest
+
+from web.backend import core
+from web.backend.core.scheduler import DownloadScheduler
+
+if not core.CORE_AVAILABLE:
+    pytest.skip("Core modules not available", allow_module_level=True)
+
+
+def controller(**kwargs):
+    return core.AdaptiveConcurrency(**kwargs)
+
+
+class TestPlatformGate:
+    """Jobs wait for their platform without blocking other platforms"""
+
+    def test_cooling_platform_is_skipped(self):
+        concurrency = controller()
+        concurrency.record_throttle("YouTube", retry_after=0.3)
+        scheduler = DownloadScheduler(max_workers=1, concurrency=concurrency)
+        order = []
+        scheduler.submit("yt", order.append, "yt", platform="YouTube")
+        scheduler.submit("bili", order.append, "bili", platform="Bilibili")
+        scheduler.shutdown()
+        assert order == ["bili", "yt"]
+
+    def test_platform_limit_caps_running_jobs(self):
+        concurrency = controller(initial=1)
+        scheduler = DownloadScheduler(max_workers=3, concurrency=concurrency)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def job():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+        for i in range(3):
+            scheduler.submit(f"yt{i}", job, platform="YouTube")
+        scheduler.shutdown()
+        assert max(peak) == 1
+        assert concurrency.stats()["YouTube"]["running"] == 0
+
+    def test_stats_expose_platform_limits(self):
+        concurrency = controller(initial=4)
+        concurrency.record_throttle("YouTube", retry_after=60)
+        scheduler = DownloadScheduler(concurrency=concurrency)
+        platforms = scheduler.stats()["platforms"]
+        assert platforms["YouTube"]["limit"] == 2
+        assert platforms["YouTube"]["cooldown"] > 0
+
+    def test_without_controller_platform_is_ignored(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        order = []
+        scheduler.submit("yt", order.append, "yt", platform="YouTube")
+        scheduler.shutdown()
+        assert order == ["yt"]
+        assert scheduler.stats()["platforms"] == {}
+
+
+class TestCircuitGate:
+    """Jobs for a platform with an open circuit stay queued"""
+
+    def open_breaker(self, open_seconds):
+        breaker = core.CircuitBreaker(min_requests=1, open_seconds=open_seconds)
+        breaker.record_failure("YouTube")
+        return breaker
+
+    def test_open_circuit_defers_jobs(self):
+        scheduler = DownloadScheduler(max_workers=1, breaker=self.open_breaker(0.3))
+        order = []
+        scheduler.submit("yt", order.append, "yt", platform="YouTube")
+        scheduler.submit("bili", order.append, "bili", platform="Bilibili")
+        scheduler.shutdown()
+        # The YouTube job waited for the half-open probe window
+        assert order == ["bili", "yt"]
+
+    def test_stats_expose_circuits(self):
+        scheduler = DownloadScheduler(breaker=self.open_breaker(60))
+        circuits = scheduler.stats()["circuits"]
+        assert circuits["YouTube"]["state"] == "open"
+        assert circuits["YouTube"]["retry_in"] > 0
@@ -0,0 +1,120 @@
+"""
+Tests for streaming playlist archives
+"""
+import io
+import tarfile
+import threading
+import time
+import zipfile
+import pytest
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+
+from web.backend.api import download, playlists
+from web.backend.core.archive import iter_tar, iter_zip
+from web.backend.models import DownloadProgress
+
+
+@pytest.fixture
+def client():
+    from web.backend.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def playlist_dir(tmp_path):
+    directory = tmp_path / "My Playlist"
+    directory.mkdir()
+    (directory / "01 - first.mp4").write_bytes(b"first" * 1000)
+    (directory / "02 - second.mp4").write_bytes(b"second" * 1000)
+    (directory / "03 - third.mp4.part").write_bytes(b"partial")
+    with patch.object(playlists, "DOWNLOAD_DIR", tmp_path):
+        yield directory
+
+
+class TestArchiveWriters:
+    """Test the streaming ZIP/TAR generators"""
+
+    def test_zip_is_stored_and_readable(self, tmp_path):
+        video = tmp_path / "a.mp4"
+        video.write_bytes(b"x" * 5000)
+        data = b"".join(iter_zip([(video, "list/a.mp4")], chunk_size=1024))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            info = zf.getinfo("list/a.mp4")
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert zf.read("list/a.mp4") == b"x" * 5000
+
+    def test_zip_emits_data_while_reading(self, tmp_path):
+        video = tmp_path / "a.mp4"
+        video.write_bytes(b"x" * 10000)
+        chunks = list(iter_zip([(video, "a.mp4")], chunk_size=1000))
+        assert len(chunks) >= 10
+        assert max(len(c) for c in chunks) <= 1000 + 512
+
+    def test_tar_is_readable(self, tmp_path):
+        video = tmp_path / "b.mp4"
+        video.write_bytes(b"y" * 700)
+        data = b"".join(iter_tar([(video, "list/b.mp4")]))
+        assert len(data) % tarfile.BLOCKSIZE == 0
+        with tarfile.open(fileobj=io.BytesIO(data)) as tf:
+            assert tf.extractfile("list/b.mp4").read() == b"y" * 700
+
+    def test_entries_are_pulled_lazily(self, tmp_path):
+        video = tmp_path / "c.mp4"
+        video.write_bytes(b"z")
+        pulled = []
+
+        def entries():
+            pulled.append(1)
+            yield video, "c.mp4"
+            pulled.append(2)
+
+        archive = iter_zip(entries())
+        next(archive)
+        assert pulled == [1]
+
+
+class TestArchiveEndpoint:
+    """Test GET /api/playlists/{id}/archive"""
+
+    def test_directory_zip(self, client, playlist_dir):
+        response = client.get("/api/playlists/My Playlist/archive")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+            assert zf.namelist() == ["My Playlist/01 - first.mp4", "My Playlist/02 - second.mp4"]
+
+    def test_directory_tar(self, client, playlist_dir):
+        response = client.get("/api/playlists/My Playlist/archive", params={"format": "tar"})
+        with tarfile.open(fileobj=io.BytesIO(response.content)) as tf:
+            assert len(tf.getnames()) == 2
+
+    def test_unknown_or_escaping_playlist(self, client, playlist_dir):
+        assert client.get("/api/playlists/missing/archive").status_code == 404
+        assert client.get("/api/playlists/../archive").status_code == 404
+
+    def test_running_task_streams_items_as_they_finish(self, client, playlist_dir):
+        task_id = "playlist-task"
+        first, second = sorted(p for p in playlist_dir.iterdir() if p.suffix == ".mp4")
+        downloader = Mock(downloaded_files=[str(first)])
+        download.active_tasks[task_id] = DownloadProgress(task_id=task_id, status="downloading")
+        download.running_downloaders[task_id] = downloader
+
+        def finish_later():
+            time.sleep(0.1)
+            downloader.downloaded_files.append(str(second))
+            download.task_results[task_id] = {"success": True, "playlist": "My Playlist",
+                                              "files": list(downloader.downloaded_files)}
+            download.active_tasks[task_id].status = "completed"
+            download.running_downloaders.pop(task_id)
+
+        try:
+            with patch.object(playlists, "ARCHIVE_POLL_INTERVAL", 0.02):
+                threading.Thread(target=finish_later).start()
+                response = client.get(f"/api/playlists/{task_id}/archive")
+            with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+                assert len(zf.namelist()) == 2
+        finally:
+            download.active_tasks.pop(task_id, None)
+            download.task_results.pop(task_id, None)
+            download.running_downloaders.pop(task_id, None)
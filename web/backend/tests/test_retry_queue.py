@@ -0,0 +1,119 @@
+"""
+Tests for retries that wait in the scheduler queue instead of on a worker
+"""
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from web.backend import core
+from web.backend.api import download
+from web.backend.core.scheduler import DownloadScheduler, RetryLater
+from web.backend.models import DownloadRequest
+
+from .test_batch import wait_for
+
+
+class TestRetryLater:
+    """A job raising RetryLater runs again after its delay"""
+
+    def test_worker_serves_other_jobs_during_backoff(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        order = []
+
+        def flaky():
+            order.append("flaky")
+            if order.count("flaky") == 1:
+                raise RetryLater(0.2)
+
+        scheduler.submit("flaky", flaky)
+        scheduler.submit("other", order.append, "other")
+        assert wait_for(lambda: order.count("flaky") == 2)
+        assert order == ["flaky", "other", "flaky"]
+        stats = scheduler.stats()
+        assert stats["retried"] == 1
+        assert stats["completed"] == 2
+
+    def test_retrying_job_is_counted_and_cancellable(self):
+        scheduler = DownloadScheduler(max_workers=1)
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            raise RetryLater(60)
+
+        scheduler.submit("flaky", flaky)
+        assert wait_for(lambda: scheduler.stats()["retrying"] == 1)
+        assert scheduler.cancel("flaky")
+        assert scheduler.stats()["queued"] == 0
+        assert len(calls) == 1
+
+
+@pytest.mark.skipif(not core.CORE_AVAILABLE, reason="Core modules not available")
+class TestRunDownloadRetry:
+    """run_download turns DownloadRetry into a queued retry"""
+
+    def test_task_waits_pending_then_completes(self):
+        downloader = Mock()
+        failure = core.DownloadRetry(Exception("HTTP Error 502: Bad Gateway"), 0.2, 1)
+        downloader.download.side_effect = [failure, {"success": True, "filename": "x.mp4"}]
+
+        scheduler = DownloadScheduler(max_workers=1)
+        request = DownloadRequest(url="https://example.com/video")
+        task_id = "retry-task"
+        download.active_tasks[task_id] = download.DownloadProgress(task_id=task_id, status="pending")
+        with patch.object(download, "download_scheduler", scheduler):
+            scheduler.submit(task_id, download.run_download, task_id, request, downloader)
+
+            assert wait_for(lambda: download.active_tasks[task_id].retry_at is not None)
+            progress = download.active_tasks[task_id]
+            assert progress.status == "pending"
+            assert progress.attempt == 2
+            assert progress.retry_at > time.time()
+
+            assert wait_for(lambda: download.active_tasks[task_id].status == "completed")
+        assert downloader.download.call_count == 2
+        assert download.active_tasks[task_id].retry_at is None
+
+
+@pytest.mark.skipif(not core.CORE_AVAILABLE, reason="Core modules not available")
+class TestRunDownloadPostprocessing:
+    """With the post-processing pool the scheduler slot is freed before ffmpeg runs"""
+
+    def _submit(self, task_id, pending):
+        downloader = Mock()
+        downloader.pending_postprocess = pending
+        downloader.download.return_value = {
+            "success": True, "filename": "x.webm", "filepath": "/tmp/x.webm", "postprocessing": True,
+        }
+        download.active_tasks[task_id] = download.DownloadProgress(task_id=task_id, status="pending")
+        with patch.object(download, "download_dedup") as dedup:
+            download.run_download(task_id, DownloadRequest(url="https://example.com/video"), downloader)
+            # Returned to the scheduler while post-processing is still queued
+            assert download.active_tasks[task_id].status == "processing"
+            assert not dedup.complete.called and not dedup.release.called
+            callback = pending.add_done_callback.call_args[0][0]
+            return callback, dedup
+
+    def test_task_completes_with_post_processed_file(self):
+        pending = Mock()
+        callback, dedup = self._submit("pp-task", pending)
+        pending.error = None
+        pending.files = ["/tmp/x.mp3"]
+        with patch.object(download, "download_dedup", dedup):
+            callback(pending)
+        progress = download.active_tasks["pp-task"]
+        assert progress.status == "completed"
+        assert progress.filename == "x.mp3"
+        assert download.task_results["pp-task"]["filepath"] == "/tmp/x.mp3"
+        dedup.complete.assert_called_once_with("pp-task", "/tmp/x.mp3")
+
+    def test_post_processing_failure_fails_task(self):
+        pending = Mock()
+        callback, dedup = self._submit("pp-failed", pending)
+        pending.error = RuntimeError("ffmpeg not found")
+        with patch.object(download, "download_dedup", dedup):
+            callback(pending)
+        progress = download.active_tasks["pp-failed"]
+        assert progress.status == "failed"
+        assert "ffmpeg not found" in progress.error
+        dedup.release.assert_called_once_with("pp-failed")
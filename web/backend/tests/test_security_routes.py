@@ -0,0 +1,108 @@
+"""
+Tests for the shared route policy table used by the security middlewares
+"""
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from web.backend.security import auth, rate_limit
+from web.backend.security.routes import (
+    RoutePolicy,
+    RouteRule,
+    RoutePolicyTable,
+    route_policy_table,
+    classify_scope,
+    SCOPE_STATE_KEY,
+)
+
+
+class TestRoutePolicyTable:
+    """Test route classification"""
+
+    def test_download_start_is_protected(self):
+        policy = route_policy_table.classify("/api/download/start", "POST")
+        assert policy.require_auth is True
+        assert policy.rate_limited is True
+
+    def test_health_is_public(self):
+        policy = route_policy_table.classify("/health", "GET")
+        assert policy.require_auth is False
+        assert policy.rate_limited is False
+
+    def test_root_does_not_match_everything(self):
+        """"/" is an exact rule, it must not swallow /api/*"""
+        assert route_policy_table.classify("/", "GET").require_auth is False
+        assert route_policy_table.classify("/api/history/", "GET").require_auth is True
+
+    def test_prefix_requires_segment_boundary(self):
+        assert route_policy_table.classify("/static/css/main.css").require_auth is False
+        assert route_policy_table.classify("/static").require_auth is False
+        assert route_policy_table.classify("/staticfoo").require_auth is True
+
+    def test_method_aware_rules(self):
+        progress = route_policy_table.classify("/api/download/progress/abc", "GET")
+        assert progress.require_auth is True
+        assert progress.rate_limited is False
+        assert route_policy_table.classify("/health", "POST").require_auth is True
+
+    def test_longest_prefix_wins(self):
+        inner = RoutePolicy(name="inner", require_auth=False)
+        table = RoutePolicyTable([
+            RouteRule("/api", RoutePolicy(name="outer"), match="prefix"),
+            RouteRule("/api/public", inner, match="prefix"),
+        ])
+        assert table.classify("/api/public/x") is inner
+        assert table.classify("/api/private").name == "outer"
+
+    def test_unknown_match_type(self):
+        with pytest.raises(ValueError):
+            RoutePolicyTable([RouteRule("/x", RoutePolicy(name="x"), match="glob")])
+
+    def test_result_cached_on_scope(self):
+        scope = {"type": "http", "path": "/health", "method": "GET"}
+        first = classify_scope(scope)
+        assert scope["state"][SCOPE_STATE_KEY] is first
+
+        scope["path"] = "/api/download/start"
+        assert classify_scope(scope) is first
+
+
+class TestMiddlewareIntegration:
+    """Test that both middlewares enforce the route table"""
+
+    @pytest.fixture
+    def client(self):
+        test_app = FastAPI()
+
+        @test_app.get("/health")
+        async def health():
+            return {"ok": True}
+
+        @test_app.post("/api/download/start")
+        async def start():
+            return {"ok": True}
+
+        wrapped = auth.api_key_middleware(rate_limit.rate_limit_middleware(test_app))
+        return TestClient(wrapped)
+
+    def test_api_key_required_for_download_start(self, client):
+        with patch.object(auth, "API_KEY_ENABLED", True), \
+                patch.object(auth, "VALID_API_KEYS", {"secret"}):
+            assert client.post("/api/download/start").status_code == 401
+            assert client.post("/api/download/start", headers={"X-API-Key": "bad"}).status_code == 403
+            ok = client.post("/api/download/start", headers={"X-API-Key": "secret"})
+            assert ok.status_code == 200
+
+    def test_health_needs_no_api_key(self, client):
+        with patch.object(auth, "API_KEY_ENABLED", True), \
+                patch.object(auth, "VALID_API_KEYS", {"secret"}):
+            assert client.get("/health").status_code == 200
+
+    def test_download_start_is_rate_limited(self, client):
+        limiter = rate_limit.RateLimiter(requests=2, window=60)
+        with patch.object(rate_limit, "RATE_LIMIT_ENABLED", True), \
+                patch.object(rate_limit, "rate_limiter", limiter):
+            codes = [client.post("/api/download/start").status_code for _ in range(3)]
+            assert codes == [200, 200, 429]
+            assert client.get("/health").status_code == 200
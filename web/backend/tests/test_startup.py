@@ -0,0 +1,27 @@
+"""
+Startup tests: the web app must not load the downloader until it is needed
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+
+def test_app_import_does_not_load_downloader(tmp_path):
+    code = (
+        "import sys, web.backend.main; "
+        "print('loaded:' + ','.join(m for m in ('yt_dlp', 'download', 'uvicorn') if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, env={"HOME": str(tmp_path), "PATH": ""},
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == "loaded:"
+
+
+def test_core_names_resolve_lazily():
+    from web.backend import core
+    assert core.CORE_AVAILABLE is True
+    assert core.DownloadHistory is not None
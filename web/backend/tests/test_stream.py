@@ -0,0 +1,171 @@
+"""
+Tests for delivery=stream downloads and the bounded streaming relay
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from web.backend.api import download, files
+from web.backend.core.streaming import relay_chunks
+
+
+@pytest.fixture
+def client():
+    from web.backend.main import app
+    return TestClient(app)
+
+
+class TestRelayChunks:
+    """Test the producer thread / bounded queue relay"""
+
+    def test_backpressure_bounds_read_ahead(self):
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield bytes([i])
+
+        async def consume():
+            received = []
+            async for chunk in relay_chunks(source(), max_chunks=4):
+                received.append(chunk)
+                await asyncio.sleep(0.005)
+                # Queue (4) plus the chunk the producer is waiting to put
+                assert len(produced) - len(received) <= 6
+            return received
+
+        received = asyncio.run(consume())
+        assert len(received) == 100
+
+    def test_consumer_exit_closes_source(self):
+        closed = []
+
+        def source():
+            try:
+                while True:
+                    yield b"x" * 10
+            finally:
+                closed.append(True)
+
+        async def consume():
+            relay = relay_chunks(source(), max_chunks=2)
+            async for _ in relay:
+                break
+            await relay.aclose()
+
+        asyncio.run(consume())
+        deadline = time.monotonic() + 2
+        while not closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert closed == [True]
+
+    def test_source_errors_propagate(self):
+        def source():
+            yield b"a"
+            raise OSError("connection reset")
+
+        async def consume():
+            return [chunk async for chunk in relay_chunks(source())]
+
+        with pytest.raises(OSError):
+            asyncio.run(consume())
+
+
+class TestStreamDelivery:
+    """Test POST /api/download/start with delivery=stream"""
+
+    body = {"url": "https://youtu.be/abc", "cookies_browser": None, "delivery": "stream"}
+
+    def test_direct_format_is_relayed(self, client):
+        stream_format = {
+            "url": "https://cdn.example/v.mp4", "http_headers": {}, "ext": "mp4",
+            "title": "Clip", "filesize": 6, "platform": "YouTube",
+        }
+        with patch("web.backend.core.BingoDownloader") as mock_cls:
+            downloader = mock_cls.return_value
+            downloader.quality = None
+            downloader.resolve_stream_format.return_value = stream_format
+            downloader.iter_stream.return_value = iter([b"abc", b"def"])
+            response = client.post("/api/download/start", json=self.body)
+
+        assert response.status_code == 200
+        assert response.content == b"abcdef"
+        assert response.headers["content-type"] == "video/mp4"
+        assert "Clip.mp4" in response.headers["content-disposition"]
+        downloader.download.assert_not_called()
+        assert downloader.history.record_download.call_args.kwargs["filesize"] == 6
+        assert files.transfer_limiter.active == 0
+
+    def test_merge_required_falls_back_to_staging(self, client, tmp_path):
+        def staged_download(url):
+            path = downloader.download_path / "Clip.mkv"
+            path.write_bytes(b"merged")
+            return {"success": True, "filepath": str(path)}
+
+        with patch("web.backend.core.BingoDownloader") as mock_cls, \
+                patch.object(download, "DOWNLOAD_DIR", tmp_path):
+            downloader = mock_cls.return_value
+            downloader.resolve_stream_format.return_value = None
+            downloader.download.side_effect = staged_download
+            response = client.post("/api/download/start", json=self.body)
+
+        assert response.status_code == 200
+        assert response.content == b"merged"
+        # Nothing is kept once the response is sent
+        assert list((tmp_path / ".staging").iterdir()) == []
+
+    def test_retryable_failure_returns_503_and_cleans_staging(self, client, tmp_path):
+        from web.backend.core import DownloadRetry
+
+        def failing_download(url):
+            (downloader.download_path / "Clip.part").write_bytes(b"partial")
+            raise DownloadRetry(OSError("HTTP Error 429"), delay=7.5, attempt=1)
+
+        with patch("web.backend.core.BingoDownloader") as mock_cls, \
+                patch.object(download, "DOWNLOAD_DIR", tmp_path):
+            downloader = mock_cls.return_value
+            downloader.resolve_stream_format.return_value = None
+            downloader.download.side_effect = failing_download
+            response = client.post("/api/download/start", json=self.body)
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "8"
+        assert list((tmp_path / ".staging").iterdir()) == []
+
+    def test_unexpected_failure_returns_502_and_cleans_staging(self, client, tmp_path):
+        with patch("web.backend.core.BingoDownloader") as mock_cls, \
+                patch.object(download, "DOWNLOAD_DIR", tmp_path):
+            downloader = mock_cls.return_value
+            downloader.resolve_stream_format.return_value = None
+            downloader.download.side_effect = RuntimeError("boom")
+            response = client.post("/api/download/start", json=self.body)
+
+        assert response.status_code == 502
+        assert response.json()["detail"] == "Download failed: boom"
+        assert list((tmp_path / ".staging").iterdir()) == []
+
+    def test_open_circuit_returns_503(self, client, tmp_path):
+        from web.backend.core import CircuitOpenError
+
+        with patch("web.backend.core.BingoDownloader") as mock_cls, \
+                patch.object(download, "DOWNLOAD_DIR", tmp_path):
+            downloader = mock_cls.return_value
+            downloader.resolve_stream_format.return_value = None
+            downloader.download.side_effect = CircuitOpenError("YouTube", 42.2)
+            response = client.post("/api/download/start", json=self.body)
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "43"
+        assert "circuit open" in response.json()["detail"]
+        assert list((tmp_path / ".staging").iterdir()) == []
+
+    def test_batch_rejects_stream_delivery(self, client):
+        with patch("web.backend.core.BingoDownloader"):
+            response = client.post(
+                "/api/download/batch",
+                json={"urls": ["https://youtu.be/a"], "options": {"delivery": "stream"}},
+            )
+        assert response.status_code == 400
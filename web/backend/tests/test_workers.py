@@ -0,0 +1,172 @@
+"""
+Tests for downloads run in worker processes
+"""
+import socket
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from web.backend import core
+from web.backend.api import download
+from web.backend.core.workers import ProcessWorkerPool, RemoteDownload, WorkerCrashed
+from web.backend.models import DownloadRequest
+
+
+def _request(url: str) -> dict:
+    return DownloadRequest(url=url, quality="best", cookies_browser=None).model_dump(mode="json")
+
+
+class _FakePool:
+    """Replays a fixed list of worker events"""
+
+    def __init__(self, events):
+        self.events = events
+        self.jobs = []
+
+    def run(self, task_id, job, on_event):
+        self.jobs.append(job)
+        for event in self.events[:-1]:
+            on_event(event)
+        return self.events[-1]
+
+
+class TestRemoteDownload:
+    """The web-process stand-in translates worker events"""
+
+    def test_progress_files_and_feedback_are_relayed(self):
+        concurrency = Mock()
+        pool = _FakePool([
+            {"event": "ready", "pid": 1},
+            {"event": "progress", "status": "downloading", "downloaded_bytes": 50, "total_bytes": 100},
+            {"event": "file", "path": "/tmp/a.mp4"},
+            {"event": "feedback", "controller": "concurrency", "method": "record_throttle", "args": ["YouTube", 30]},
+            # Only record_* calls are replayed
+            {"event": "feedback", "controller": "concurrency", "method": "reset", "args": []},
+            {"event": "result", "result": {"success": True, "filepath": "/tmp/a.mp4"}},
+        ])
+        remote = RemoteDownload(pool, "t1", _request("https://example.com/v"), attempt=2,
+                                controllers={"concurrency": concurrency})
+        updates = []
+        remote.on_progress = updates.append
+
+        assert remote.download("https://example.com/v")["filepath"] == "/tmp/a.mp4"
+        assert pool.jobs[0]["attempt"] == 2
+        assert [u["downloaded_bytes"] for u in updates] == [50]
+        assert remote.downloaded_files == ["/tmp/a.mp4"]
+        concurrency.record_throttle.assert_called_once_with("YouTube", 30)
+        concurrency.reset.assert_not_called()
+
+    def test_retry_and_error_events_raise(self):
+        if not core.CORE_AVAILABLE:
+            pytest.skip("Core modules not available")
+        retry = RemoteDownload(_FakePool([{"event": "retry", "error": "HTTP Error 503", "delay": 4, "attempt": 1}]),
+                               "t1", _request("https://example.com/v"))
+        with pytest.raises(core.DownloadRetry) as excinfo:
+            retry.download("https://example.com/v")
+        assert excinfo.value.delay == 4
+        assert retry.attempt == 1
+
+        failed = RemoteDownload(_FakePool([{"event": "error", "error": "Video unavailable"}]),
+                                "t2", _request("https://example.com/v"))
+        with pytest.raises(RuntimeError, match="Video unavailable"):
+            failed.download("https://example.com/v")
+
+
+class TestRunDownloadInWorker:
+    """run_download hands the attempt to the worker pool when one is configured"""
+
+    def test_task_progress_comes_from_worker_events(self):
+        if not core.CORE_AVAILABLE:
+            pytest.skip("Core modules not available")
+        task_id = "worker-task"
+        seen = []
+        pool = _FakePool([
+            {"event": "progress", "status": "downloading", "downloaded_bytes": 25, "total_bytes": 100,
+             "_speed_str": " 1.00MiB/s", "_eta_str": "00:03"},
+            {"event": "progress", "status": "finished", "downloaded_bytes": 100, "total_bytes": 100},
+            {"event": "result", "result": {"success": True, "filename": "v.mp4"}},
+        ])
+        original_run = pool.run
+
+        def run(task_id, job, on_event):
+            def record(event):
+                on_event(event)
+                progress = download.active_tasks[task_id]
+                seen.append((progress.status, progress.progress, progress.speed))
+            return original_run(task_id, job, record)
+
+        pool.run = run
+        download.active_tasks[task_id] = download.DownloadProgress(task_id=task_id, status="pending")
+        with patch.object(download, "worker_pool", pool):
+            download.run_download(task_id, DownloadRequest(url="https://example.com/video"))
+
+        assert seen == [("downloading", 25.0, "1.00MiB/s"), ("processing", 25.0, "1.00MiB/s")]
+        assert pool.jobs[0]["url"] == "https://example.com/video"
+        assert download.active_tasks[task_id].status == "completed"
+        assert task_id not in download.running_downloaders
+
+
+@pytest.fixture(params=["forkserver", "spawn"])
+def pool(request):
+    if not core.CORE_AVAILABLE:
+        pytest.skip("Core modules not available")
+    pool = ProcessWorkerPool(size=1, max_jobs_per_worker=2, start_method=request.param)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def silent_server():
+    """A TCP server that accepts connections and never answers"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+
+    def serve():
+        try:
+            while True:
+                accepted.append(server.accept()[0])
+        except OSError:
+            pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/video.mp4"
+    server.close()
+    for conn in accepted:
+        conn.close()
+
+
+class TestProcessWorkerPool:
+    """Jobs run in reusable, recycled worker processes"""
+
+    def test_failure_comes_back_as_an_event_and_workers_are_recycled(self, pool):
+        # Nothing listens on port 9: the attempt fails inside the worker
+        url = "http://127.0.0.1:9/video.mp4"
+        breaker = Mock()
+        for task_id in ("t1", "t2", "t3"):
+            remote = RemoteDownload(pool, task_id, _request(url), controllers={"breaker": breaker})
+            with pytest.raises((core.DownloadRetry, RuntimeError)) as excinfo:
+                remote.download(url)
+            assert not isinstance(excinfo.value, WorkerCrashed)
+
+        stats = pool.stats()
+        assert stats["jobs"] == 3
+        # The first worker ran two jobs and was replaced
+        assert stats["started"] == 2
+        assert stats["recycled"] == 1
+        assert stats["crashed"] == 0
+        assert stats["processes"][0]["max_rss"] > 0
+        # The worker's failure feedback reached this process's breaker
+        assert breaker.record_failure.called
+
+    def test_abort_kills_the_worker(self, pool, silent_server):
+        remote = RemoteDownload(pool, "t1", _request(silent_server))
+        threading.Timer(3.0, remote.abort, args=("Download timed out",)).start()
+        with pytest.raises(WorkerCrashed, match="Download timed out"):
+            remote.download(silent_server)
+
+        stats = pool.stats()
+        assert stats["killed"] == 1
+        assert stats["workers"] == 0
+        assert stats["busy"] == 0
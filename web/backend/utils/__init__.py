@@ -7,6 +7,7 @@ from .logger import (
     log_api_call,
     create_legacy_logger,
 )
+from .singleflight import SingleFlight, TTLCache
 
 __all__ = [
     'BingoLogger',
@@ -15,4 +16,6 @@ __all__ = [
     'log_download_error',
     'log_api_call',
     'create_legacy_logger',
+    'SingleFlight',
+    'TTLCache',
 ]